@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import LAYOUT_STYLES, SECTION_STYLES, WORDS, make_paper
+from metrics import percentiles
+from pdfWorker import PDFWorker, PaperSections
+
+def regex_sections(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """The previous Researcher.extract_sections matching (None where it fell back to fixed slices)."""
+    text_lower = text.lower()
+    abstract_match = re.search(
+        r'abstract\s*\n(.*?)(?=\n\s*(?:introduction|1\.|\d\.|keywords))',
+        text_lower,
+        re.DOTALL
+    )
+    intro_match = re.search(
+        r'(?:introduction|1\.introduction)\s*\n(.*?)(?=\n\s*(?:2\.|background|related work))',
+        text_lower,
+        re.DOTALL
+    )
+    abstract = text[abstract_match.start(1):abstract_match.end(1)].strip() if abstract_match else None
+    introduction = text[intro_match.start(1):intro_match.end(1)].strip() if intro_match else None
+    return abstract, introduction
+
+def make_layout_corpus(folder: str, n_papers: int, pages: int, seed: int = 0) -> List[Tuple[str, str, List[str]]]:
+    """Synthetic papers in every heading style, with their titles and headings as ground truth."""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    styles = SECTION_STYLES + LAYOUT_STYLES
+    papers = []
+    for i in range(n_papers):
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(5, 10)))
+        path = os.path.join(folder, f"layout_{i:04d}.pdf")
+        headings = make_paper(path, title, pages=pages, seed=seed * 100003 + i, styles=[styles[i % len(styles)]])
+        papers.append((path, title, headings))
+    return papers
+
+def clean(section: Optional[str], headings: List[str]) -> bool:
+    """A section is clean if it was found and did not run into another section's heading."""
+    if not section:
+        return False
+    lowered = section.lower()
+    return not any(h.lower().rstrip('-') in lowered for h in headings if len(h) > 8)
+
+def evaluate(papers, method: Callable[[str, str], PaperSections], texts: Dict[str, str]) -> dict:
+    durations = []
+    counts = {"title": 0, "abstract": 0, "introduction": 0, "conclusion": 0, "references": 0}
+    for path, title, headings in papers:
+        start = time.perf_counter()
+        sections = method(path, texts[path])
+        durations.append(time.perf_counter() - start)
+        counts["title"] += int((sections.title or "").strip().lower() == title.lower())
+        counts["abstract"] += int(clean(sections.abstract, headings))
+        counts["introduction"] += int(clean(sections.introduction, headings))
+        counts["conclusion"] += int(clean(sections.conclusion, headings))
+        counts["references"] += int(sections.references_offset is not None)
+    return {"timing": percentiles(durations), "found": {k: v / len(papers) for k, v in counts.items()}}
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare section segmentation approaches')
+    parser.add_argument('--papers', type=int, default=60, help='Synthetic papers (default: 60)')
+    parser.add_argument('--pages', type=int, default=10, help='Pages per synthetic paper (default: 10)')
+    parser.add_argument('--pdf_dir', type=str, default=None,
+                        help='Folder of real PDFs to time and report found rates on (no ground truth)')
+    args = parser.parse_args()
+
+    worker = PDFWorker()
+    folder = tempfile.mkdtemp(prefix="bench_sections_")
+    papers = make_layout_corpus(folder, args.papers, args.pages)
+    texts = {path: worker.extract_text_from_pdf(path) for path, _, _ in papers}
+
+    def regex(path, text):
+        abstract, introduction = regex_sections(text)
+        return PaperSections(text=text, title=worker.extract_title_from_text(text),
+                             abstract=abstract, introduction=introduction)
+
+    methods = {
+        # Plain-text methods are timed without PDF extraction; the layout
+        # segmenter includes it, as it reads the PDF itself
+        "regex (previous)": regex,
+        "segment_text": lambda path, text: worker.segment_text(text),
+        "extract_text_from_pdf": lambda path, text: PaperSections(text=worker.extract_text_from_pdf(path)),
+        "extract_paper (layout)": lambda path, text: worker.extract_paper(path),
+    }
+    print(f"{len(papers)} synthetic papers, {args.pages} pages, "
+          f"{len(SECTION_STYLES) + len(LAYOUT_STYLES)} heading styles")
+    for name, method in methods.items():
+        result = evaluate(papers, method, texts)
+        found = " ".join(f"{k}={v:.0%}" for k, v in result["found"].items())
+        print(f"  {name:<24} p50={result['timing']['p50'] * 1000:7.2f}ms "
+              f"p95={result['timing']['p95'] * 1000:7.2f}ms  {found}")
+
+    # Worst case for the lazy regex: a long text whose abstract never reaches a terminator
+    long_text = "Abstract\n" + " ".join(random.Random(0).choice(WORDS) for _ in range(400000))
+    for name, func in (("regex (previous)", regex_sections), ("segment_text", worker.segment_text)):
+        start = time.perf_counter()
+        func(long_text)
+        print(f"  {len(long_text) // 1000} kB text without section breaks, {name}: "
+              f"{(time.perf_counter() - start) * 1000:.1f}ms")
+
+    if args.pdf_dir:
+        paths = sorted(os.path.join(args.pdf_dir, f) for f in os.listdir(args.pdf_dir) if f.lower().endswith('.pdf'))
+        found = {"abstract": 0, "introduction": 0, "conclusion": 0, "references": 0}
+        regex_found = {"abstract": 0, "introduction": 0}
+        durations = []
+        for path in paths:
+            start = time.perf_counter()
+            sections = worker.extract_paper(path)
+            durations.append(time.perf_counter() - start)
+            if not sections:
+                continue
+            for key in ("abstract", "introduction", "conclusion"):
+                found[key] += int(bool(getattr(sections, key)))
+            found["references"] += int(sections.references_offset is not None)
+            abstract, introduction = regex_sections(worker.extract_text_from_pdf(path) or "")
+            regex_found["abstract"] += int(bool(abstract))
+            regex_found["introduction"] += int(bool(introduction))
+        if paths:
+            print(f"\n{len(paths)} PDFs in {args.pdf_dir}, layout p50={percentiles(durations)['p50'] * 1000:.1f}ms")
+            print("  layout: " + " ".join(f"{k}={v / len(paths):.0%}" for k, v in found.items()))
+            print("  regex:  " + " ".join(f"{k}={v / len(paths):.0%}" for k, v in regex_found.items()))
+
+
+if __name__ == "__main__":
+    main()
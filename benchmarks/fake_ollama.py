@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+
+class FakeOllamaServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, base_latency: float = 0.05,
+                 prefill_tokens_per_second: float = 2000.0, tokens_per_second: float = 50.0,
+                 failure_rate: float = 0.0, topic_match_rate: float = 1.0, seed: Optional[int] = None):
+        """
+        Local stand-in for an Ollama server.
+        Answers /api/chat with JSON that validates against the requested `format`
+        schema, after a delay modelled on prompt and output size.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            base_latency (float): Fixed seconds added to every request
+            prefill_tokens_per_second (float): Simulated prompt processing speed
+            tokens_per_second (float): Simulated generation speed
+            failure_rate (float): Fraction of chat requests answered with HTTP 500
+            topic_match_rate (float): Fraction of analyses assigned to one of the topics in the prompt
+            seed (Optional[int]): Random seed for reproducible failures and topic choices
+        """
+        self.base_latency = base_latency
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.topic_match_rate = topic_match_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _fake_value(self, schema: dict, defs: dict, name: str, prompt: str):
+        """Build a value that validates against a JSON schema fragment."""
+        if "$ref" in schema:
+            schema = defs[schema["$ref"].split("/")[-1]]
+        if "anyOf" in schema:
+            non_null = [s for s in schema["anyOf"] if s.get("type") != "null"]
+            return self._fake_value(non_null[0], defs, name, prompt) if non_null else None
+        kind = schema.get("type")
+        if kind == "object":
+            props = schema.get("properties", {})
+            return {key: self._fake_value(sub, defs, key, prompt) for key, sub in props.items()}
+        if kind == "array" and name == "titles":
+            # Batched title prompt: answer each "[P1]" block with its first line
+            return [{"paper_id": paper_id, "title": first_line.strip()}
+                    for paper_id, first_line in re.findall(r"^\s*\[(P\d+)\]\s*\n\s*(.+)$", prompt, re.MULTILINE)]
+        if kind == "array":
+            return [self._fake_value(schema.get("items", {}), defs, name, prompt) for _ in range(3)]
+        if kind == "integer":
+            return 2024 if name == "year" else 1
+        if kind == "number":
+            return 0.5
+        if kind == "boolean":
+            return self.random.random() < 0.2
+        if name == "main_topic":
+            return self._pick_topic(prompt)
+        if name == "title":
+            # Unique per paper so synthetic papers are never mistaken for duplicates
+            return "Synthetic Paper " + hashlib.sha1(prompt.encode()).hexdigest()[:12]
+        if name in ("related_paper", "method_comparison"):
+            return ""
+        return f"synthetic {name.replace('_', ' ')}"
+
+    def _pick_topic(self, prompt: str) -> str:
+        """Choose one of the topics listed in an analyze_paper prompt."""
+        match = re.search(r"Available research topics.*?:\s*\n(.*?)\n\s*\n", prompt, re.DOTALL)
+        topics = re.findall(r"^\s*- (.+)$", match.group(1), re.MULTILINE) if match else []
+        if topics and self.random.random() < self.topic_match_rate:
+            return self.random.choice(topics).strip()
+        return ""
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path.startswith("/api/tags"):
+                    self._send(200, {"models": [{"name": "fake", "model": "fake"}]})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.startswith("/api/chat"):
+                    self._send(404, {"error": "not found"})
+                    return
+
+                with server.lock:
+                    server.requests += 1
+                    fail = server.random.random() < server.failure_rate
+                    if fail:
+                        server.failures += 1
+                if fail:
+                    time.sleep(server.base_latency)
+                    self._send(500, {"error": "simulated failure"})
+                    return
+
+                prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+                schema = request.get("format") or {"type": "object", "properties": {}}
+                if not isinstance(schema, dict):
+                    schema = {"type": "object", "properties": {}}
+                with server.lock:
+                    content = json.dumps(server._fake_value(schema, schema.get("$defs", {}), "", prompt))
+
+                # Roughly 4 characters per token
+                prompt_tokens = max(1, len(prompt) // 4)
+                output_tokens = max(1, len(content) // 4)
+                prefill = prompt_tokens / server.prefill_tokens_per_second
+                generation = output_tokens / server.tokens_per_second
+                time.sleep(server.base_latency + prefill + generation)
+
+                self._send(200, {
+                    "model": request.get("model", "fake"),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": content},
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": int((server.base_latency + prefill + generation) * 1e9),
+                    "load_duration": int(server.base_latency * 1e9),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(prefill * 1e9),
+                    "eval_count": output_tokens,
+                    "eval_duration": int(generation * 1e9),
+                })
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a fake Ollama server for benchmarks')
+    parser.add_argument('--port', type=int, default=11435, help='Port to listen on (default: 11435)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Base latency per request in seconds')
+    parser.add_argument('--tokens_per_second', type=float, default=50.0, help='Simulated generation speed')
+    parser.add_argument('--failure_rate', type=float, default=0.0, help='Fraction of requests that fail')
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(port=args.port, base_latency=args.latency,
+                              tokens_per_second=args.tokens_per_second, failure_rate=args.failure_rate)
+    print(f"Fake Ollama server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
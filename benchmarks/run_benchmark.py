@@ -0,0 +1,213 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.synthetic_corpus import make_corpus
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+TOPICS = {
+    "Clinical Machine Learning": {
+        "description": "Machine learning models for clinical prediction from health records",
+        "current_status": "Moving from retrospective benchmarks to prospective validation",
+        "important_papers": [
+            {"title": "Scalable and accurate deep learning with electronic health records",
+             "summary": "Deep models on raw EHR data outperform hand-engineered features"},
+        ],
+        "key_challenges": ["distribution shift", "label noise"],
+    },
+    "Graph Representation Learning": {
+        "description": "Learning vector representations of nodes and graphs",
+        "current_status": "Message passing dominates; expressivity and scale are open problems",
+        "important_papers": [
+            {"title": "Semi-Supervised Classification with Graph Convolutional Networks",
+             "summary": "Spectral graph convolutions simplified to a first-order approximation"},
+        ],
+        "key_challenges": ["over-smoothing", "scalability"],
+    },
+}
+
+SCENARIOS = {
+    "small": {"papers": 10, "pages": 8, "latency": 0.02, "tokens_per_second": 2000.0, "failure_rate": 0.0},
+    "long_papers": {"papers": 10, "pages": 40, "latency": 0.02, "tokens_per_second": 2000.0, "failure_rate": 0.0},
+    "slow_model": {"papers": 10, "pages": 8, "latency": 0.2, "tokens_per_second": 200.0, "failure_rate": 0.0},
+    "flaky_model": {"papers": 20, "pages": 8, "latency": 0.02, "tokens_per_second": 2000.0, "failure_rate": 0.1},
+    "large_corpus": {"papers": 200, "pages": 8, "latency": 0.0, "tokens_per_second": 1e6, "failure_rate": 0.0},
+    # Thesis-sized documents: peak RSS should match the small scenario
+    "oversized": {"papers": 4, "pages": 600, "latency": 0.0, "tokens_per_second": 1e6, "failure_rate": 0.0},
+}
+
+def _run_scenario(name: str, config: dict, corpus: str, result_queue):
+    """Run process_papers over a corpus against a fake server (in a fresh process)."""
+    from client import OllamaClient
+    from database import PaperDatabase
+    from topic_database import TopicDatabase
+    from researcher import Researcher
+    from metrics import METRICS
+    import main as pipeline
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    os.chdir(workdir)
+    topic_db = TopicDatabase(os.path.join(workdir, "topics.json"))
+    for topic, info in TOPICS.items():
+        topic_db.insert_topic(topic, info)
+    paper_db = PaperDatabase(os.path.join(workdir, "papers.json"))
+
+    server = FakeOllamaServer(base_latency=config["latency"], tokens_per_second=config["tokens_per_second"],
+                              failure_rate=config["failure_rate"], seed=0).start()
+    client = OllamaClient(model="fake", host=server.url, eject_seconds=0.05)
+    researcher = Researcher(client)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    METRICS.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        pipeline.process_papers(corpus, paper_db, topic_db, researcher)
+    wall = time.perf_counter() - start
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    server.stop()
+    timings = METRICS.summary()
+
+    stored = len(paper_db._load_db())
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    result_queue.put({
+        "name": name,
+        "config": config,
+        "papers": config["papers"],
+        "papers_stored": stored,
+        "wall_seconds": wall,
+        "papers_per_second": stored / wall if wall else 0.0,
+        "stages": timings["stages"],
+        "llm": timings["llm"],
+        "peak_rss_mb": rss_peak / rss_unit,
+        "rss_before_run_mb": rss_before / rss_unit,
+        "llm_requests": server.requests,
+        "llm_failures": server.failures,
+    })
+
+def run_scenario(name: str, config: dict, corpus_root: str, timeout: float = 1800) -> dict:
+    """
+    Generate the corpus, then run the scenario in a spawned process so peak RSS is per scenario.
+    A child that dies without a result, or runs longer than timeout seconds,
+    is reported as a failed scenario.
+    """
+    corpus = os.path.join(corpus_root, f"{name}_{config['papers']}x{config['pages']}")
+    if not os.path.isdir(corpus):
+        make_corpus(corpus, config["papers"], config["pages"], seed=1)
+
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_run_scenario, args=(name, config, corpus, result_queue))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None and time.monotonic() < deadline:
+        try:
+            result = result_queue.get(timeout=1.0)
+        except queue.Empty:
+            if not proc.is_alive():
+                # The result may have been sent just before the child exited
+                try:
+                    result = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    break
+    if result is None and proc.is_alive():
+        proc.terminate()
+    proc.join()
+    if result is None:
+        reason = f"exit code {proc.exitcode}" if time.monotonic() < deadline else f"timed out after {timeout:.0f}s"
+        return {"name": name, "config": config, "papers": config["papers"], "error": reason}
+    return result
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(RESULTS_DIR), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def print_report(results: dict, baseline: Optional[dict] = None):
+    """Print throughput and stage latencies, with the change against a baseline run if given."""
+    previous = {s["name"]: s for s in (baseline or {}).get("scenarios", [])}
+    for scenario in results["scenarios"]:
+        if "error" in scenario:
+            print(f"\n{scenario['name']}: FAILED ({scenario['error']})")
+            continue
+        line = (f"\n{scenario['name']}: {scenario['papers_stored']}/{scenario['papers']} papers in "
+                f"{scenario['wall_seconds']:.2f}s ({scenario['papers_per_second']:.2f} papers/s, "
+                f"peak RSS {scenario['peak_rss_mb']:.0f} MB)")
+        if previous.get(scenario["name"], {}).get("papers_per_second"):
+            ratio = scenario["papers_per_second"] / previous[scenario["name"]]["papers_per_second"]
+            line += f" [{ratio:.2f}x baseline]"
+        print(line)
+        for stage, stats in scenario["stages"].items():
+            if stats["count"]:
+                print(f"  {stage:<26} n={stats['count']:<5} p50={stats['p50'] * 1000:8.1f}ms "
+                      f"p95={stats['p95'] * 1000:8.1f}ms p99={stats['p99'] * 1000:8.1f}ms")
+        llm = scenario.get("llm")
+        if llm and llm["requests"]:
+            print(f"  LLM: {llm['prompt_tokens']} prompt / {llm['completion_tokens']} completion tokens, "
+                  f"{llm['reloads']} reloads")
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark against a fake Ollama server')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS),
+                        choices=list(SCENARIOS), help='Scenarios to run (default: all)')
+    parser.add_argument('--corpus_dir', type=str, default=os.path.join(tempfile.gettempdir(), "chatpapers_bench_corpus"),
+                        help='Where synthetic corpora are generated and cached')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Result JSON path (default: benchmarks/results/<timestamp>_<commit>.json)')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Previous result JSON to compare throughput against')
+    parser.add_argument('--timeout', type=float, default=1800,
+                        help='Seconds after which a scenario is stopped and reported as failed (default: 1800)')
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": [],
+    }
+    for name in args.scenarios:
+        print(f"Running scenario '{name}'...")
+        results["scenarios"].append(run_scenario(name, SCENARIOS[name], args.corpus_dir, args.timeout))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{results['commit'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nSaved results to {output}")
+    if any("error" in scenario for scenario in results["scenarios"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+WORDS = (
+    "model data learning network training method results performance task approach "
+    "benchmark dataset evaluation language representation attention transformer graph "
+    "inference optimization generalization robust efficient baseline experiments analysis "
+    "propose framework accuracy loss gradient sampling retrieval reasoning temporal clinical"
+).split()
+
+SECTION_STYLES = [
+    ["Abstract", "1. Introduction", "2. Related Work", "3. Method", "4. Experiments", "5. Conclusion", "References"],
+    ["ABSTRACT", "I. INTRODUCTION", "II. RELATED WORK", "III. METHOD", "IV. EXPERIMENTS", "V. CONCLUSION", "REFERENCES"],
+    ["Abstract", "1 Introduction", "2 Background", "3 Approach", "4 Evaluation", "5 Conclusions", "References"],
+]
+
+# Further layouts seen in the wild, used by the section segmentation benchmark:
+# IEEE-style abstract run into its paragraph ("Abstract--...", the base-14
+# fonts have no em dash), unnumbered
+# journal headings, and numbers followed by upper-case words without a period
+LAYOUT_STYLES = [
+    ["Abstract--", "I. INTRODUCTION", "II. BACKGROUND", "III. PROPOSED METHOD", "IV. RESULTS",
+     "V. CONCLUSIONS AND FUTURE WORK", "REFERENCES"],
+    ["Summary", "Introduction", "Results", "Methods", "Discussion", "Concluding remarks", "Bibliography"],
+    ["ABSTRACT", "1 INTRODUCTION", "2 RELATED WORK", "3 METHODOLOGY", "4 EXPERIMENTS", "5 CONCLUSION", "REFERENCES"],
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 72
+
+def _sentence(rng: random.Random, extra_words: List[str]) -> str:
+    vocab = WORDS + extra_words
+    words = [rng.choice(vocab) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng: random.Random, extra_words: List[str], sentences: int = 6) -> str:
+    return " ".join(_sentence(rng, extra_words) for _ in range(sentences))
+
+def make_paper(path: str, title: str, pages: int = 8, seed: int = 0, extra_words: Optional[List[str]] = None,
+               styles: Optional[List[List[str]]] = None) -> List[str]:
+    """
+    Write a synthetic paper-shaped PDF: a large-font title, authors, numbered
+    sections in one of several heading styles, and filler paragraphs.
+
+    Args:
+        path (str): Output PDF path
+        title (str): Paper title printed on page one
+        pages (int): Number of pages
+        seed (int): Random seed for the filler text and heading style
+        extra_words (Optional[List[str]]): Additional vocabulary (e.g. topic keywords)
+        styles (Optional[List[List[str]]]): Heading styles to pick from (default: SECTION_STYLES)
+
+    Returns:
+        List[str]: The section headings used
+    """
+    rng = random.Random(seed)
+    extra_words = extra_words or []
+    sections = rng.choice(styles or SECTION_STYLES)
+    doc = fitz.open()
+    doc.set_metadata({"title": title if rng.random() < 0.5 else "", "author": "Synthetic Author"})
+    box_width = PAGE_WIDTH - 2 * MARGIN
+
+    for page_number in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = MARGIN
+        if page_number == 0:
+            rect = fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 60)
+            page.insert_textbox(rect, title, fontsize=16, fontname="hebo", align=fitz.TEXT_ALIGN_CENTER)
+            y += 70
+            page.insert_textbox(fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 24),
+                                "Alice Author, Bob Builder, Carol Coder", fontsize=10,
+                                align=fitz.TEXT_ALIGN_CENTER)
+            y += 30
+
+        # Abstract and introduction on page one, conclusion and references on the
+        # last page, the remaining sections in order over the pages in between
+        middle = sections[2:-2]
+        if page_number == 0:
+            headings = sections[:2]
+        elif page_number == pages - 1:
+            headings = sections[-2:]
+        else:
+            index = (page_number - 1) * len(middle) // max(1, pages - 2)
+            previous = (page_number - 2) * len(middle) // max(1, pages - 2) if page_number > 1 else -1
+            headings = [middle[index]] if index != previous else []
+
+        for position, heading in enumerate(headings or [None]):
+            inline = heading and heading.endswith("--")
+            if heading and not inline:
+                page.insert_textbox(fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 24), heading,
+                                    fontsize=12, fontname="hebo")
+                y += 26
+            # Share the remaining space between this and the following sections
+            height = (PAGE_HEIGHT - MARGIN - y) / max(1, len(headings) - position) - 24
+            if height <= 20:
+                break
+            rect = fitz.Rect(MARGIN, y, MARGIN + box_width, y + height)
+            paragraph = _paragraph(rng, extra_words, sentences=12)
+            page.insert_textbox(rect, f"{heading}{paragraph}" if inline else paragraph, fontsize=9.5)
+            y += height + 4
+
+    doc.save(path)
+    doc.close()
+    return sections
+
+def make_corpus(folder: str, n_papers: int = 20, pages: int = 8, seed: int = 0,
+                extra_words: Optional[List[str]] = None) -> List[str]:
+    """
+    Generate a folder of synthetic PDFs.
+
+    Returns:
+        List[str]: Paths of the generated files
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n_papers):
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(5, 10)))
+        path = os.path.join(folder, f"synthetic_{i:05d}.pdf")
+        make_paper(path, title, pages=pages, seed=seed * 100003 + i, extra_words=extra_words)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic PDF corpus')
+    parser.add_argument('folder', type=str, help='Output folder')
+    parser.add_argument('--papers', type=int, default=20, help='Number of papers (default: 20)')
+    parser.add_argument('--pages', type=int, default=8, help='Pages per paper (default: 8)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    paths = make_corpus(args.folder, args.papers, args.pages, args.seed)
+    print(f"Generated {len(paths)} PDFs in {args.folder}")
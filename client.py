@@ -1,35 +1,251 @@
-from typing import Type, TypeVar, Any
-from ollama import chat
+import threading
+import time
+from typing import Type, TypeVar, Any, Optional, List, Union, Tuple
+from ollama import Client, ResponseError
 from pydantic import BaseModel
 
+from metrics import METRICS
+
 T = TypeVar('T', bound=BaseModel)
 
+class Endpoint:
+    """A single Ollama server in the client's pool."""
+
+    def __init__(self, host: Optional[str], max_concurrency: int = 1, timeout: Optional[float] = None):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.client = Client(host=host, timeout=timeout)
+        self.outstanding = 0
+        self.healthy = True
+        self.probing = False
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.completed = 0
+        self.failed = 0
+
+    def __repr__(self):
+        state = "healthy" if self.healthy else "ejected"
+        return f"Endpoint({self.host or 'default'}, {state}, outstanding={self.outstanding}/{self.max_concurrency})"
+
 class OllamaClient:
-    def __init__(self, model: str = 'llama2'):
+    def __init__(self, model: str = 'llama2', host: Optional[str] = None,
+                 endpoints: Optional[List[Union[str, Tuple[str, int]]]] = None,
+                 max_concurrency: int = 1, eject_seconds: float = 30.0, eject_after: int = 3,
+                 acquire_timeout: Optional[float] = None, request_timeout: Optional[float] = None,
+                 keep_alive: Optional[Union[float, str]] = None):
+        """
+        Args:
+            model: Name of the Ollama model
+            host: Ollama server URL (default: OLLAMA_HOST or localhost)
+            endpoints: Pool of Ollama server URLs, or (url, max_concurrency) pairs.
+                Requests go to the healthy endpoint with the fewest outstanding requests
+                and fail over to another endpoint if the server is unreachable or errors.
+            max_concurrency: Per-endpoint limit on in-flight requests for plain URLs
+            eject_seconds: How long a failed endpoint is taken out of rotation
+                before it is health-checked again
+            eject_after: Consecutive failures before an endpoint is taken out of rotation;
+                the last healthy endpoint is never taken out
+            acquire_timeout: Seconds to wait for an endpoint to become healthy (default: eject_seconds)
+            request_timeout: HTTP timeout for a single request (default: no timeout)
+            keep_alive: How long the server keeps a model loaded after a request,
+                e.g. "30m" or -1 for as long as the server runs (default: the server's setting)
+        """
         self.model = model
-    
-    def get_structured_response(self, prompt: str, output_model: Type[T]) -> T:
+        self.keep_alive = keep_alive
+        self.host = host
+        self.eject_seconds = eject_seconds
+        self.eject_after = max(1, eject_after)
+        self.acquire_timeout = acquire_timeout if acquire_timeout is not None else eject_seconds
+
+        self.endpoints: List[Endpoint] = []
+        for entry in endpoints or [host]:
+            if isinstance(entry, (tuple, list)):
+                url, limit = entry
+            else:
+                url, limit = entry, max_concurrency
+            self.endpoints.append(Endpoint(url, limit, timeout=request_timeout))
+        self._cond = threading.Condition()
+        # Index after the last endpoint handed out, to rotate between equally loaded endpoints
+        self._next = 0
+        # Token usage reported by Ollama, summed over all requests
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _health_check(self, endpoint: Endpoint) -> bool:
+        """Return True if the endpoint answers its model listing."""
+        try:
+            endpoint.client.list()
+            return True
+        except Exception:
+            return False
+
+    def _readmit_due_endpoints(self):
+        """Health-check ejected endpoints whose cool-down has passed and re-admit the ones that respond."""
+        now = time.monotonic()
+        with self._cond:
+            due = [e for e in self.endpoints if not e.healthy and not e.probing and now >= e.ejected_until]
+            for endpoint in due:
+                endpoint.probing = True
+
+        for endpoint in due:
+            ok = self._health_check(endpoint)
+            with self._cond:
+                endpoint.probing = False
+                if ok:
+                    endpoint.healthy = True
+                    endpoint.consecutive_failures = 0
+                    print(f"Ollama endpoint {endpoint.host or 'default'} re-admitted")
+                    self._cond.notify_all()
+                else:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+
+    def _acquire(self, exclude: List[Endpoint]) -> Endpoint:
+        """
+        Reserve a slot on the healthy endpoint with the fewest outstanding requests.
+        Waits while every healthy endpoint is at its concurrency limit, and for up to
+        acquire_timeout seconds while no endpoint is healthy.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            self._readmit_due_endpoints()
+            with self._cond:
+                candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+                if not candidates and not any(e not in exclude for e in self.endpoints):
+                    raise ConnectionError("All Ollama endpoints failed for this request")
+
+                available = [e for e in candidates if e.outstanding < e.max_concurrency]
+                if available:
+                    # Least loaded first; ties (e.g. all idle for sequential calls) go round-robin
+                    n = len(self.endpoints)
+                    endpoint = min(available, key=lambda e: (
+                        e.outstanding / e.max_concurrency, (self.endpoints.index(e) - self._next) % n))
+                    self._next = (self.endpoints.index(endpoint) + 1) % n
+                    endpoint.outstanding += 1
+                    return endpoint
+
+                if candidates:
+                    # Healthy but busy: queue until a slot is released
+                    deadline = time.monotonic() + self.acquire_timeout
+                    self._cond.wait(1.0)
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a healthy Ollama endpoint")
+                # Wake up when the next ejected endpoint is due for a health check
+                next_probe = min(e.ejected_until for e in self.endpoints if not e.healthy and e not in exclude)
+                self._cond.wait(max(0.01, min(remaining, next_probe - time.monotonic())))
+
+    def _release(self, endpoint: Endpoint, error: Optional[Exception] = None):
+        """
+        Return a slot to the pool. An endpoint is ejected after eject_after consecutive
+        server-side failures, unless it is the last healthy one.
+        """
+        with self._cond:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.completed += 1
+                endpoint.consecutive_failures = 0
+            else:
+                endpoint.failed += 1
+                endpoint.consecutive_failures += 1
+                others_healthy = any(e.healthy for e in self.endpoints if e is not endpoint)
+                if endpoint.healthy and endpoint.consecutive_failures >= self.eject_after and others_healthy:
+                    print(f"Ejecting Ollama endpoint {endpoint.host or 'default'} after "
+                          f"{endpoint.consecutive_failures} failures: {error}")
+                    endpoint.healthy = False
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            self._cond.notify_all()
+
+    @staticmethod
+    def _is_endpoint_failure(error: Exception) -> bool:
+        """Connection problems and server errors are endpoint failures; client errors are not."""
+        if isinstance(error, ResponseError):
+            return error.status_code < 0 or error.status_code >= 500
+        return True
+
+    def _chat(self, **kwargs) -> Any:
+        """Send a chat request through the pool, failing over between endpoints."""
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self._acquire(exclude=tried)
+            try:
+                response = endpoint.client.chat(**kwargs)
+            except Exception as e:
+                if not self._is_endpoint_failure(e):
+                    self._release(endpoint)
+                    raise
+                self._release(endpoint, error=e)
+                tried.append(endpoint)
+                if len(tried) >= len(self.endpoints):
+                    raise
+                continue
+            self._release(endpoint)
+            METRICS.record_llm(response, model=kwargs.get('model'), endpoint=endpoint.host)
+            return response
+
+    def endpoint_stats(self) -> List[dict]:
+        """Current state and request counts of each endpoint."""
+        with self._cond:
+            return [
+                {
+                    "host": e.host,
+                    "healthy": e.healthy,
+                    "outstanding": e.outstanding,
+                    "max_concurrency": e.max_concurrency,
+                    "completed": e.completed,
+                    "failed": e.failed,
+                }
+                for e in self.endpoints
+            ]
+
+    def warm_up(self, models: Optional[List[str]] = None):
+        """
+        Load models on every endpoint ahead of the first request.
+
+        An empty chat request makes Ollama load the model without generating
+        anything; with keep_alive set, the model then stays resident.
+
+        Args:
+            models: Models to load (default: the client's model)
+        """
+        for endpoint in self.endpoints:
+            for model in models or [self.model]:
+                start = time.monotonic()
+                try:
+                    endpoint.client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+                except Exception as e:
+                    print(f"Could not load {model} on {endpoint.host or 'default'}: {e}")
+                    continue
+                print(f"Loaded {model} on {endpoint.host or 'default'} in {time.monotonic() - start:.1f}s")
+
+    def get_structured_response(self, prompt: str, output_model: Type[T], model: Optional[str] = None) -> T:
         """
         Get a structured response from the Ollama model
-        
+
         Args:
             prompt: The input prompt
             output_model: The Pydantic model class to structure the output
-            
+            model: Model for this request (default: the client's model)
+
         Returns:
             Structured response as the specified Pydantic model
         """
-        response = chat(
+        response = self._chat(
             messages=[
                 {
                     'role': 'user',
                     'content': prompt,
                 }
             ],
-            model=self.model,
+            model=model or self.model,
             format=output_model.model_json_schema(),
+            keep_alive=self.keep_alive,
         )
-        
+        with self._cond:
+            self.usage["requests"] += 1
+            self.usage["prompt_tokens"] += getattr(response, 'prompt_eval_count', None) or 0
+            self.usage["completion_tokens"] += getattr(response, 'eval_count', None) or 0
+
         return output_model.model_validate_json(response.message.content)
 
 # Example usage
@@ -38,10 +254,18 @@ if __name__ == "__main__":
         name: str
         capital: str
         languages: list[str]
-    
+
     client = OllamaClient(model='llama3.1')
     country = client.get_structured_response(
         prompt='Tell me about Canada.',
         output_model=Country
     )
-    print(country)
\ No newline at end of file
+    print(country)
+
+    # Spread requests over several Ollama servers, two in flight per server
+    pooled = OllamaClient(
+        model='llama3.1',
+        endpoints=['http://localhost:11434', 'http://localhost:11435'],
+        max_concurrency=2
+    )
+    print(pooled.endpoint_stats())
@@ -1,28 +1,64 @@
-import json
 import os
+from contextlib import contextmanager
+from file_lock import locked, atomic_write_json, read_json
+from metrics import timed
 
 class PaperDatabase:
     def __init__(self, db_file="papers.json"):
         """Initialize the database with a file path."""
         self.db_file = db_file
+        # (file signature, parsed contents) of the last read; shared by readers, so never modified
+        self._cache = None
         self._ensure_db_exists()
 
     def _ensure_db_exists(self):
         """Create the database file if it doesn't exist."""
-        if not os.path.exists(self.db_file):
-            with open(self.db_file, 'w') as f:
-                json.dump({}, f)
+        with locked(self.db_file):
+            if not os.path.exists(self.db_file):
+                atomic_write_json(self.db_file, {})
+
+    def _signature(self):
+        """Identity of the file's current version; writes replace the file, so it changes with every write."""
+        try:
+            stat = os.stat(self.db_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
 
     def _load_db(self):
-        """Load the current state of the database."""
-        with open(self.db_file, 'r') as f:
-            return json.load(f)
+        """
+        Load the current state of the database.
+        The file is parsed again only when it changed since the last read, so
+        a long-running process does not re-read an unchanged database on every
+        lookup. The returned dictionary must not be modified.
+        """
+        with locked(self.db_file, exclusive=False):
+            signature = self._signature()
+            cached = self._cache
+            if cached is None or cached[0] != signature:
+                cached = (signature, read_json(self.db_file, default={}))
+                self._cache = cached
+            return cached[1]
 
     def _save_db(self, data):
         """Save the database state to file."""
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        with locked(self.db_file):
+            atomic_write_json(self.db_file, data)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Read-modify-write the database under an exclusive lock.
+        Yields the freshly loaded dictionary; changes made to it are written
+        back atomically on exit, so concurrent writers never lose updates.
+        """
+        with locked(self.db_file):
+            data = read_json(self.db_file, default={})
+            yield data
+            atomic_write_json(self.db_file, data)
+            self._cache = (self._signature(), data)
 
+    @timed("db_read")
     def search_paper(self, title):
         """
         Search for a paper by exact title match.
@@ -31,6 +67,7 @@ class PaperDatabase:
         db = self._load_db()
         return db.get(title)
 
+    @timed("db_write")
     def insert_paper(self, title, paper_dict):
         """
         Insert or update a paper in the database.
@@ -38,26 +75,40 @@ class PaperDatabase:
             title (str): The paper's title
             paper_dict (dict): Dictionary containing paper features
         """
-        db = self._load_db()
-        db[title] = paper_dict
-        self._save_db(db)
+        with self._transaction() as db:
+            db[title] = paper_dict
 
     def delete_paper(self, title):
         """
         Delete a paper from the database.
         Returns True if paper was found and deleted, False otherwise.
         """
-        db = self._load_db()
-        if title in db:
-            del db[title]
-            self._save_db(db)
-            return True
+        with self._transaction() as db:
+            if title in db:
+                del db[title]
+                return True
         return False
 
+    def get_all_papers(self) -> dict:
+        """
+        Return the full contents of the paper database.
+        
+        Returns:
+            dict: Dictionary with paper titles as keys and paper dictionaries as values
+        """
+        return self._load_db()
+
+    def processed_filenames(self) -> set:
+        """
+        Return the PDF file names (without extension) of all stored papers.
+        """
+        db = self._load_db()
+        return {paper["filename"] for paper in db.values() if isinstance(paper, dict) and paper.get("filename")}
+
     def save(self):
         """Save current database state to file."""
-        db = self._load_db()
-        self._save_db(db)
+        with self._transaction():
+            pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from downloader import fetch_pdf
+from file_lock import locked, match_mode, read_json
+
+GENERIC_NAMES = {"", "pdf", "download", "view", "fulltext", "stamp", "content", "file", "index"}
+
+class DownloadManifest:
+    def __init__(self, save_dir: str, manifest_file: str = "download_manifest.jsonl"):
+        """
+        Persistent record of downloaded PDFs in a folder.
+        Maps each URL to the sha256 of its content and the local file, and each
+        content hash to a single file, so repeated pulls skip known URLs and
+        identical PDFs reached through different links are stored once.
+
+        The manifest is an append-only JSON-lines log, so recording a download
+        costs one appended line rather than a rewrite of the whole file, which
+        keeps bulk pulls of tens of thousands of URLs linear. Entries appended
+        by other processes are picked up incrementally. A folder that only has a
+        manifest in the earlier JSON format (download_manifest.json) is converted
+        on first open, so its downloads are not fetched again.
+
+        Args:
+            save_dir (str): Download folder
+            manifest_file (str): Manifest file name inside save_dir
+        """
+        self.save_dir = save_dir
+        os.makedirs(save_dir, exist_ok=True)
+        self.manifest_path = os.path.join(save_dir, manifest_file)
+        self._urls: Dict[str, dict] = {}
+        self._hashes: Dict[str, str] = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._import_legacy()
+
+    def _import_legacy(self):
+        """Convert a manifest in the earlier single-JSON format ({"urls": ..., "hashes": ...})."""
+        base, extension = os.path.splitext(self.manifest_path)
+        legacy_path = f"{base}.json"
+        if extension != ".jsonl" or not os.path.exists(legacy_path) or os.path.exists(self.manifest_path):
+            return
+        with locked(self.manifest_path):
+            if os.path.exists(self.manifest_path):
+                return  # Converted by another process meanwhile
+            with locked(legacy_path, exclusive=False):
+                legacy = read_json(legacy_path, default={}) or {}
+            records = [
+                {**entry, "url": url} for url, entry in (legacy.get("urls") or {}).items()
+                if entry.get("sha256") and entry.get("path")
+            ]
+            # Written completely before it appears under the manifest name
+            fd, tmp_path = tempfile.mkstemp(prefix=".download_manifest.", suffix=".tmp", dir=self.save_dir)
+            match_mode(fd, legacy_path)
+            with os.fdopen(fd, 'w') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        print(f"Imported {len(records)} downloads from {legacy_path} into {self.manifest_path}")
+
+    def _apply(self, record: dict):
+        url = record["url"]
+        if "update" in record:
+            if url in self._urls:
+                self._urls[url].update(record["update"])
+            return
+        self._urls[url] = {**self._urls.get(url, {}), **record}
+        self._hashes.setdefault(record["sha256"], record["path"])
+
+    def _refresh(self):
+        """Apply log lines appended since the last read (caller holds self._lock)."""
+        try:
+            with open(self.manifest_path, 'rb') as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written line; read it next time
+                    self._offset += len(line)
+                    if line.strip():
+                        self._apply(json.loads(line))
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record: dict):
+        """Append a record to the log (caller holds the file lock)."""
+        with open(self.manifest_path, 'ab') as f:
+            f.write((json.dumps(record) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _exists(self, entry: dict) -> bool:
+        return os.path.exists(os.path.join(self.save_dir, entry["path"]))
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Manifest entry for a URL whose file is still on disk, or None.
+        """
+        with self._lock:
+            self._refresh()
+            entry = self._urls.get(url)
+        if entry and self._exists(entry):
+            return dict(entry)
+        return None
+
+    def known_urls(self) -> set:
+        """URLs whose downloaded file is still on disk."""
+        with self._lock:
+            self._refresh()
+            entries = list(self._urls.items())
+        present = {path: os.path.exists(os.path.join(self.save_dir, path)) for path in {e["path"] for _, e in entries}}
+        return {url for url, entry in entries if present[entry["path"]]}
+
+    def update_metadata(self, url: str, **metadata):
+        """Attach extra fields (title, citations, year, ...) to a URL's entry."""
+        update = {k: v for k, v in metadata.items() if v is not None}
+        if not update:
+            return
+        with self._lock, locked(self.manifest_path):
+            self._refresh()
+            if url in self._urls:
+                record = {"url": url, "update": update}
+                self._append(record)
+                self._refresh()
+
+    def add_alias(self, url: str, target_url: str):
+        """Record `url` (e.g. a landing page) as leading to the same file as `target_url`."""
+        with self._lock, locked(self.manifest_path):
+            self._refresh()
+            target = self._urls.get(target_url)
+            if target and url not in self._urls:
+                self._append({**target, "url": url, "resolved_url": target_url})
+                self._refresh()
+
+    def files(self) -> Dict[str, dict]:
+        """
+        Merged metadata per local file.
+
+        Returns:
+            Dict[str, dict]: File name -> metadata of the URLs pointing at it
+        """
+        with self._lock:
+            self._refresh()
+            entries = [(url, dict(entry)) for url, entry in self._urls.items()]
+        by_file: Dict[str, dict] = {}
+        for url, entry in entries:
+            merged = by_file.setdefault(entry["path"], {"urls": []})
+            merged["urls"].append(url)
+            for key, value in entry.items():
+                if key not in ("path", "urls", "url", "resolved_url") and value is not None:
+                    merged.setdefault(key, value)
+        return by_file
+
+    def compact(self):
+        """Rewrite the log with one line per URL."""
+        with self._lock, locked(self.manifest_path):
+            self._refresh()
+            directory = os.path.dirname(os.path.abspath(self.manifest_path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=directory)
+            match_mode(fd, self.manifest_path)
+            with os.fdopen(fd, 'wb') as f:
+                for entry in self._urls.values():
+                    f.write((json.dumps(entry) + "\n").encode())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+            self._offset = os.path.getsize(self.manifest_path)
+
+    @staticmethod
+    def _file_name(url: str, sha256: str) -> str:
+        """Readable, collision-free file name: URL basename plus a content hash prefix."""
+        parsed = urlparse(url)
+        stem = os.path.basename(parsed.path.rstrip('/'))
+        if stem.lower().endswith('.pdf'):
+            stem = stem[:-4]
+        stem = re.sub(r'[^A-Za-z0-9._-]+', '_', stem).strip('._')[:80]
+        if stem.lower() in GENERIC_NAMES:
+            stem = re.sub(r'[^A-Za-z0-9]+', '_', parsed.netloc).strip('_') or "paper"
+        return f"{stem}_{sha256[:12]}.pdf"
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def download(self, url: str, refresh: bool = False, timeout: float = 30, **metadata) -> Optional[str]:
+        """
+        Download a PDF into save_dir unless the URL or its content is already known.
+
+        Args:
+            url (str): PDF URL
+            refresh (bool): Re-validate known URLs with a conditional request
+            timeout (float): Request timeout in seconds
+            **metadata: Extra fields stored with the URL (e.g. title, citations)
+
+        Returns:
+            Optional[str]: Local path of the PDF, or None if the URL is not a PDF
+
+        Raises:
+            requests.RequestException: On network or HTTP errors
+        """
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if metadata:
+                self.update_metadata(url, **metadata)
+            if not refresh:
+                return os.path.join(self.save_dir, entry["path"])
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        # Download under a name derived from the URL so interrupted transfers resume
+        temp_path = os.path.join(self.save_dir, f".{hashlib.sha1(url.encode()).hexdigest()}.download")
+        status = fetch_pdf(url, temp_path, timeout=timeout, headers=headers)
+        if status == "not_modified" and entry:
+            return os.path.join(self.save_dir, entry["path"])
+        # A transfer that completed before a crash, but was never recorded, is
+        # answered with 304 from its own .meta validators: adopt the file
+        recovered = status == "not_modified" and os.path.exists(temp_path)
+        if status != "downloaded" and not recovered:
+            return None
+
+        http_meta = read_json(f"{temp_path}.meta", default={}) or {}
+        sha256 = self._sha256(temp_path)
+        with self._lock, locked(self.manifest_path):
+            self._refresh()
+            existing = self._hashes.get(sha256)
+            if existing and os.path.exists(os.path.join(self.save_dir, existing)):
+                # Same content already stored under another URL
+                os.remove(temp_path)
+                path = existing
+            else:
+                path = self._file_name(url, sha256)
+                os.replace(temp_path, os.path.join(self.save_dir, path))
+
+            self._append({
+                **{k: v for k, v in metadata.items() if v is not None},
+                "url": url,
+                "sha256": sha256,
+                "path": path,
+                "etag": http_meta.get("etag"),
+                "last_modified": http_meta.get("last_modified"),
+                "downloaded_at": time.time(),
+            })
+            self._refresh()
+        if os.path.exists(f"{temp_path}.meta"):
+            os.remove(f"{temp_path}.meta")
+        return os.path.join(self.save_dir, path)
+
+
+if __name__ == "__main__":
+    # Example usage
+    manifest = DownloadManifest("pdfs_folder")
+    path = manifest.download("https://arxiv.org/pdf/2301.13688.pdf", title="The Flan Collection")
+    print(f"Stored at: {path}")
+    # Second call is answered from the manifest without a request
+    print(f"Cached: {manifest.download('https://arxiv.org/pdf/2301.13688.pdf')}")
@@ -0,0 +1,276 @@
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from file_lock import atomic_write_json, read_json
+
+USER_AGENT = "Mozilla/5.0 (compatible; chatPapers downloader)"
+CHUNK_SIZE = 64 * 1024
+
+_local = threading.local()
+
+def get_session(pool_maxsize: int = 16) -> requests.Session:
+    """
+    Pooled HTTP session for the current thread.
+    Sessions keep connections alive between requests to the same host; one
+    session per thread avoids sharing a Session across threads.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        _local.session = session
+    return session
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Token bucket rate limiter.
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        now = max(now, self.updated)  # A caller's clock reading may predate the last refill
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = self.capacity
+        self.updated = now
+
+    def time_until_available(self, now: Optional[float] = None) -> float:
+        """Seconds until a token can be taken (0 if one is available now). Caller holds self._lock."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def peek_wait(self, now: Optional[float] = None) -> float:
+        """Seconds until a token can be taken, without taking it."""
+        with self._lock:
+            return self.time_until_available(now)
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Take a token if one is available."""
+        with self._lock:
+            if self.time_until_available(now) > 0:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self):
+        """Block until a token is available and take it. Safe to call from several threads."""
+        while True:
+            with self._lock:
+                wait = self.time_until_available()
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+            time.sleep(wait)
+
+def host_of(url: str) -> str:
+    """Rate-limiting key for a URL."""
+    return urlparse(url).netloc.lower()
+
+class HostLimiter:
+    def __init__(self, per_host_interval: float = 2.0, burst: float = 1.0):
+        """
+        One token bucket per host, created on first use.
+        Share it between download_many and the fetch function so follow-up
+        requests (landing pages, redirects to a PDF) count against the same budget.
+
+        Args:
+            per_host_interval (float): Seconds between requests to the same host
+            burst (float): Token bucket capacity per host
+        """
+        self.rate = 1.0 / per_host_interval if per_host_interval > 0 else 0.0
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def acquire(self, url: str):
+        """Block until a request to the URL's host is allowed."""
+        self.bucket(host_of(url)).acquire()
+
+def download_many(urls: Iterable[str], fetch: Callable[[str], Any], max_workers: int = 8,
+                  per_host_interval: float = 2.0, per_host_concurrency: int = 1,
+                  burst: float = 1.0, limiter: Optional[HostLimiter] = None) -> Dict[str, Any]:
+    """
+    Fetch many URLs concurrently while staying polite to each host.
+
+    Each host gets its own token bucket (one request per `per_host_interval`
+    seconds, bursts of up to `burst`) and at most `per_host_concurrency`
+    requests in flight. Workers never sit idle waiting on one host's bucket
+    while another host has work ready, so the total time approaches that of
+    the busiest host rather than the sum over all hosts.
+
+    Args:
+        urls (Iterable[str]): URLs to fetch; duplicates are fetched once
+        fetch (Callable[[str], Any]): Function doing the actual download
+        max_workers (int): Global cap on concurrent requests
+        per_host_interval (float): Seconds between requests to the same host
+        per_host_concurrency (int): Maximum in-flight requests per host
+        burst (float): Token bucket capacity per host
+        limiter (Optional[HostLimiter]): Shared per-host buckets; overrides
+            per_host_interval and burst when given
+
+    Returns:
+        Dict[str, Any]: fetch() result for each URL (the exception if it raised)
+    """
+    pending: Dict[str, deque] = defaultdict(deque)
+    seen = set()
+    for url in urls:
+        if url and url not in seen:
+            seen.add(url)
+            pending[host_of(url)].append(url)
+
+    limiter = limiter or HostLimiter(per_host_interval, burst)
+    buckets = {host: limiter.bucket(host) for host in pending}
+    in_flight: Dict[str, int] = defaultdict(int)
+    results: Dict[str, Any] = {}
+    cond = threading.Condition()
+
+    def next_job() -> Optional[str]:
+        with cond:
+            while True:
+                if not any(pending.values()):
+                    return None
+                now = time.monotonic()
+                soonest = None
+                for host, queue in pending.items():
+                    if not queue or in_flight[host] >= per_host_concurrency:
+                        continue
+                    # fetch() may take tokens from a shared limiter concurrently, so
+                    # only a successful try_acquire starts the job
+                    if buckets[host].try_acquire(now):
+                        in_flight[host] += 1
+                        return queue.popleft()
+                    wait = max(buckets[host].peek_wait(now), 0.01)
+                    soonest = wait if soonest is None else min(soonest, wait)
+                # Wait for a token to refill or for an in-flight request to finish
+                cond.wait(soonest if soonest is not None else 1.0)
+
+    def worker():
+        while True:
+            url = next_job()
+            if url is None:
+                return
+            try:
+                result = fetch(url)
+            except Exception as e:
+                result = e
+            with cond:
+                results[url] = result
+                in_flight[host_of(url)] -= 1
+                cond.notify_all()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(max_workers, len(seen))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def fetch_pdf(url: str, filepath: str, timeout: float = 30, headers: Optional[dict] = None) -> str:
+    """
+    Stream a PDF to disk with resume and conditional re-fetch.
+
+    The body is written in chunks to `<filepath>.part` and renamed into place
+    once complete. If a partial file from an interrupted transfer exists, the
+    download resumes with an HTTP Range request (guarded by If-Range, so a
+    changed file is fetched from scratch). The ETag and Last-Modified of
+    completed downloads are kept in `<filepath>.meta`, and a later fetch of the
+    same URL sends If-None-Match/If-Modified-Since so unchanged files are not
+    downloaded again.
+
+    Args:
+        url (str): PDF URL
+        filepath (str): Destination path
+        timeout (float): Connect/read timeout in seconds
+        headers (Optional[dict]): Extra request headers
+
+    Returns:
+        str: "downloaded", "not_modified" or "not_pdf"
+
+    Raises:
+        requests.RequestException: On network or HTTP errors
+    """
+    part_path = f"{filepath}.part"
+    meta_path = f"{filepath}.meta"
+    meta = read_json(meta_path, default={}) or {}
+    if meta.get("url") != url:
+        meta = {}
+
+    request_headers = dict(headers or {})
+    resume_from = 0
+    if os.path.exists(filepath) and meta.get("complete"):
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+    elif os.path.exists(part_path) and meta and not meta.get("complete"):
+        resume_from = os.path.getsize(part_path)
+        validator = meta.get("etag") or meta.get("last_modified")
+        if resume_from and validator:
+            request_headers["Range"] = f"bytes={resume_from}-"
+            request_headers["If-Range"] = validator
+        else:
+            resume_from = 0
+
+    session = get_session()
+    with session.get(url, stream=True, timeout=timeout, headers=request_headers) as response:
+        if response.status_code == 304:
+            return "not_modified"
+        if response.status_code == 416 and resume_from:
+            # Our partial file does not match the remote one; start over
+            os.remove(part_path)
+            atomic_write_json(meta_path, {})
+            return fetch_pdf(url, filepath, timeout, headers)
+        response.raise_for_status()
+
+        if 'application/pdf' not in response.headers.get('content-type', '').lower():
+            return "not_pdf"
+
+        append = response.status_code == 206 and resume_from > 0
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "complete": False,
+        }
+        # Record validators first so an interrupted transfer can be resumed
+        atomic_write_json(meta_path, meta)
+
+        with open(part_path, 'ab' if append else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+
+    os.replace(part_path, filepath)
+    meta["complete"] = True
+    meta["size"] = os.path.getsize(filepath)
+    atomic_write_json(meta_path, meta)
+    return "downloaded"
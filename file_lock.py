@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Read once at import: os.umask can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def locked(path: str, exclusive: bool = True, timeout: float = 60.0):
+    """
+    Hold an advisory lock on `path` for the duration of the block.
+
+    The lock is taken on a sidecar `<path>.lock` file so that the data file
+    itself can be atomically replaced while the lock is held.
+
+    Args:
+        path (str): File to protect
+        exclusive (bool): Exclusive (writer) lock if True, shared (reader) lock otherwise
+        timeout (float): Seconds to wait for the lock before raising TimeoutError
+    """
+    lock_path = f"{path}.lock"
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if fcntl is not None:
+                    mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                    fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                else:
+                    # msvcrt has no shared locks; fall back to exclusive
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock on {path}")
+                time.sleep(0.01)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        os.close(fd)
+
+
+def match_mode(fd: int, path: str):
+    """
+    Give a temporary file the permissions of the file it will replace, or the
+    umask default of a new file (mkstemp creates it readable by the owner only).
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, mode)
+
+
+def atomic_write_json(path: str, data, indent: int = 4):
+    """
+    Write JSON to `path` atomically.
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk and renamed over the target, so readers only ever see the old or the
+    new complete file. The file keeps its permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        match_mode(fd, path)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path: str, default=None):
+    """Read JSON from `path`, returning `default` if the file is missing or empty."""
+    try:
+        with open(path, 'r') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return default
+    if not content.strip():
+        return default
+    return json.loads(content)
@@ -0,0 +1,323 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import get_session, TokenBucket
+
+API_URL = 'https://api.semanticscholar.org/graph/v1'
+PAPER_FIELDS = 'paperId,externalIds,title,year,citationCount,referenceCount,openAccessPdf'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,
+    doi TEXT,
+    title TEXT,
+    year INTEGER,
+    citation_count INTEGER,
+    reference_count INTEGER,
+    pdf_url TEXT,
+    depth INTEGER NOT NULL,
+    expanded INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS papers_doi ON papers (doi) WHERE doi IS NOT NULL;
+CREATE TABLE IF NOT EXISTS frontier (
+    paper_id TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    priority REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_priority ON frontier (priority DESC);
+CREATE TABLE IF NOT EXISTS edges (
+    citing TEXT NOT NULL,
+    cited TEXT NOT NULL,
+    PRIMARY KEY (citing, cited)
+);
+"""
+
+class CitationCrawler:
+    def __init__(self, state_file: str = 'crawl.db', api_key: Optional[str] = None, api_url: str = API_URL,
+                 max_depth: int = 2, priority: str = 'citations', directions: Tuple[str, ...] = ('citations', 'references'),
+                 requests_per_second: float = 1.0, max_workers: int = 4, page_size: int = 1000,
+                 max_neighbors: int = 1000, retries: int = 5):
+        """
+        Breadth-limited crawler over the Semantic Scholar citation graph.
+
+        Starting from seed papers, it expands citations and/or references up to
+        max_depth hops. The frontier is ordered by citation count or year, papers
+        are deduplicated by paper ID and DOI, and pages are fetched concurrently
+        under a shared rate limit. Frontier, visited papers and edges live in a
+        SQLite file, so an interrupted crawl resumes where it stopped.
+
+        Args:
+            state_file (str): SQLite file holding the crawl state
+            api_key (Optional[str]): Semantic Scholar API key
+            api_url (str): API base URL (a local stand-in can be used for testing)
+            max_depth (int): Number of hops from the seeds
+            priority (str): Frontier order, 'citations' or 'year'
+            directions (Tuple[str, ...]): Edges to follow, 'citations' and/or 'references'
+            requests_per_second (float): Rate limit shared by all workers
+            max_workers (int): Concurrent page requests
+            page_size (int): Results per API page (max 1000)
+            max_neighbors (int): Maximum citations/references read per paper and direction
+            retries (int): Attempts per request on connection errors, 429 and 5xx
+        """
+        self.state_file = state_file
+        self.api_url = api_url.rstrip('/')
+        self.headers = {'x-api-key': api_key} if api_key else {}
+        self.max_depth = max_depth
+        self.priority = priority
+        self.directions = directions
+        self.bucket = TokenBucket(requests_per_second, capacity=1.0)
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.max_neighbors = max_neighbors
+        self.retries = retries
+        self.conn = sqlite3.connect(state_file)
+        self.conn.executescript(SCHEMA)
+        self.requests_made = 0
+        self._requests_lock = threading.Lock()
+        # Papers with a page that could not be fetched; left on the frontier for the next run
+        self._failed: Set[str] = set()
+
+    def close(self):
+        self.conn.close()
+
+    def _get(self, path: str, params: dict) -> Optional[dict]:
+        """
+        Rate-limited GET against the API, backing off on 429 and 5xx.
+        Returns {} for a permanent error (e.g. 404) and None when the retries gave up.
+        """
+        for attempt in range(self.retries):
+            self.bucket.acquire()
+            with self._requests_lock:
+                self.requests_made += 1
+            try:
+                response = get_session().get(f"{self.api_url}{path}", params=params,
+                                             headers=self.headers, timeout=30)
+            except Exception as e:
+                print(f"Request error for {path}: {e}")
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 429 or response.status_code >= 500:
+                time.sleep(2 ** attempt)
+                continue
+            print(f'Error: {response.status_code} - {response.text[:200]}')
+            return {}
+        return None
+
+    def _score(self, paper: dict) -> float:
+        if self.priority == 'year':
+            return float(paper.get('year') or 0)
+        return float(paper.get('citationCount') or 0)
+
+    def _add_paper(self, paper: dict, depth: int) -> Optional[str]:
+        """
+        Record a discovered paper and queue it for expansion.
+        Returns the stored paper ID (an existing one for duplicate DOIs), or None.
+        """
+        paper_id = paper.get('paperId')
+        if not paper_id:
+            return None
+        doi = ((paper.get('externalIds') or {}).get('DOI') or '').lower() or None
+        if doi:
+            row = self.conn.execute("SELECT paper_id FROM papers WHERE doi = ?", (doi,)).fetchone()
+            if row and row[0] != paper_id:
+                return row[0]
+        exists = self.conn.execute("SELECT depth FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+        if exists:
+            if depth < exists[0]:
+                # Found a shorter path; expand again from the shallower depth. The paper may have
+                # been expanded already, or never queued because it was first seen at max_depth.
+                self.conn.execute("UPDATE papers SET depth = ?, expanded = 0 WHERE paper_id = ?", (depth, paper_id))
+                if depth < self.max_depth:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO frontier (paper_id, depth, priority) VALUES (?, ?, ?)",
+                        (paper_id, depth, self._score(paper))
+                    )
+            return paper_id
+
+        self.conn.execute(
+            """INSERT INTO papers (paper_id, doi, title, year, citation_count, reference_count, pdf_url, depth)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (paper_id, doi, paper.get('title'), paper.get('year'), paper.get('citationCount'),
+             paper.get('referenceCount'), (paper.get('openAccessPdf') or {}).get('url'), depth)
+        )
+        if depth < self.max_depth:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO frontier (paper_id, depth, priority) VALUES (?, ?, ?)",
+                (paper_id, depth, self._score(paper))
+            )
+        return paper_id
+
+    def add_seeds(self, paper_ids: Iterable[str]):
+        """Look up seed papers and put them on the frontier."""
+        for seed in paper_ids:
+            paper = self._get(f"/paper/{seed}", {'fields': PAPER_FIELDS})
+            if not paper:
+                print(f"Could not resolve seed paper: {seed}")
+                continue
+            paper_id = self._add_paper(paper, depth=0)
+            # Seeds go first regardless of their score
+            self.conn.execute("UPDATE frontier SET priority = ? WHERE paper_id = ?", (float('inf'), paper_id))
+            print(f"Seed: {paper.get('title')} ({paper_id})")
+        self.conn.commit()
+
+    def _page_jobs(self, paper_id: str) -> List[Tuple[str, str, int]]:
+        """(paper_id, direction, offset) for every page to read for a paper."""
+        row = self.conn.execute(
+            "SELECT citation_count, reference_count FROM papers WHERE paper_id = ?", (paper_id,)
+        ).fetchone()
+        counts = {'citations': row[0], 'references': row[1]} if row else {}
+        jobs = []
+        for direction in self.directions:
+            total = counts.get(direction)
+            total = self.max_neighbors if total is None else min(total, self.max_neighbors)
+            if total <= 0:
+                continue
+            for offset in range(0, total, self.page_size):
+                jobs.append((paper_id, direction, offset))
+        return jobs
+
+    def _fetch_page(self, job: Tuple[str, str, int]) -> Tuple[Tuple[str, str, int], List[dict], bool]:
+        """Neighbors on one page, and whether the page was fetched (False after the retries gave up)."""
+        paper_id, direction, offset = job
+        limit = min(self.page_size, self.max_neighbors - offset)
+        data = self._get(f"/paper/{paper_id}/{direction}",
+                         {'fields': PAPER_FIELDS, 'offset': offset, 'limit': limit})
+        key = 'citingPaper' if direction == 'citations' else 'citedPaper'
+        return job, [item.get(key) or {} for item in (data or {}).get('data') or []], data is not None
+
+    def crawl(self, max_papers: Optional[int] = None, batch_size: Optional[int] = None):
+        """
+        Expand the frontier until it is empty or max_papers papers are known.
+        Progress is committed after each batch, so the crawl can be interrupted.
+        Papers with a page that could not be fetched stay on the frontier and are
+        retried by the next run.
+        """
+        batch_size = batch_size or self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                known = self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+                if max_papers and known >= max_papers:
+                    print(f"Reached {known} papers, stopping")
+                    break
+                batch = [
+                    row for row in self.conn.execute(
+                        "SELECT paper_id, depth FROM frontier ORDER BY priority DESC LIMIT ?",
+                        (batch_size + len(self._failed),)
+                    ).fetchall()
+                    if row[0] not in self._failed
+                ][:batch_size]
+                if not batch:
+                    break
+
+                depths = dict(batch)
+                jobs = [job for paper_id, _ in batch for job in self._page_jobs(paper_id)]
+                for (paper_id, direction, _), neighbors, fetched in pool.map(self._fetch_page, jobs):
+                    if not fetched:
+                        self._failed.add(paper_id)
+                    for neighbor in neighbors:
+                        neighbor_id = self._add_paper(neighbor, depths[paper_id] + 1)
+                        if neighbor_id and neighbor_id != paper_id:
+                            edge = (neighbor_id, paper_id) if direction == 'citations' else (paper_id, neighbor_id)
+                            self.conn.execute("INSERT OR IGNORE INTO edges (citing, cited) VALUES (?, ?)", edge)
+
+                for paper_id, depth in depths.items():
+                    if paper_id in self._failed:
+                        continue
+                    # Unless a shorter path to the paper was found meanwhile, which queued it again
+                    self.conn.execute("UPDATE papers SET expanded = 1 WHERE paper_id = ? AND depth = ?", (paper_id, depth))
+                    self.conn.execute("DELETE FROM frontier WHERE paper_id = ? AND depth = ?", (paper_id, depth))
+                self.conn.commit()
+                print(f"Expanded {len(batch)} papers - {self.stats()}")
+        if self._failed:
+            print(f"{len(self._failed)} papers had pages that could not be fetched; run again to retry them")
+
+    def stats(self) -> dict:
+        return {
+            'papers': self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0],
+            'frontier': self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0],
+            'edges': self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+            'requests': self.requests_made,
+        }
+
+    def export_csv(self, path: str):
+        """Write all discovered papers to a CSV file, most cited first."""
+        rows = self.conn.execute(
+            """SELECT paper_id, doi, title, year, citation_count, depth, pdf_url
+               FROM papers ORDER BY citation_count DESC"""
+        )
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['paper_id', 'doi', 'title', 'year', 'citation_count', 'depth', 'pdf_url'])
+            writer.writerows(rows)
+
+    def pdf_urls(self) -> List[Tuple[str, str, Optional[int], Optional[int]]]:
+        """(pdf_url, title, citation_count, year) of open-access papers."""
+        return self.conn.execute(
+            "SELECT pdf_url, title, citation_count, year FROM papers WHERE pdf_url IS NOT NULL"
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-hop citation crawl over Semantic Scholar')
+    parser.add_argument('seeds', nargs='*', help='Seed paper IDs (Semantic Scholar ID, DOI:..., ARXIV:...)')
+    parser.add_argument('--state', type=str, default='crawl.db', help='Crawl state file (default: crawl.db)')
+    parser.add_argument('--api_key', type=str, default=os.getenv('S2_API_KEY'), help='Semantic Scholar API key')
+    parser.add_argument('--api_url', type=str, default=API_URL, help='API base URL')
+    parser.add_argument('--depth', type=int, default=2, help='Hops from the seeds (default: 2)')
+    parser.add_argument('--priority', choices=['citations', 'year'], default='citations',
+                        help='Frontier ordering (default: citations)')
+    parser.add_argument('--directions', nargs='+', choices=['citations', 'references'],
+                        default=['citations', 'references'], help='Edges to follow (default: both)')
+    parser.add_argument('--rps', type=float, default=1.0, help='API requests per second (default: 1)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests (default: 4)')
+    parser.add_argument('--max_papers', type=int, default=None, help='Stop after this many papers')
+    parser.add_argument('--max_neighbors', type=int, default=1000,
+                        help='Citations/references read per paper and direction (default: 1000)')
+    parser.add_argument('--export', type=str, default=None, help='Write discovered papers to this CSV')
+    parser.add_argument('--download', type=str, default=None,
+                        help='Download open-access PDFs into this folder')
+    args = parser.parse_args()
+
+    crawler = CitationCrawler(
+        state_file=args.state, api_key=args.api_key, api_url=args.api_url, max_depth=args.depth,
+        priority=args.priority, directions=tuple(args.directions), requests_per_second=args.rps,
+        max_workers=args.workers, max_neighbors=args.max_neighbors
+    )
+    try:
+        if args.seeds:
+            crawler.add_seeds(args.seeds)
+        crawler.crawl(max_papers=args.max_papers)
+    except KeyboardInterrupt:
+        print("Interrupted - run again with the same --state to resume")
+    print(f"Crawl state: {crawler.stats()}")
+
+    if args.export:
+        crawler.export_csv(args.export)
+        print(f"Exported papers to {args.export}")
+
+    if args.download:
+        from download_manifest import DownloadManifest
+        from downloader import download_many
+        manifest = DownloadManifest(args.download)
+        papers = {url: (title, citations, year) for url, title, citations, year in crawler.pdf_urls()}
+        known = manifest.known_urls()
+        results = download_many(
+            [url for url in papers if url not in known],
+            lambda url: manifest.download(url, title=papers[url][0], citations=papers[url][1], year=papers[url][2]),
+            max_workers=args.workers
+        )
+        print(f"Downloaded {sum(1 for r in results.values() if isinstance(r, str))} PDFs to {args.download}")
+    crawler.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
-import requests
 import os
+import sys
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import get_session, fetch_pdf
+
 # User Inputs
 API_KEY = 'your_api_key_here'  # Replace with your Semantic Scholar API key
 PAPER_ID = 'your_paper_id_here'  # Replace with the Semantic Scholar ID of the target paper
@@ -26,7 +29,7 @@ def fetch_citing_papers(paper_id, api_key, page_size=100):
             'limit': page_size,
             'offset': (page - 1) * page_size
         }
-        response = requests.get(url, headers=headers, params=params)
+        response = get_session().get(url, headers=headers, params=params, timeout=30)
         if response.status_code == 200:
             data = response.json()
             all_citing_papers.extend(data['data'])
@@ -45,15 +48,15 @@ def download_pdf(doi, save_dir):
     """
     pdf_url = f'https://doi.org/{doi}'
     try:
-        response = requests.get(pdf_url, stream=True)
-        if response.status_code == 200 and 'application/pdf' in response.headers.get('Content-Type', ''):
-            filename = doi.replace('/', '_') + '.pdf'
-            filepath = os.path.join(save_dir, filename)
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+        filename = doi.replace('/', '_') + '.pdf'
+        filepath = os.path.join(save_dir, filename)
+        status = fetch_pdf(pdf_url, filepath)
+        if status == 'downloaded':
             print(f'Successfully downloaded: {filename}')
+        elif status == 'not_modified':
+            print(f'Already up to date: {filename}')
         else:
-            print(f'Failed to download PDF for DOI: {doi} - Status Code: {response.status_code}')
+            print(f'Failed to download PDF for DOI: {doi} - Not a PDF')
     except Exception as e:
         print(f'Error downloading PDF for DOI: {doi} - {e}')
 
@@ -0,0 +1,180 @@
+import argparse
+import csv
+import re
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urljoin, urlparse, parse_qs
+
+from bs4 import BeautifulSoup
+
+from download_manifest import DownloadManifest
+from downloader import HostLimiter, download_many, get_session
+
+ARXIV_ID = re.compile(
+    r'arxiv\.org/(?:abs|pdf|format)/((?:\d{4}\.\d{4,5})|(?:[a-z\-]+(?:\.[A-Z]{2})?/\d{7}))(?:v\d+)?(?:\.pdf)?',
+    re.IGNORECASE
+)
+
+def normalize_url(url: str) -> str:
+    """
+    Rewrite known landing-page URL shapes to a direct PDF link without a request.
+
+    - arXiv abs/pdf/versioned links become https://arxiv.org/pdf/<id> (latest version)
+    - IEEE Xplore stamp.jsp and document pages become the getPDF.jsp link
+    - OpenReview forum pages become the /pdf link
+    - ACL Anthology paper pages become the .pdf link
+    """
+    url = url.strip()
+    if not url:
+        return url
+    if not re.match(r'^[a-z]+://', url, re.IGNORECASE):
+        url = f"https://{url}"
+
+    match = ARXIV_ID.search(url)
+    if match:
+        return f"https://arxiv.org/pdf/{match.group(1)}"
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    query = parse_qs(parsed.query)
+    if host.endswith('ieeexplore.ieee.org'):
+        arnumber = (query.get('arnumber') or [None])[0]
+        if not arnumber:
+            doc = re.search(r'/document/(\d+)', parsed.path)
+            arnumber = doc.group(1) if doc else None
+        if arnumber:
+            return f"https://ieeexplore.ieee.org/stampPDF/getPDF.jsp?tp=&arnumber={arnumber}&ref="
+    if host.endswith('openreview.net') and parsed.path.startswith('/forum') and 'id' in query:
+        return f"https://openreview.net/pdf?id={query['id'][0]}"
+    if host.endswith('aclanthology.org') and not parsed.path.endswith('.pdf'):
+        return f"https://aclanthology.org{parsed.path.rstrip('/')}.pdf"
+    return url
+
+def find_pdf_link(html: str, base_url: str) -> Optional[str]:
+    """
+    Find the PDF link on a landing page (DSpace handles, publisher pages, ...).
+    Looks at the citation_pdf_url meta tag first, then PDF iframes and links.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    meta = soup.find('meta', attrs={'name': 'citation_pdf_url'})
+    if meta and meta.get('content'):
+        return urljoin(base_url, meta['content'])
+
+    iframe = soup.find('iframe', src=re.compile(r'(\.pdf|getPDF|/pdf)', re.IGNORECASE))
+    if iframe:
+        return urljoin(base_url, iframe['src'])
+
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if re.search(r'(/bitstream/.*\.pdf|\.pdf(\?|$))', href, re.IGNORECASE):
+            return urljoin(base_url, href)
+    return None
+
+def resolve_and_download(url: str, manifest: DownloadManifest, title: Optional[str] = None,
+                         timeout: float = 30, limiter: Optional[HostLimiter] = None) -> Optional[str]:
+    """
+    Download a PDF, following a landing page to its PDF link if needed.
+    The landing page and PDF link requests wait for the host's token in limiter.
+
+    Returns:
+        Optional[str]: Local path, or None if no PDF was found
+    """
+    path = manifest.download(url, timeout=timeout, title=title)
+    if path:
+        return path
+
+    # Not a PDF: treat it as a landing page
+    if limiter:
+        limiter.acquire(url)
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    if 'html' not in response.headers.get('content-type', '').lower():
+        return None
+    pdf_url = find_pdf_link(response.text, response.url)
+    if not pdf_url or pdf_url == url:
+        return None
+    pdf_url = normalize_url(pdf_url)
+    if limiter:
+        limiter.acquire(pdf_url)
+    path = manifest.download(pdf_url, timeout=timeout, title=title)
+    if path:
+        # Remember the landing page so the next run skips it without a request
+        manifest.add_alias(url, pdf_url)
+    return path
+
+def read_paper_list(csv_path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (title, url) rows from a Title,URL CSV, streaming the file."""
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            title = (row.get('Title') or row.get('title') or '').strip()
+            url = (row.get('URL') or row.get('url') or '').strip()
+            if url:
+                yield title, url
+
+def ingest(csv_path: str, save_dir: str = 'pdfs_folder', max_workers: int = 16,
+           per_host_interval: float = 1.0) -> Dict[str, int]:
+    """
+    Download every paper of a paper list into save_dir.
+    The CSV title is stored in the download manifest, so process_papers can use
+    it instead of asking the model for the title.
+
+    Args:
+        csv_path (str): Title,URL CSV file
+        save_dir (str): Download folder
+        max_workers (int): Concurrent downloads
+        per_host_interval (float): Seconds between requests to the same host
+
+    Returns:
+        Dict[str, int]: Counts of downloaded, already known, failed and duplicate rows
+    """
+    manifest = DownloadManifest(save_dir)
+    known = manifest.known_urls()
+    titles: Dict[str, str] = {}
+    counts = {'rows': 0, 'duplicates': 0, 'already_downloaded': 0, 'downloaded': 0, 'failed': 0}
+
+    for title, url in read_paper_list(csv_path):
+        counts['rows'] += 1
+        normalized = normalize_url(url)
+        if normalized in titles:
+            counts['duplicates'] += 1
+            continue
+        titles[normalized] = title
+        if normalized in known:
+            counts['already_downloaded'] += 1
+            if title and (manifest.lookup(normalized) or {}).get('title') != title:
+                manifest.update_metadata(normalized, title=title)
+
+    pending = [url for url in titles if url not in known]
+    print(f"{counts['rows']} rows, {len(titles)} unique URLs, {len(pending)} to download")
+
+    limiter = HostLimiter(per_host_interval)
+    results = download_many(
+        pending,
+        lambda url: resolve_and_download(url, manifest, titles[url] or None, limiter=limiter),
+        max_workers=max_workers,
+        limiter=limiter
+    )
+    for url, result in results.items():
+        if isinstance(result, str):
+            counts['downloaded'] += 1
+        else:
+            counts['failed'] += 1
+            reason = result if isinstance(result, Exception) else "no PDF found"
+            print(f"Failed: {url} ({reason})")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk-download papers from a Title,URL paper list')
+    parser.add_argument('csv', type=str, nargs='?', default='paper_lists/paper_list.csv',
+                        help='Paper list CSV (default: paper_lists/paper_list.csv)')
+    parser.add_argument('--save_dir', type=str, default='pdfs_folder',
+                        help='Directory to save downloaded PDFs (default: pdfs_folder)')
+    parser.add_argument('--max_workers', type=int, default=16,
+                        help='Maximum number of concurrent downloads (default: 16)')
+    parser.add_argument('--wait_time', type=float, default=1.0,
+                        help='Seconds between requests to the same host (default: 1.0)')
+    args = parser.parse_args()
+
+    counts = ingest(args.csv, args.save_dir, args.max_workers, args.wait_time)
+    print(f"Done: {counts}")
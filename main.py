@@ -3,13 +3,22 @@ from pydantic import BaseModel
 import argparse
 from database import PaperDatabase
 from topic_database import TopicDatabase
-from pdfWorker import PDFWorker
-from typing import Dict, List
+from pdfWorker import PDFWorker, PaperSections, DEFAULT_MAX_CHARS, DEFAULT_MAX_FILE_MB, DEFAULT_MAX_PAGES
+from download_manifest import DownloadManifest
+from watcher import watch_and_process
+from scheduler import Budget, PaperScheduler
+from search_index import SearchIndex
+from metrics import METRICS, timed
+from typing import Dict, List, Optional, Tuple
 from researcher import Researcher, PaperAnalysis, TopicConnection
+from title_resolver import ResolvedTitle
+import results_store
 from datetime import datetime
 import pandas as pd
 import traceback
 import os
+import threading
+from pathlib import Path
 from IPython.display import clear_output
 
 class PaperSummary(BaseModel):
@@ -28,6 +37,149 @@ def parse_args():
         default='llama3.1',
         help='Name of the Ollama model to use (default: llama3.1)'
     )
+    parser.add_argument(
+        '--title_model',
+        type=str,
+        default=None,
+        help='Model for title inference (default: --model)'
+    )
+    parser.add_argument(
+        '--analysis_model',
+        type=str,
+        default=None,
+        help='Model for paper analysis (default: --model)'
+    )
+    parser.add_argument(
+        '--connection_model',
+        type=str,
+        default=None,
+        help='Model for connecting papers to topics (default: --model)'
+    )
+    parser.add_argument(
+        '--title_context',
+        type=int,
+        default=2048,
+        help='Context window of the title model in tokens; sets how many papers share one title request (default: 2048)'
+    )
+    parser.add_argument(
+        '--related_papers',
+        type=int,
+        default=10,
+        help="Topic's important papers most similar to a new paper that go into the connection prompt (default: 10)"
+    )
+    parser.add_argument(
+        '--title_confidence',
+        type=float,
+        default=0.75,
+        help='Ask the model for the title only below this confidence of the heuristics (default: 0.75)'
+    )
+    parser.add_argument(
+        '--escalation_model',
+        type=str,
+        default=None,
+        help='Redo topic connections that mark a paper important or name a related paper with this model (default: no escalation)'
+    )
+    parser.add_argument(
+        '--hosts',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Ollama server URLs to balance requests across (default: OLLAMA_HOST or localhost)'
+    )
+    parser.add_argument(
+        '--max_concurrency',
+        type=int,
+        default=1,
+        help='Maximum in-flight requests per Ollama server (default: 1)'
+    )
+    parser.add_argument(
+        '--input_folder',
+        type=str,
+        default='pdfs_folder',
+        help='Folder containing the PDFs to process (default: pdfs_folder)'
+    )
+    parser.add_argument(
+        '--refresh_topics',
+        nargs='*',
+        default=None,
+        help='Only re-run topic connections of stored papers whose topic changed (optionally only these topics)'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and analyze new PDFs as soon as they appear in the input folder'
+    )
+    parser.add_argument(
+        '--watch_workers',
+        type=int,
+        default=1,
+        help='Papers analyzed in parallel in watch mode (default: 1)'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run as a service that keeps the models, databases and indexes loaded and analyzes PDFs submitted over HTTP'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Port of the analysis service (default: 8765)'
+    )
+    parser.add_argument(
+        '--service',
+        type=str,
+        default=None,
+        help='Send the input folder to a running analysis service at this URL instead of processing it here'
+    )
+    parser.add_argument(
+        '--time_budget',
+        type=float,
+        default=None,
+        help='Stop starting new papers after this many minutes (default: no limit)'
+    )
+    parser.add_argument(
+        '--token_budget',
+        type=int,
+        default=None,
+        help='Stop starting new papers after this many LLM tokens (default: no limit)'
+    )
+    parser.add_argument(
+        '--max_pages',
+        type=int,
+        default=DEFAULT_MAX_PAGES,
+        help=f'Read at most this many pages of each PDF (default: {DEFAULT_MAX_PAGES})'
+    )
+    parser.add_argument(
+        '--max_chars',
+        type=int,
+        default=DEFAULT_MAX_CHARS,
+        help=f'Read at most this many characters of each PDF (default: {DEFAULT_MAX_CHARS})'
+    )
+    parser.add_argument(
+        '--max_file_mb',
+        type=float,
+        default=DEFAULT_MAX_FILE_MB,
+        help=f'Skip PDFs larger than this many MB (default: {DEFAULT_MAX_FILE_MB:.0f})'
+    )
+    parser.add_argument(
+        '--search_index',
+        type=str,
+        default='paper_index.db',
+        help='Full-text index the extracted text of new papers is added to (default: paper_index.db)'
+    )
+    parser.add_argument(
+        '--metrics_dir',
+        type=str,
+        default='metrics',
+        help='Directory for the per-run timing log (default: metrics)'
+    )
+    parser.add_argument(
+        '--prometheus_file',
+        type=str,
+        default=None,
+        help='Also write run metrics to this Prometheus textfile (e.g. for node_exporter)'
+    )
     return parser.parse_args()
 
 def load_databases():
@@ -36,114 +188,354 @@ def load_databases():
     topic_db = TopicDatabase("topics.json")
     return paper_db, topic_db
 
-def process_papers(folder_path: str, paper_db: PaperDatabase, topic_db: TopicDatabase, researcher: Researcher) -> Dict[str, str]:
+@timed("process_paper")
+def process_paper(filename: str, text: str, paper_db: PaperDatabase, topic_db: TopicDatabase, researcher: Researcher, title: Optional[str] = None,
+                  sections: Optional[PaperSections] = None, search_index: Optional[SearchIndex] = None,
+                  resolved: Optional[ResolvedTitle] = None) -> Optional[Tuple[dict, Optional[dict]]]:
+    """
+    Analyze a single paper and store the result in the paper database.
+    
+    Args:
+        filename (str): Name of the PDF file (without extension)
+        text (str): Extracted text of the paper
+        paper_db (PaperDatabase): Database of processed papers
+        topic_db (TopicDatabase): Database of research topics
+        researcher (Researcher): Researcher instance for paper analysis
+        title (Optional[str]): Known title (e.g. from a paper list); resolved from the PDF if not given
+        sections (Optional[PaperSections]): Section map from PDFWorker.extract_paper
+        search_index (Optional[SearchIndex]): Full-text index to add the paper's text to
+        resolved (Optional[ResolvedTitle]): Title already resolved (e.g. in a batch with other papers)
+        
+    Returns:
+        Optional[Tuple[dict, Optional[dict]]]: (analysis, topic connection) rows for the
+        output CSVs, or None if the paper was skipped
+    """
+    # Take the title from the paper list, PDF metadata or layout; ask the model only if unsure
+    if resolved is None:
+        resolved = researcher.resolve_title(text, sections, title)
+    title = resolved.title
+    if not title:
+        print(f"Warning: Could not extract title from {filename}, skipping...")
+        return None
+        
+    # Check if paper exists in database
+    if paper_db.search_paper(title):
+        print(f"Skipping '{title}' - already processed")
+        return None
+        
+    print(f"Found new paper: '{title}'")
+    
+    # Analyze the paper
+    print(f"Analyzing paper: '{title}'...")
+    analysis = researcher.analyze_paper(text, topic_db, sections)
+    print(f"Analysis complete. Main topic: {analysis.main_topic}")
+    
+    # Store analysis
+    analysis_dict = analysis.model_dump()
+    analysis_dict["filename"] = filename
+    
+    # If paper has a main topic, analyze topic connection
+    topic_connection = None
+    connection_dict = None
+    topic_hash = None
+    if analysis.main_topic:
+        print(f"Analyzing topic connection...")
+        # Version of the topic content this connection is based on
+        topic_info = topic_db.search_topic(analysis.main_topic)
+        topic_hash = topic_db.content_hash(topic_info) if topic_info else None
+        topic_connection = researcher.connect_summary_to_topic(analysis, topic_db)
+        if topic_connection:
+            print(f"Found connection to topic: {analysis.main_topic}")
+            print(f"Related paper: {topic_connection.related_paper}")
+            
+            # Store connection
+            connection_dict = topic_connection.model_dump()
+            connection_dict["filename"] = filename
+            connection_dict["title"] = title
+            connection_dict["main_topic"] = analysis.main_topic
+    
+    # Store results in paper database
+    paper_info = {
+        "title": title,
+        "filename": filename,
+        "title_source": resolved.source,
+        "title_confidence": resolved.confidence,
+        "topic_hash": topic_hash,
+        # Flatten analysis fields
+        **analysis.model_dump(),
+        # Flatten topic connection fields if available
+        **(topic_connection.model_dump() if topic_connection else {
+            "key_problem": "",
+            "related_paper": "",
+            "method_comparison": "",
+            "topic_advancement": "",
+            "important": False
+        })
+    }
+    paper_db.insert_paper(title, paper_info)
+    print(f"Stored paper information in database")
+    if search_index is not None:
+        search_index.add(filename, text, title=title, filename=filename)
+    if paper_info["important"]:
+        print(f"*** This paper is marked as important for detailed reading ***")
+        
+    return analysis_dict, connection_dict
+
+def save_results(all_analyses: List[dict], all_connections: List[dict]) -> Optional[pd.DataFrame]:
+    """
+    Append analyses and topic connections of a run to the results store
+    (timestamped CSV files if pyarrow is not installed).
+    
+    Returns:
+        Optional[pd.DataFrame]: The topic connections, or None if there are none
+    """
+    if not (all_analyses or all_connections):
+        return None
+    
+    if results_store.pa is not None:
+        store = results_store.ResultsStore()
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if all_analyses:
+            store.append("analyses", all_analyses, run_id)
+            print(f"\nSaved {len(all_analyses)} paper analyses to {store.path('analyses')}")
+        if all_connections:
+            store.append("connections", all_connections, run_id)
+            print(f"Saved {len(all_connections)} topic connections to {store.path('connections')}")
+    else:
+        # Create output directories if they don't exist
+        os.makedirs("summary_output", exist_ok=True)
+        os.makedirs("topic_analysis", exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if all_analyses:
+            analysis_file = f"summary_output/paper_analyses_{timestamp}.csv"
+            pd.DataFrame(all_analyses).to_csv(analysis_file, index=False)
+            print(f"\nSaved {len(all_analyses)} paper analyses to {analysis_file} (install pyarrow for the results store)")
+            
+        if all_connections:
+            connections_file = f"topic_analysis/topic_connections_{timestamp}.csv"
+            pd.DataFrame(all_connections).to_csv(connections_file, index=False)
+            print(f"Saved {len(all_connections)} topic connections to {connections_file}")
+    
+    return pd.DataFrame(all_connections) if all_connections else None
+
+def refresh_topic_connections(paper_db: PaperDatabase, topic_db: TopicDatabase, researcher: Researcher,
+                              topics: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Re-run the topic connection of stored papers whose topic changed since they were processed.
+    
+    Papers store the content hash of their topic; only papers whose hash no longer
+    matches topics.json (or that have none) are refreshed, reusing their stored
+    analysis, so only connect_summary_to_topic is called again.
+    
+    Args:
+        paper_db (PaperDatabase): Database of processed papers
+        topic_db (TopicDatabase): Database of research topics
+        researcher (Researcher): Researcher instance for the topic connection
+        topics (Optional[List[str]]): Only refresh these topics (default: all changed topics)
+        
+    Returns:
+        Optional[pd.DataFrame]: The refreshed topic connections, or None if there are none
+    """
+    current = topic_db.topic_hashes()
+    stale = [
+        (key, paper) for key, paper in paper_db.get_all_papers().items()
+        if isinstance(paper, dict) and paper.get("main_topic") in current
+        and (topics is None or paper["main_topic"] in topics)
+        and paper.get("topic_hash") != current[paper["main_topic"]]
+    ]
+    changed = sorted({paper["main_topic"] for _, paper in stale})
+    print(f"{len(stale)} papers to refresh in {len(changed)} changed topics: {', '.join(changed) or '-'}")
+    
+    all_connections: List[dict] = []
+    for key, paper in stale:
+        try:
+            analysis = PaperAnalysis.model_validate({field: paper.get(field) for field in PaperAnalysis.model_fields})
+            topic_hash = current[analysis.main_topic]
+            topic_connection = researcher.connect_summary_to_topic(analysis, topic_db)
+        except Exception as e:
+            print(f"Error refreshing '{key}': {str(e)}")
+            continue
+        
+        updated = {**paper, "topic_hash": topic_hash}
+        if topic_connection:
+            updated.update(topic_connection.model_dump())
+            connection_dict = topic_connection.model_dump()
+            connection_dict["filename"] = paper.get("filename")
+            connection_dict["title"] = key
+            connection_dict["main_topic"] = analysis.main_topic
+            all_connections.append(connection_dict)
+        paper_db.insert_paper(key, updated)
+        print(f"Refreshed '{key}'")
+    
+    return save_results([], all_connections)
+
+def save_extraction_report(report: List[dict]):
+    """Save the list of truncated and skipped PDFs of a run, if any."""
+    if not report:
+        return
+    os.makedirs("summary_output", exist_ok=True)
+    report_file = f"summary_output/extraction_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    pd.DataFrame(report).to_csv(report_file, index=False)
+    skipped = sum(1 for entry in report if entry["status"] == "skipped")
+    print(f"{len(report) - skipped} PDFs truncated and {skipped} skipped, see {report_file}")
+
+def load_download_metadata(folder_path: str) -> Dict[str, dict]:
+    """
+    Metadata of downloaded papers (title, citations, year, ...) from the folder's download manifest.
+    
+    Returns:
+        Dict[str, dict]: PDF file name -> metadata
+    """
+    if not any(os.path.exists(os.path.join(folder_path, name))
+               for name in ("download_manifest.jsonl", "download_manifest.json")):
+        return {}
+    return DownloadManifest(folder_path).files()
+
+# folder -> (manifest signature, titles); long-running modes look titles up per paper
+_known_titles: Dict[str, Tuple[tuple, Dict[str, str]]] = {}
+_known_titles_lock = threading.Lock()
+
+def _manifest_signature(folder_path: str) -> tuple:
+    """Size and modification time of the folder's manifest files; changes when a download is recorded."""
+    signature = []
+    for name in ("download_manifest.jsonl", "download_manifest.json"):
+        try:
+            stat = os.stat(os.path.join(folder_path, name))
+            signature.append((name, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            pass
+    return tuple(signature)
+
+def load_known_titles(folder_path: str) -> Dict[str, str]:
+    """
+    Titles of downloaded papers from the folder's download manifest.
+    The manifest is read again only after it changed. Do not modify the result.
+    
+    Returns:
+        Dict[str, str]: PDF filename (without extension) -> title
+    """
+    key = os.path.abspath(folder_path)
+    signature = _manifest_signature(folder_path)
+    with _known_titles_lock:
+        cached = _known_titles.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    titles = {
+        Path(path).stem: info["title"]
+        for path, info in load_download_metadata(folder_path).items()
+        if info.get("title")
+    }
+    with _known_titles_lock:
+        _known_titles[key] = (signature, titles)
+    return titles
+
+def prepare_papers(paths: List[str], pdf_worker: PDFWorker, researcher: Researcher,
+                   known_titles: Dict[str, str]) -> Dict[str, Tuple[Optional[PaperSections], Optional[ResolvedTitle]]]:
+    """
+    Extract a group of papers and resolve their titles together.
+    
+    Returns:
+        Dict[str, Tuple[Optional[PaperSections], Optional[ResolvedTitle]]]: (sections, title) by path;
+        both None for PDFs without text
+    """
+    sections = {path: pdf_worker.extract_paper(path) for path in paths}
+    readable = {path: s for path, s in sections.items() if s and s.text}
+    titles = researcher.resolve_titles({
+        path: (s.text, s, known_titles.get(Path(path).stem)) for path, s in readable.items()
+    })
+    return {path: (readable.get(path), titles.get(path)) for path in paths}
+
+def process_papers(folder_path: str, paper_db: PaperDatabase, topic_db: TopicDatabase, researcher: Researcher,
+                   budget: Optional[Budget] = None, pdf_worker: Optional[PDFWorker] = None,
+                   search_index: Optional[SearchIndex] = None) -> Dict[str, str]:
     """
     Process papers from a folder and filter out already processed ones.
     
+    Pending papers are processed in priority order (topic keyword overlap,
+    citation count, recency), so the most relevant ones are done first when
+    the run is limited by a time or token budget.
+    
     Args:
         folder_path (str): Path to folder containing PDFs
         paper_db (PaperDatabase): Database of processed papers
         topic_db (TopicDatabase): Database of research topics
         researcher (Researcher): Researcher instance for paper analysis
+        budget (Optional[Budget]): Stop starting new papers once this is used up
+        pdf_worker (Optional[PDFWorker]): PDF worker with the page/character/file size caps to use
+        search_index (Optional[SearchIndex]): Full-text index new papers are added to
     """
     # Initialize PDF worker
-    pdf_worker = PDFWorker()
+    pdf_worker = pdf_worker or PDFWorker()
     
     # Keep track of all analyses and connections
     all_analyses: List[dict] = []
     all_connections: List[dict] = []
     
-    # Load all PDFs from folder
-    pdf_texts = pdf_worker.load_pdfs_from_folder(folder_path)
+    folder = Path(folder_path)
+    if not folder.exists() or not folder.is_dir():
+        print(f"Invalid folder path: {folder_path}")
+        return None
+    
+    # Pending papers: PDFs not yet stored in the paper database
+    processed = paper_db.processed_filenames()
+    pending = [str(p) for p in sorted(folder.glob("*.pdf")) if p.stem not in processed]
+    print(f"Found {len(pending)} pending papers in {folder_path}")
+    
+    # Titles recorded at download time (e.g. from a paper list) skip title inference
+    known_titles = load_known_titles(folder_path)
+    
+    # Order by priority using only the first page and download metadata (no LLM calls)
+    scheduler = PaperScheduler(topic_db.get_all_topics())
+    first_pages = {path: pdf_worker.extract_text_from_pdf(path, max_pages=1, max_chars=5000) or ""
+                   for path in pending}
+    schedule = scheduler.schedule(first_pages, load_download_metadata(folder_path))
+    
+    # Sections and titles of the next papers, read ahead so unsure titles are inferred in batches
+    prepared: Dict[str, Tuple[Optional[PaperSections], Optional[ResolvedTitle]]] = {}
     
     # Process each paper
-    for filename, text in pdf_texts.items():
-        # Extract title
-        title = researcher.infer_title(text)
-        if not title:
-            print(f"Warning: Could not extract title from {filename}, skipping...")
-            continue
-            
-        # Check if paper exists in database
-        if paper_db.search_paper(title):
-            print(f"Skipping '{title}' - already processed")
-            continue
-            
-        print(f"Found new paper: '{title}'")
+    for position, scheduled in enumerate(schedule):
+        reason = budget.exhausted() if budget else None
+        if reason:
+            remaining = schedule[position:]
+            print(f"\nStopping: {reason}. {len(remaining)} papers left for the next run, next up:")
+            for paper in remaining[:5]:
+                print(f"  {paper.priority:.3f}  {os.path.basename(paper.path)}")
+            break
+        
+        if scheduled.path not in prepared:
+            # Read ahead only as far as the budget is likely to reach
+            size = researcher.title_batch_size
+            left = budget.papers_left(position) if budget else None
+            if left is not None:
+                size = min(size, left)
+            window = [paper.path for paper in schedule[position:position + size]]
+            prepared = prepare_papers(window, pdf_worker, researcher, known_titles)
         
+        filename = Path(scheduled.path).stem
+        sections, resolved = prepared[scheduled.path]
+        if not sections or not sections.text:
+            continue
         try:
-            # Analyze the paper
-            print(f"Analyzing paper: '{title}'...")
-            analysis = researcher.analyze_paper(text, topic_db)
-            print(f"Analysis complete. Main topic: {analysis.main_topic}")
-            
-            # Store analysis
-            analysis_dict = analysis.model_dump()
-            analysis_dict["filename"] = filename
-            all_analyses.append(analysis_dict)
-            
-            # If paper has a main topic, analyze topic connection
-            topic_connection = None
-            if analysis.main_topic:
-                print(f"Analyzing topic connection...")
-                topic_connection = researcher.connect_summary_to_topic(analysis, topic_db)
-                if topic_connection:
-                    print(f"Found connection to topic: {analysis.main_topic}")
-                    print(f"Related paper: {topic_connection.related_paper}")
-                    
-                    # Store connection
-                    connection_dict = topic_connection.model_dump()
-                    connection_dict["filename"] = filename
-                    connection_dict["title"] = title
-                    all_connections.append(connection_dict)
-            
-            # Store results in paper database
-            paper_info = {
-                "title": title,
-                # Flatten analysis fields
-                **analysis.model_dump(),
-                # Flatten topic connection fields if available
-                **(topic_connection.model_dump() if topic_connection else {
-                    "key_problem": "",
-                    "related_paper": "",
-                    "method_comparison": "",
-                    "topic_advancement": "",
-                    "important": False
-                })
-            }
-            paper_db.insert_paper(title, paper_info)
-            print(f"Stored paper information in database")
-            if paper_info["important"]:
-                print(f"*** This paper is marked as important for detailed reading ***")
-            
+            result = process_paper(filename, sections.text, paper_db, topic_db, researcher,
+                                   known_titles.get(filename), sections, search_index, resolved)
         except Exception as e:
-            print(f"Error processing paper '{title}':")
+            print(f"Error processing paper '{filename}':")
             print(f"Error message: {str(e)}")
             print("Traceback:")
             traceback.print_exc()
             continue
-    
-    # Create output directories if they don't exist
-    os.makedirs("summary_output", exist_ok=True)
-    os.makedirs("topic_analysis", exist_ok=True)
-    
-    # Save results to CSV files if any new papers were processed
-    if all_analyses or all_connections:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        if all_analyses:
-            analysis_df = pd.DataFrame(all_analyses)
-            analysis_file = f"summary_output/paper_analyses_{timestamp}.csv"
-            analysis_df.to_csv(analysis_file, index=False)
-            print(f"\nSaved {len(all_analyses)} paper analyses to {analysis_file}")
-            
-        if all_connections:
-            connections_df = pd.DataFrame(all_connections)
-            connections_file = f"topic_analysis/topic_connections_{timestamp}.csv"
-            connections_df.to_csv(connections_file, index=False)
-            print(f"Saved {len(all_connections)} topic connections to {connections_file}")
-            
-        return connections_df if all_connections else None
+        if result is None:
+            continue
+        analysis_dict, connection_dict = result
+        all_analyses.append(analysis_dict)
+        if connection_dict:
+            all_connections.append(connection_dict)
+    
+    save_extraction_report(pdf_worker.report)
+    return save_results(all_analyses, all_connections)
 
 def display_important_papers(connections_df: pd.DataFrame):
     """Display important papers interactively"""
@@ -177,21 +569,91 @@ def display_important_papers(connections_df: pd.DataFrame):
         print("=" * 80)
         input("\nPress Enter to continue...")
 
+def process_with_service(url: str, folder_path: str) -> Optional[pd.DataFrame]:
+    """
+    Analyze a folder on a running analysis service and wait for the results.
+    
+    Returns:
+        Optional[pd.DataFrame]: The topic connections of the new papers, or None if there are none
+    """
+    from service import ServiceClient
+    
+    service = ServiceClient(url)
+    submitted = service.submit([folder_path])
+    # Papers already in the paper database are skipped by the service without extracting them
+    pending = [job["id"] for job in submitted if job["status"] in ("queued", "running")]
+    print(f"Sent {len(pending)} new papers to {url} ({len(submitted) - len(pending)} already processed)")
+    jobs = service.wait(pending)
+    connections = [job["connection"] for job in jobs if job.get("connection")]
+    return pd.DataFrame(connections) if connections else None
+
 def main():
     args = parse_args()
     
+    if args.service:
+        # The service already has the models and databases loaded
+        connections_df = process_with_service(args.service, args.input_folder)
+        if connections_df is not None:
+            print("\nStarting interactive review of important papers...")
+            display_important_papers(connections_df)
+        return None, None, None
+    
     # 1. Initialize the Ollama client with configured model
-    client = OllamaClient(model=args.model)
+    client = OllamaClient(model=args.model, endpoints=args.hosts, max_concurrency=args.max_concurrency,
+                          # A service keeps its models loaded instead of letting Ollama unload them when idle
+                          keep_alive=-1 if args.serve else None)
     
     # 2. Load paper and topic databases
     paper_db, topic_db = load_databases()
     
     # 3. Initialize researcher
-    researcher = Researcher(client)
+    researcher = Researcher(client, models={
+        "title": args.title_model,
+        "analysis": args.analysis_model,
+        "connection": args.connection_model,
+    }, escalation_model=args.escalation_model, related_papers=args.related_papers,
+        title_context=args.title_context)
+    researcher.title_resolver.threshold = args.title_confidence
+    
+    # 4. Process papers from input folder, reading at most the configured pages/characters per PDF
+    input_folder = args.input_folder
+    pdf_worker = PDFWorker(max_pages=args.max_pages, max_chars=args.max_chars, max_file_mb=args.max_file_mb)
+    search_index = SearchIndex(args.search_index)
+    if args.refresh_topics is not None:
+        # Topics were edited: update connections without re-analyzing any paper
+        connections_df = refresh_topic_connections(paper_db, topic_db, researcher, args.refresh_topics or None)
+    elif args.serve:
+        # Long-running: analyze PDFs submitted over HTTP until stopped
+        from service import AnalysisService, serve
+        METRICS.stream_events(args.metrics_dir)
+        client.warm_up(sorted({*researcher.models.values(), *([args.escalation_model] if args.escalation_model else [])}))
+        serve(AnalysisService(paper_db, topic_db, researcher, pdf_worker, search_index, workers=args.watch_workers,
+                              upload_folder=input_folder), port=args.port)
+        connections_df = None
+    elif args.watch:
+        # Long-running: analyze papers as they arrive until interrupted
+        METRICS.stream_events(args.metrics_dir)
+        watch_and_process(input_folder, paper_db, topic_db, researcher, workers=args.watch_workers,
+                          pdf_worker=pdf_worker, search_index=search_index)
+        connections_df = None
+    else:
+        budget = Budget(
+            max_seconds=args.time_budget * 60 if args.time_budget is not None else None,
+            max_tokens=args.token_budget,
+            client=client
+        )
+        connections_df = process_papers(input_folder, paper_db, topic_db, researcher, budget, pdf_worker, search_index)
+    # Write the last, partial batch of the full-text index
+    search_index.flush()
     
-    # 4. Process papers from input folder
-    input_folder = "pdfs_folder"  # You might want to make this configurable via args
-    connections_df = process_papers(input_folder, paper_db, topic_db, researcher)
+    # Where the time went: stage percentiles and Ollama's prefill/generation/load breakdown
+    METRICS.print_summary()
+    researcher.title_resolver.print_hit_rates()
+    metrics_file = METRICS.events_path or os.path.join(args.metrics_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    METRICS.write_jsonl(metrics_file)
+    print(f"Saved timings to {metrics_file}")
+    if args.prometheus_file:
+        METRICS.write_prometheus(args.prometheus_file)
     
     # 5. Save final state of databases
     print("\nSaving databases...")
@@ -0,0 +1,280 @@
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from file_lock import match_mode
+
+# Ollama reports durations in nanoseconds
+NS = 1e9
+
+# A model load longer than this counts as a reload (the model was evicted)
+RELOAD_SECONDS = 0.5
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics of a list of durations in seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+        "total": sum(ordered),
+    }
+
+class Metrics:
+    def __init__(self, max_samples: int = 10000, flush_every: int = 1000,
+                 max_file_bytes: int = 50 * 1024 * 1024):
+        """
+        In-process timings of one run.
+
+        Spans record how long each pipeline stage took; LLM responses add
+        Ollama's own breakdown (model load, prompt prefill, generation), so a
+        slow run can be attributed to I/O, prefill, generation or reloads.
+
+        Memory stays bounded in long-running processes (--watch, --serve):
+        percentiles cover the last max_samples durations of each stage (counts
+        and totals cover the whole run), and once stream_events() is called,
+        events are appended to metrics files instead of kept in memory.
+
+        Args:
+            max_samples (int): Durations kept per stage for percentiles
+            flush_every (int): Buffered events that trigger a write to the events file
+            max_file_bytes (int): Size after which a new events file is started
+        """
+        self.max_samples = max_samples
+        self.flush_every = flush_every
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self.events_dir: Optional[str] = None
+        self.events_path: Optional[str] = None
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far and restart the run clock."""
+        with self._lock:
+            self.started = time.time()
+            self.durations: Dict[str, Deque[float]] = {}
+            # Count and sum of every duration of a stage, also the ones dropped from `durations`
+            self.totals: Dict[str, List[float]] = {}
+            self.events: List[dict] = []
+            self.llm = {
+                "requests": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "reloads": 0,
+            }
+
+    def _add_sample(self, name: str, seconds: float):
+        """Caller holds self._lock."""
+        if name not in self.durations:
+            self.durations[name] = deque(maxlen=self.max_samples)
+            self.totals[name] = [0, 0.0]
+        self.durations[name].append(seconds)
+        self.totals[name][0] += 1
+        self.totals[name][1] += seconds
+
+    def _add_event(self, event: dict):
+        """Caller holds self._lock."""
+        self.events.append(event)
+        if self.events_dir is not None and len(self.events) >= self.flush_every:
+            self._flush_events()
+
+    def _flush_events(self):
+        """Append buffered events to the events file, starting a new file when it is full (caller holds self._lock)."""
+        if self.events_path is None or (os.path.exists(self.events_path)
+                                        and os.path.getsize(self.events_path) >= self.max_file_bytes):
+            self.events_path = os.path.join(self.events_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl")
+        with open(self.events_path, 'a', encoding='utf-8') as f:
+            for event in self.events:
+                f.write(json.dumps(event) + "\n")
+        self.events = []
+
+    def stream_events(self, directory: str):
+        """Write events to run_<timestamp>.jsonl files in directory as they accumulate, instead of keeping them."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.events_dir = directory
+            self.events_path = None
+            if self.events:
+                self._flush_events()
+
+    def record(self, name: str, seconds: float, **labels):
+        """Record one duration of a stage."""
+        with self._lock:
+            self._add_sample(name, seconds)
+            self._add_event({"type": "span", "name": name, "seconds": seconds, "ts": time.time(), **labels})
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time the enclosed block as one sample of stage `name` (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str):
+        """Decorator recording every call of a function as a span."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_llm(self, response: Any, **labels):
+        """
+        Record the stats of an Ollama chat response.
+
+        Args:
+            response: Ollama ChatResponse (prompt_eval_count, eval_count and the *_duration fields)
+            labels: Extra fields for the event (e.g. model, endpoint)
+        """
+        def field(name):
+            return getattr(response, name, None) or 0
+
+        stats = {
+            "prompt_tokens": field("prompt_eval_count"),
+            "completion_tokens": field("eval_count"),
+            "load_seconds": field("load_duration") / NS,
+            "prefill_seconds": field("prompt_eval_duration") / NS,
+            "generation_seconds": field("eval_duration") / NS,
+            "total_seconds": field("total_duration") / NS,
+        }
+        with self._lock:
+            self.llm["requests"] += 1
+            self.llm["prompt_tokens"] += stats["prompt_tokens"]
+            self.llm["completion_tokens"] += stats["completion_tokens"]
+            if stats["load_seconds"] >= RELOAD_SECONDS:
+                self.llm["reloads"] += 1
+            for key in ("load_seconds", "prefill_seconds", "generation_seconds", "total_seconds"):
+                if stats[key]:
+                    self._add_sample(f"llm_{key[:-len('_seconds')]}", stats[key])
+            self._add_event({"type": "llm", "ts": time.time(), **stats, **labels})
+
+    def summary(self) -> dict:
+        """Per-stage percentiles and LLM totals of the run so far."""
+        with self._lock:
+            durations = {name: list(samples) for name, samples in self.durations.items()}
+            totals = {name: tuple(total) for name, total in self.totals.items()}
+            llm = dict(self.llm)
+            wall = time.time() - self.started
+
+        def rate(tokens, name):
+            seconds = totals.get(name, (0, 0.0))[1]
+            return tokens / seconds if seconds else None
+
+        def stage(name):
+            # Percentiles of the recent samples, count/mean/total of the whole run
+            count, total = totals[name]
+            return {**percentiles(durations[name]), "count": count, "mean": total / count, "total": total}
+
+        llm["prefill_tokens_per_second"] = rate(llm["prompt_tokens"], "llm_prefill")
+        llm["generation_tokens_per_second"] = rate(llm["completion_tokens"], "llm_generation")
+        return {
+            "wall_seconds": wall,
+            "stages": {name: stage(name) for name in sorted(durations)},
+            "llm": llm,
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\nTimings ({summary['wall_seconds']:.1f}s wall):")
+        for name, stats in summary["stages"].items():
+            print(f"  {name:<26} n={stats['count']:<5} total={stats['total']:8.1f}s "
+                  f"p50={stats['p50'] * 1000:8.1f}ms p95={stats['p95'] * 1000:8.1f}ms "
+                  f"p99={stats['p99'] * 1000:8.1f}ms")
+        llm = summary["llm"]
+        if llm["requests"]:
+            prefill = llm["prefill_tokens_per_second"]
+            generation = llm["generation_tokens_per_second"]
+            print(f"  LLM: {llm['requests']} requests, {llm['prompt_tokens']} prompt / "
+                  f"{llm['completion_tokens']} completion tokens, {llm['reloads']} model reloads"
+                  + (f", prefill {prefill:.0f} tok/s" if prefill else "")
+                  + (f", generation {generation:.0f} tok/s" if generation else ""))
+
+    def write_jsonl(self, path: str):
+        """
+        Write every recorded event, then the run summary, as JSON lines.
+        When events are streamed, pass events_path to append the remaining
+        events and the summary to the current events file.
+        """
+        with self._lock:
+            events = list(self.events)
+            streamed = path == self.events_path
+            if streamed:
+                self.events = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a' if streamed else 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.write(json.dumps({"type": "summary", "ts": time.time(), **self.summary()}) + "\n")
+
+    def write_prometheus(self, path: str, prefix: str = "chatpapers"):
+        """
+        Write the summary in the Prometheus text format, for node_exporter's
+        textfile collector. The file is replaced atomically so a scrape never
+        sees a partial file.
+        """
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duration of pipeline stages",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for name, stats in summary["stages"].items():
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{int(quantile[1:]) / 100}"}} {stats[quantile]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["total"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        llm = summary["llm"]
+        for key, help_text in (
+            ("requests", "LLM requests"),
+            ("prompt_tokens", "Prompt tokens evaluated"),
+            ("completion_tokens", "Tokens generated"),
+            ("reloads", "Requests that had to load the model"),
+        ):
+            lines.append(f"# HELP {prefix}_llm_{key}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_llm_{key}_total counter")
+            lines.append(f"{prefix}_llm_{key}_total {llm[key]}")
+        lines.append(f"# HELP {prefix}_run_seconds Wall-clock time of the run")
+        lines.append(f"# TYPE {prefix}_run_seconds gauge")
+        lines.append(f"{prefix}_run_seconds {summary['wall_seconds']}")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".metrics.", suffix=".tmp", dir=directory)
+        # node_exporter usually runs as another user and must be able to read the file
+        match_mode(fd, path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+# Metrics of the current process
+METRICS = Metrics()
+span = METRICS.span
+timed = METRICS.timed
+
+
+if __name__ == "__main__":
+    # Example usage
+    with span("pdf_extraction"):
+        time.sleep(0.01)
+    METRICS.print_summary()
+    METRICS.write_prometheus("metrics/chatpapers.prom")
@@ -1,12 +1,131 @@
 import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
 
+from metrics import span, timed
+
+# Section heading names -> canonical section
+SECTION_NAMES = {
+    "abstract": "abstract",
+    "summary": "abstract",
+    "introduction": "introduction",
+    "conclusion": "conclusion",
+    "conclusions": "conclusion",
+    "concluding remarks": "conclusion",
+    "conclusion and future work": "conclusion",
+    "conclusions and future work": "conclusion",
+    "discussion and conclusion": "conclusion",
+    "discussion and conclusions": "conclusion",
+    "summary and conclusion": "conclusion",
+    "summary and conclusions": "conclusion",
+    "references": "references",
+    "bibliography": "references",
+    "literature cited": "references",
+    "works cited": "references",
+}
+
+# Other common top-level sections: on their own line they end the current section
+OTHER_SECTIONS = {
+    "related work", "background", "preliminaries", "method", "methods", "methodology", "approach",
+    "materials and methods", "experiments", "experimental setup", "evaluation", "results", "discussion",
+    "results and discussion", "limitations", "future work", "acknowledgments", "acknowledgements",
+    "appendix",
+}
+
+# Optional top-level number ("1", "1.", "IV.", "A.") followed by the heading text
+HEADING = re.compile(r'^(?:(\d{1,2}\.?|[IVX]{1,5}\.|[A-H]\.)\s+)?([A-Za-z][A-Za-z&,:\- ]{2,80}?)\.?$')
+# "Abstract—We propose ..." / "Abstract: ..." with the text on the heading line
+INLINE_HEADING = re.compile(r'^(abstract|summary)\s*[\u2014\u2013:.\-]+\s*(\S.*)$', re.IGNORECASE)
+NUMBER_ONLY = re.compile(r'^(\d{1,2}|[IVX]{1,5})\.?$')
+
+@dataclass
+class TextLine:
+    text: str
+    size: Optional[float] = None
+    bold: bool = False
+    page: int = 0
+
+@dataclass
+class PaperSections:
+    """Section map of a paper; sections that were not found are None."""
+    text: str = ""
+    title: Optional[str] = None
+    # Title from the PDF document info, if set
+    metadata_title: Optional[str] = None
+    abstract: Optional[str] = None
+    introduction: Optional[str] = None
+    conclusion: Optional[str] = None
+    references_offset: Optional[int] = None
+    # (character offset in text, heading line) of every heading found
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    # Pages read, pages in the document, and why the text was cut short (None if complete)
+    pages: int = 0
+    page_count: int = 0
+    truncated: Optional[str] = None
+
+# Default caps: a 600-page thesis or a scanned proceedings volume is read up to
+# these limits instead of being loaded whole
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_CHARS = 400_000
+DEFAULT_MAX_FILE_MB = 100.0
+
 class PDFWorker:
-    def __init__(self):
-        """Initialize the PDF worker."""
-        pass
+    def __init__(self, max_pages: Optional[int] = DEFAULT_MAX_PAGES, max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+                 max_file_mb: Optional[float] = DEFAULT_MAX_FILE_MB):
+        """
+        Initialize the PDF worker.
+        
+        Args:
+            max_pages (Optional[int]): Read at most this many pages per document (None: no limit)
+            max_chars (Optional[int]): Stop reading a document after this many characters (None: no limit)
+            max_file_mb (Optional[float]): Skip PDFs larger than this; MuPDF's memory use grows
+                with the file (scanned pages, embedded fonts), not with the text (None: no limit)
+        """
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_file_mb = max_file_mb
+        # Documents that were truncated or skipped
+        self.report: List[dict] = []
+        # (path, status) already in the report; a PDF is read more than once (first page, full text)
+        self._reported: set = set()
+
+    def _check_size(self, pdf_path: str) -> bool:
+        """Return False (and report the file) if it is above the size limit."""
+        if self.max_file_mb is None:
+            return True
+        size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+        if size_mb <= self.max_file_mb:
+            return True
+        if self._first_report(pdf_path, "skipped"):
+            reason = f"file is {size_mb:.1f} MB (limit {self.max_file_mb:g} MB)"
+            print(f"Skipping {os.path.basename(pdf_path)}: {reason}")
+            self.report.append({"file": os.path.basename(pdf_path), "status": "skipped", "reason": reason})
+        return False
+
+    def _first_report(self, pdf_path: str, status: str) -> bool:
+        """True the first time a file is reported with this status."""
+        key = (os.path.abspath(pdf_path), status)
+        if key in self._reported:
+            return False
+        self._reported.add(key)
+        return True
+
+    def _report_truncated(self, pdf_path: str, sections: "PaperSections"):
+        if not self._first_report(pdf_path, "truncated"):
+            return
+        print(f"Truncated {os.path.basename(pdf_path)}: {sections.truncated}")
+        self.report.append({
+            "file": os.path.basename(pdf_path),
+            "status": "truncated",
+            "reason": sections.truncated,
+            "pages_read": sections.pages,
+            "page_count": sections.page_count,
+            "chars": len(sections.text),
+        })
 
     def extract_title_from_text(self, text: str) -> Optional[str]:
         """
@@ -45,62 +164,279 @@ class PDFWorker:
             
         return None
 
-    def extract_text_from_pdf(self, pdf_path: str) -> Optional[str]:
+    def extract_text_from_pdf(self, pdf_path: str, max_pages: Optional[int] = None,
+                              max_chars: Optional[int] = None) -> Optional[str]:
         """
         Extract text from a single PDF file, ignoring figures and images.
         
         Args:
             pdf_path (str): Path to the PDF file
+            max_pages (Optional[int]): Only read the first max_pages pages (default: the worker's cap)
+            max_chars (Optional[int]): Stop after this many characters (default: the worker's cap)
             
         Returns:
             str: Extracted text from the PDF
-            None: If file doesn't exist or extraction fails
+            None: If file doesn't exist, is too large or extraction fails
         """
+        stage = "pdf_extraction" if max_pages is None else "pdf_first_pages"
+        max_pages = max_pages if max_pages is not None else self.max_pages
+        max_chars = max_chars if max_chars is not None else self.max_chars
         try:
             if not os.path.exists(pdf_path):
                 print(f"File not found: {pdf_path}")
                 return None
+            if not self._check_size(pdf_path):
+                return None
 
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page in doc:
-                # Extract text while ignoring images
-                text += page.get_text()
-            
-            doc.close()
-            return text.strip()
+            with span(stage):
+                parts = []
+                length = 0
+                with fitz.open(pdf_path) as doc:
+                    for page_number, page in enumerate(doc):
+                        if max_pages is not None and page_number >= max_pages:
+                            break
+                        # Extract text while ignoring images
+                        parts.append(page.get_text())
+                        length += len(parts[-1])
+                        if max_chars is not None and length >= max_chars:
+                            break
+                # Release MuPDF's cached fonts and images of this document
+                fitz.TOOLS.store_shrink(100)
+            text = "".join(parts)
+            return (text[:max_chars] if max_chars is not None else text).strip()
             
         except Exception as e:
             print(f"Error processing {pdf_path}: {str(e)}")
             return None
 
-    def load_pdfs_from_folder(self, folder_path: str) -> Dict[str, str]:
+    def _layout_lines(self, doc, max_pages: Optional[int] = None,
+                      max_chars: Optional[int] = None) -> Tuple[List[TextLine], int]:
         """
-        Load all PDFs from a folder and extract their text.
+        Horizontal text lines of a document with their dominant font size and weight,
+        read page by page until max_pages or max_chars is reached.
+
+        Returns:
+            Tuple[List[TextLine], int]: The lines and the number of pages read
+        """
+        lines = []
+        length = 0
+        pages_read = 0
+        for page_number, page in enumerate(doc):
+            if max_pages is not None and page_number >= max_pages:
+                break
+            if max_chars is not None and length >= max_chars:
+                break
+            pages_read += 1
+            for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+                for line in block.get("lines", []):
+                    spans = [s for s in line["spans"] if s["text"].strip()]
+                    text = "".join(s["text"] for s in line["spans"]).strip()
+                    if not spans or not text:
+                        continue
+                    # Vertical text (e.g. arXiv side stamps) is kept as text but never a heading or title
+                    horizontal = abs(line["dir"][0]) > 0.99
+                    weights = Counter()
+                    bold_chars = 0
+                    for s in spans:
+                        weights[round(s["size"] * 2) / 2] += len(s["text"])
+                        if s["flags"] & fitz.TEXT_FONT_BOLD or "bold" in s["font"].lower():
+                            bold_chars += len(s["text"])
+                    size = weights.most_common(1)[0][0] if horizontal else None
+                    lines.append(TextLine(text, size, bold_chars * 2 > sum(weights.values()), page_number))
+                    length += len(text) + 1
+        return lines, pages_read
+
+    def _segment(self, lines: List[TextLine], max_section_chars: int = 8000) -> PaperSections:
+        """
+        Split lines into sections in a single pass.
+
+        A line is a heading when it is a known section name (optionally numbered,
+        e.g. "I. INTRODUCTION") on its own line, or a numbered line set in a larger
+        or bold font. Section bodies are capped at max_section_chars and the scan for
+        headings stops at the references, so the cost is bounded by the paper length.
+        """
+        sizes = Counter()
+        for line in lines:
+            if line.size is not None:
+                sizes[line.size] += len(line.text)
+        body_size = sizes.most_common(1)[0][0] if sizes else None
+
+        sections = PaperSections()
+        bodies: Dict[str, List[str]] = {}
+        lengths: Dict[str, int] = {}
+        current = None
+        offset = 0
+        parts = []
+        pending_number = None
+
+        for line in lines:
+            line_offset = offset
+            parts.append(line.text)
+            offset += len(line.text) + 1
+            if sections.references_offset is not None:
+                continue
+
+            larger = body_size is not None and line.size is not None and line.size >= body_size + 0.5
+            clearly_larger = larger and line.size >= body_size + 1
+            styled = larger or line.bold
+            if NUMBER_ONLY.match(line.text) and styled:
+                # Number and heading text on separate lines ("1" / "Introduction")
+                pending_number = line.text
+                continue
+
+            name = None
+            inline_text = None
+            inline = INLINE_HEADING.match(line.text)
+            match = HEADING.match(line.text)
+            if inline:
+                name = "abstract"
+                inline_text = inline.group(2)
+            elif match:
+                number, words = match.group(1) or pending_number, match.group(2).strip()
+                key = SECTION_NAMES.get(words.lower())
+                capitalized = words[0].isupper()
+                alone = len(line.text) == len(words)
+                if key and capitalized and (styled or number or words.isupper() or line.size is None or alone):
+                    name = key
+                elif capitalized and (words.lower() in OTHER_SECTIONS and (styled or number or alone)
+                                      or len(words.split()) <= 8 and (
+                                          clearly_larger and ',' not in words
+                                          or number and (styled or words.isupper()
+                                                         or line.size is None and words.istitle()))):
+                    # Another top-level section: ends the current one (title and
+                    # author lines before the first heading are not sections)
+                    name = "other" if sections.headings else None
+            pending_number = None
+
+            if name is None:
+                if current and lengths[current] < max_section_chars:
+                    bodies[current].append(line.text)
+                    lengths[current] += len(line.text) + 1
+                continue
+
+            sections.headings.append((line_offset, line.text))
+            if name == "references":
+                sections.references_offset = line_offset
+                current = None
+                continue
+            # Keep the first occurrence (e.g. an abstract heading before a "Summary" section)
+            current = name if name != "other" and name not in bodies else None
+            if current:
+                bodies[current] = [inline_text] if inline_text else []
+                lengths[current] = len(inline_text or "")
+
+        sections.text = "\n".join(parts)
+        for name, body in bodies.items():
+            setattr(sections, name, "\n".join(body).strip()[:max_section_chars] or None)
+        return sections
+
+    def _layout_title(self, lines: List[TextLine]) -> Optional[str]:
+        """Title from the largest font on the first page (consecutive lines of that size are joined)."""
+        first_page = [line for line in lines[:60] if line.page == 0 and line.size is not None]
+        candidates = [line for line in first_page if len(line.text) >= 3 and 'arxiv' not in line.text.lower()]
+        if not candidates:
+            return None
+        largest = max(line.size for line in candidates)
+        title_lines = []
+        for line in first_page:
+            if abs(line.size - largest) < 0.5 and 'arxiv' not in line.text.lower():
+                title_lines.append(line.text)
+            elif title_lines:
+                break
+        title = re.sub(r'\s+', ' ', " ".join(title_lines)).strip()
+        return title if len(title) >= 10 else None
+
+    @timed("pdf_extraction")
+    def extract_paper(self, pdf_path: str, max_pages: Optional[int] = None,
+                      max_section_chars: int = 8000) -> Optional[PaperSections]:
+        """
+        Extract the text of a PDF together with its section map, using font sizes
+        and weights to tell headings from body text.
+        
+        Pages are read one at a time and reading stops at the worker's page and
+        character caps, so an oversized document never gets loaded whole;
+        truncated and skipped documents are recorded in self.report.
         
         Args:
-            folder_path (str): Path to the folder containing PDFs
+            pdf_path (str): Path to the PDF file
+            max_pages (Optional[int]): Only read the first max_pages pages (default: the worker's cap)
+            max_section_chars (int): Maximum length of each extracted section
             
         Returns:
-            Dict[str, str]: Dictionary with filename as key and extracted text as value
+            PaperSections: Full text, title, abstract, introduction, conclusion and references offset
+            None: If file doesn't exist, is too large or extraction fails
+        """
+        max_pages = max_pages if max_pages is not None else self.max_pages
+        try:
+            if not os.path.exists(pdf_path):
+                print(f"File not found: {pdf_path}")
+                return None
+            if not self._check_size(pdf_path):
+                return None
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+                metadata_title = (doc.metadata or {}).get("title") or None
+                lines, pages_read = self._layout_lines(doc, max_pages, self.max_chars)
+            # Release MuPDF's cached fonts and images of this document
+            fitz.TOOLS.store_shrink(100)
+
+            sections = self._segment(lines, max_section_chars)
+            sections.title = self._layout_title(lines)
+            sections.metadata_title = metadata_title
+            sections.page_count = page_count
+            sections.pages = pages_read
+            # The character cap either cut the text or stopped reading before the page cap
+            cut = self.max_chars is not None and len(sections.text) > self.max_chars
+            pages_skipped = pages_read < page_count and (max_pages is None or pages_read < max_pages)
+            if cut or pages_skipped:
+                sections.text = sections.text[:self.max_chars]
+                sections.truncated = f"character limit of {self.max_chars} reached on page {sections.pages}"
+            elif max_pages is not None and page_count > max_pages:
+                sections.truncated = f"read {max_pages} of {page_count} pages"
+            if sections.truncated:
+                self._report_truncated(pdf_path, sections)
+            return sections
+        except Exception as e:
+            print(f"Error processing {pdf_path}: {str(e)}")
+            return None
+
+    def segment_text(self, text: str, max_section_chars: int = 8000) -> PaperSections:
+        """
+        Section map of plain extracted text (no font information, so headings are
+        recognized by their wording and numbering only).
+        """
+        lines = [TextLine(line.strip()) for line in text.split('\n') if line.strip()]
+        sections = self._segment(lines, max_section_chars)
+        sections.title = self.extract_title_from_text(text)
+        return sections
+
+    def iter_pdfs_from_folder(self, folder_path: str) -> Iterator[Tuple[str, PaperSections]]:
+        """
+        Yield (filename without extension, extracted paper) for each PDF in a folder,
+        one document at a time.
         """
-        pdf_texts = {}
         folder = Path(folder_path)
-        
         if not folder.exists() or not folder.is_dir():
             print(f"Invalid folder path: {folder_path}")
-            return pdf_texts
+            return
 
-        # Process all PDF files in the folder
-        for pdf_file in folder.glob("*.pdf"):
-            text = self.extract_text_from_pdf(str(pdf_file))
-            if text:
-                # Use the filename without extension as the key
-                key = pdf_file.stem
-                pdf_texts[key] = text
+        for pdf_file in sorted(folder.glob("*.pdf")):
+            sections = self.extract_paper(str(pdf_file))
+            if sections and sections.text:
+                yield pdf_file.stem, sections
 
-        return pdf_texts
+    def load_pdfs_from_folder(self, folder_path: str) -> Dict[str, str]:
+        """
+        Load all PDFs from a folder and extract their text.
+        Holds every text in memory; use iter_pdfs_from_folder for large folders.
+        
+        Args:
+            folder_path (str): Path to the folder containing PDFs
+            
+        Returns:
+            Dict[str, str]: Dictionary with filename as key and extracted text as value
+        """
+        return {key: sections.text for key, sections in self.iter_pdfs_from_folder(folder_path)}
 
 
 if __name__ == "__main__":
@@ -115,10 +451,8 @@ if __name__ == "__main__":
         print(f"Title: {title}")
         print(f"First 2000 characters: {text[:2000]}...")
     
-    # Example 2: Process folder of PDFs
+    # Example 2: Process folder of PDFs, one at a time
     folder_path = "pdfs_folder"
-    pdf_texts = worker.load_pdfs_from_folder(folder_path)
-    print(f"\nProcessed {len(pdf_texts)} PDF files from folder")
-    for filename, text in pdf_texts.items():
-        title = worker.extract_title_from_text(text)
-        print(f"- {filename}: {title}")
+    for filename, sections in worker.iter_pdfs_from_folder(folder_path):
+        print(f"- {filename}: {sections.title}")
+    print(f"\nTruncated or skipped: {worker.report}")
@@ -1,8 +1,11 @@
-import re
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from pydantic import BaseModel
 from client import OllamaClient
+from metrics import timed
+from pdfWorker import PDFWorker, PaperSections
+from title_resolver import ResolvedTitle, TitleResolver, normalize_title
 from topic_database import TopicDatabase
+from topic_index import TopicIndex
 
 class PaperAnalysis(BaseModel):
     """Structured output for paper analysis"""
@@ -31,66 +34,122 @@ class InferredTitle(BaseModel):
     """Structured output for title inference"""
     title: str
 
+class PaperTitle(BaseModel):
+    """Title of one paper in a batch"""
+    paper_id: str
+    title: str
+
+class InferredTitles(BaseModel):
+    """Structured output for batched title inference"""
+    titles: list[PaperTitle]
+
+# Rough prompt size estimates for sizing title batches
+CHARS_PER_TOKEN = 4
+TITLE_PROMPT_TOKENS = 200   # Instructions and JSON schema
+TITLE_OUTPUT_TOKENS = 40    # One {"paper_id", "title"} entry
+
+def title_batch_size(context_tokens: int, char_limit: int = 500, max_batch: int = 16) -> int:
+    """Number of paper headers that fit in one title request, with room for the answers."""
+    per_paper = char_limit // CHARS_PER_TOKEN + TITLE_OUTPUT_TOKENS
+    return max(1, min(max_batch, (context_tokens - TITLE_PROMPT_TOKENS) // per_paper))
+
 class Researcher:
-    def __init__(self, client: OllamaClient):
-        """Initialize with an Ollama client"""
+    # Tasks that can run on their own model
+    TASKS = ("title", "analysis", "connection")
+
+    def __init__(self, client: OllamaClient, models: Optional[Dict[str, str]] = None,
+                 escalation_model: Optional[str] = None, related_papers: Optional[int] = 10,
+                 title_context: int = 2048):
+        """
+        Initialize with an Ollama client
+        
+        Args:
+            client (OllamaClient): Client for all requests
+            models (Optional[Dict[str, str]]): Model per task ("title", "analysis", "connection");
+                tasks not listed use the client's model
+            escalation_model (Optional[str]): If set, a topic connection whose draft on the
+                connection model marks the paper important or names a related paper is
+                redone on this (larger) model; all other papers stay on the small models
+            related_papers (Optional[int]): Number of a topic's important papers, most similar
+                to the new paper, included in the topic connection prompt (None: all)
+            title_context (int): Context window of the title model in tokens; sets how many
+                paper headers go into one infer_titles request
+        """
+        unknown = set(models or {}) - set(self.TASKS)
+        if unknown:
+            raise ValueError(f"Unknown task(s) {sorted(unknown)}, expected one of {self.TASKS}")
         self.client = client
+        self.models = {task: (models or {}).get(task) or client.model for task in self.TASKS}
+        self.escalation_model = escalation_model
+        self.pdf_worker = PDFWorker()
+        self.title_resolver = TitleResolver(self)
+        self.related_papers = related_papers
+        self.topic_index = TopicIndex()
+        self.title_batch_size = title_batch_size(title_context)
+
+    def resolve_title(self, text: str, sections: Optional[PaperSections] = None,
+                      known_title: Optional[str] = None) -> ResolvedTitle:
+        """
+        Title of a paper from the cheap sources (paper list, PDF metadata, layout,
+        first lines), calling infer_title only when none of them is confident.
+        """
+        return self.title_resolver.resolve(text, sections, known_title, self.pdf_worker)
+
+    def resolve_titles(self, papers: Dict[str, Tuple[str, Optional[PaperSections], Optional[str]]]
+                       ) -> Dict[str, ResolvedTitle]:
+        """
+        resolve_title for several papers, inferring the unsure ones with batched requests.
 
-    def extract_sections(self, text: str) -> Tuple[str, str]:
+        Args:
+            papers (Dict[str, Tuple[str, Optional[PaperSections], Optional[str]]]):
+                (text, sections, known title) by paper id
+        """
+        return self.title_resolver.resolve_many(papers, self.pdf_worker)
+
+    def extract_sections(self, text: str, sections: Optional[PaperSections] = None) -> Tuple[str, str]:
         """
         Extract abstract and introduction from paper text.
         
         Args:
             text (str): Full paper text
+            sections (Optional[PaperSections]): Section map from PDFWorker.extract_paper;
+                found from the plain text if not given
             
         Returns:
             Tuple[str, str]: (abstract, introduction)
         """
-        # Convert to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        
-        # Try to find abstract
-        abstract_match = re.search(
-            r'abstract\s*\n(.*?)(?=\n\s*(?:introduction|1\.|\d\.|keywords))',
-            text_lower,
-            re.DOTALL
-        )
-        
-        # Try to find introduction
-        intro_match = re.search(
-            r'(?:introduction|1\.introduction)\s*\n(.*?)(?=\n\s*(?:2\.|background|related work))',
-            text_lower,
-            re.DOTALL
-        )
+        if sections is None:
+            sections = self.pdf_worker.segment_text(text)
         
-        # Extract matched sections from original text to preserve case
-        if abstract_match:
-            abstract = text[abstract_match.start(1):abstract_match.end(1)].strip()
-        else:
-            # Take first 1000 characters if abstract not found
-            abstract = text[:2000].strip()
+        abstract = sections.abstract
+        if not abstract:
+            # Take first 2000 characters if abstract not found
+            print("No abstract heading found, using the beginning of the text")
+            abstract = text[:2000]
             
-        if intro_match:
-            introduction = text[intro_match.start(1):intro_match.end(1)].strip()
-        else:
+        introduction = sections.introduction
+        if not introduction:
             # Take next 5000 characters if introduction not found
-            introduction = text[2000:7000].strip()
+            print("No introduction heading found, using the text after the abstract")
+            introduction = text[2000:7000]
             
-        return abstract, introduction
+        return abstract.strip(), introduction.strip()
 
-    def analyze_paper(self, text: str, topic_db: TopicDatabase) -> PaperAnalysis:
+    @timed("analyze_paper")
+    def analyze_paper(self, text: str, topic_db: TopicDatabase, sections: Optional[PaperSections] = None) -> PaperAnalysis:
         """
         Analyze paper text and generate structured summary.
         
         Args:
             text (str): Full paper text
             topic_db (TopicDatabase): Database of known research topics
+            sections (Optional[PaperSections]): Section map of the paper, if already extracted
             
         Returns:
             PaperAnalysis: Structured analysis of the paper
         """
         # Extract abstract and introduction
-        abstract, intro = self.extract_sections(text)
+        abstract, intro = self.extract_sections(text, sections)
         
         # Get available topics
         available_topics = list(topic_db.list_topics().keys())
@@ -130,7 +189,8 @@ class Researcher:
         try:
             analysis = self.client.get_structured_response(
                 prompt=prompt,
-                output_model=PaperAnalysis
+                output_model=PaperAnalysis,
+                model=self.models["analysis"]
             )
             
             # Validate that the main topic is from the available topics
@@ -143,6 +203,7 @@ class Researcher:
             print(f"Error analyzing paper: {str(e)}")
             raise
 
+    @timed("connect_summary_to_topic")
     def connect_summary_to_topic(self, analysis: PaperAnalysis, topic_db: TopicDatabase) -> Optional[TopicConnection]:
         """
         Connect paper analysis to its research topic and analyze relationships.
@@ -159,8 +220,11 @@ class Researcher:
         if not topic_info:
             return None
             
+        # Only the important papers most similar to this one go into the prompt
+        query = " ".join([analysis.title, analysis.summary, analysis.methodology_innovation, *analysis.keywords])
+        important_papers = self.topic_index.top_k(analysis.main_topic, topic_info, query, self.related_papers)
+        
         # Process important papers list
-        important_papers = topic_info.get('important_papers', [])
         if important_papers and isinstance(important_papers[0], dict):
             # If papers are dictionaries with title and summary
             important_papers_str = '\n'.join(
@@ -222,14 +286,24 @@ class Researcher:
         try:
             connection = self.client.get_structured_response(
                 prompt=prompt,
-                output_model=TopicConnection
+                output_model=TopicConnection,
+                model=self.models["connection"]
             )
+            # Escalate only drafts that would flag the paper for reading or tie it to a key paper
+            if (self.escalation_model and self.escalation_model != self.models["connection"]
+                    and (connection.important or (connection.related_paper or "").strip())):
+                connection = self.client.get_structured_response(
+                    prompt=prompt,
+                    output_model=TopicConnection,
+                    model=self.escalation_model
+                )
             return connection
             
         except Exception as e:
             print(f"Error analyzing topic connection: {str(e)}")
             raise
 
+    @timed("infer_title")
     def infer_title(self, text: str, char_limit: int = 500) -> Optional[str]:
         """
         Infer the paper title from the beginning of the text.
@@ -261,7 +335,8 @@ class Researcher:
         try:
             result = self.client.get_structured_response(
                 prompt=prompt,
-                output_model=InferredTitle
+                output_model=InferredTitle,
+                model=self.models["title"]
             )
             return result.title
             
@@ -269,6 +344,72 @@ class Researcher:
             print(f"Error inferring title: {str(e)}")
             return None
 
+    @timed("infer_titles")
+    def infer_titles(self, texts: Dict[str, str], char_limit: int = 500) -> Dict[str, Optional[str]]:
+        """
+        Infer the titles of several papers, packing the beginnings of up to
+        title_batch_size papers into one request.
+
+        A batch whose response does not validate halves the batch size for the
+        following batches; papers missing from a response, or whose title does not
+        occur in their own text, are retried with infer_title.
+
+        Args:
+            texts (Dict[str, str]): Full paper text by paper id
+            char_limit (int): Number of initial characters of each paper to consider
+
+        Returns:
+            Dict[str, Optional[str]]: Inferred title (None if inference fails) by paper id
+        """
+        titles: Dict[str, Optional[str]] = {}
+        pending = [paper_id for paper_id, text in texts.items() if text]
+        titles.update({paper_id: None for paper_id in texts if paper_id not in pending})
+        while pending:
+            batch, pending = pending[:self.title_batch_size], pending[self.title_batch_size:]
+            samples = {paper_id: texts[paper_id][:char_limit].strip() for paper_id in batch}
+            found = self._infer_title_batch(samples) if len(batch) > 1 else {}
+            for paper_id in batch:
+                titles[paper_id] = found.get(paper_id) or self.infer_title(texts[paper_id], char_limit)
+        return titles
+
+    def _infer_title_batch(self, samples: Dict[str, str]) -> Dict[str, str]:
+        """Titles of one batch that passed validation, by paper id."""
+        # Short ids keep the model from copying (or mangling) file names
+        ids = {f"P{i}": paper_id for i, paper_id in enumerate(samples, 1)}
+        papers_str = "\n\n".join(f"[{short_id}]\n{samples[paper_id]}" for short_id, paper_id in ids.items())
+        prompt = f"""Given the beginnings of {len(ids)} academic papers, identify the title of each.
+        Return only the main title (no subtitle) of every paper, keyed by its id in square brackets.
+        
+        {papers_str}
+        
+        Please provide one entry per paper in this exact format:
+        - paper_id: The paper's id, e.g. P1
+        - title: The inferred paper title
+        """
+        
+        try:
+            result = self.client.get_structured_response(
+                prompt=prompt,
+                output_model=InferredTitles,
+                model=self.models["title"]
+            )
+        except Exception as e:
+            self.title_batch_size = max(1, len(ids) // 2)
+            print(f"Error inferring titles of {len(ids)} papers, batch size now {self.title_batch_size}: {str(e)}")
+            return {}
+        
+        found = {}
+        for entry in result.titles:
+            paper_id = ids.get(entry.paper_id.strip().strip('[]'))
+            if paper_id is None or not entry.title.strip():
+                continue
+            # The title has to come from this paper's own text, not a neighbour's
+            words = normalize_title(entry.title).split()
+            sample_words = set(normalize_title(samples[paper_id]).split())
+            if words and sum(word in sample_words for word in words) >= 0.8 * len(words):
+                found[paper_id] = entry.title.strip()
+        return found
+
 if __name__ == "__main__":
     # Example usage
     client = OllamaClient(model='llama3.1')
@@ -315,3 +456,7 @@ if __name__ == "__main__":
     
     title = researcher.infer_title(sample_text)
     print(f"Inferred title: {title}")
+
+    # Several papers in one request
+    titles = researcher.infer_titles({"sample": sample_text, "deep_learning": "A Novel Approach to Deep Learning\n..."})
+    print(f"Inferred titles: {titles}")
@@ -0,0 +1,252 @@
+import argparse
+import ast
+import os
+import re
+import uuid
+from datetime import date, datetime
+from glob import glob
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: without pyarrow, results are written as CSV files
+    pa = None
+
+RESULTS_DIR = "results"
+
+# Columns of each table; topic and run_date are the partition keys
+if pa is not None:
+    SCHEMAS = {
+        "analyses": pa.schema([
+            ("run_id", pa.string()),
+            ("processed_at", pa.timestamp("s")),
+            ("filename", pa.string()),
+            ("title", pa.string()),
+            ("journal_conference", pa.string()),
+            ("year", pa.int64()),
+            ("url", pa.string()),
+            ("main_topic", pa.string()),
+            ("keywords", pa.list_(pa.string())),
+            ("methodology_innovation", pa.string()),
+            ("dataset", pa.string()),
+            ("evaluation_metrics", pa.list_(pa.string())),
+            ("summary", pa.string()),
+            ("pros", pa.list_(pa.string())),
+            ("cons", pa.list_(pa.string())),
+        ]),
+        "connections": pa.schema([
+            ("run_id", pa.string()),
+            ("processed_at", pa.timestamp("s")),
+            ("filename", pa.string()),
+            ("title", pa.string()),
+            ("main_topic", pa.string()),
+            ("key_problem", pa.string()),
+            ("related_paper", pa.string()),
+            ("method_comparison", pa.string()),
+            ("topic_advancement", pa.string()),
+            ("important", pa.bool_()),
+        ]),
+    }
+    PARTITIONING = ds.partitioning(pa.schema([("topic", pa.string()), ("run_date", pa.string())]), flavor="hive")
+
+# CSV fragments written before this store (and by runs without pyarrow)
+CSV_FRAGMENTS = {
+    "analyses": "summary_output/paper_analyses_*.csv",
+    "connections": "topic_analysis/topic_connections_*.csv",
+}
+
+class ResultsStore:
+    def __init__(self, root: str = RESULTS_DIR):
+        """
+        Paper analyses and topic connections of all runs as Parquet datasets.
+
+        Each table lives in root/<table>/topic=<topic>/run_date=<YYYY-MM-DD>/;
+        every run appends new files to its partitions and compact() merges the
+        files of a partition. List fields (keywords, pros, ...) are stored as
+        list columns, and scans read only the requested columns and the
+        partitions matching the topic and date filters.
+
+        Args:
+            root (str): Directory of the datasets
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for the results store (pip install pyarrow)")
+        self.root = root
+
+    def path(self, table: str) -> str:
+        if table not in SCHEMAS:
+            raise ValueError(f"Unknown table '{table}', expected one of {sorted(SCHEMAS)}")
+        return os.path.join(self.root, table)
+
+    def append(self, table: str, rows: List[dict], run_id: Optional[str] = None,
+               processed_at: Optional[datetime] = None) -> int:
+        """
+        Add rows to a table.
+
+        Args:
+            table (str): "analyses" or "connections"
+            rows (List[dict]): Rows as produced by process_paper; unknown keys are ignored
+            run_id (Optional[str]): Identifier of the run (default: its start timestamp)
+            processed_at (Optional[datetime]): Timestamp of the rows (default: now)
+
+        Returns:
+            int: Number of rows written
+        """
+        if not rows:
+            return 0
+        schema = SCHEMAS[table]
+        processed_at = (processed_at or datetime.now()).replace(microsecond=0)
+        run_id = run_id or processed_at.strftime("%Y%m%d_%H%M%S")
+        records = [
+            {**row, "run_id": run_id, "processed_at": processed_at,
+             # Papers without a topic go to the null partition
+             "topic": row.get("main_topic") or None, "run_date": processed_at.date().isoformat()}
+            for row in rows
+        ]
+        data = pa.Table.from_pylist(records, schema=schema.append(pa.field("topic", pa.string()))
+                                    .append(pa.field("run_date", pa.string())))
+        ds.write_dataset(
+            data, self.path(table), format="parquet", partitioning=PARTITIONING,
+            # Unique file names, so concurrent runs append side by side
+            basename_template=f"part-{run_id}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return len(rows)
+
+    def dataset(self, table: str):
+        return ds.dataset(self.path(table), format="parquet", partitioning=PARTITIONING,
+                          schema=SCHEMAS[table].append(pa.field("topic", pa.string()))
+                          .append(pa.field("run_date", pa.string())))
+
+    def scan(self, table: str, columns: Optional[List[str]] = None, topics: Optional[List[str]] = None,
+             since: Optional[date] = None, until: Optional[date] = None) -> pd.DataFrame:
+        """
+        Read a table, pruning partitions by topic and run date.
+
+        Args:
+            table (str): "analyses" or "connections"
+            columns (Optional[List[str]]): Columns to read (default: all)
+            topics (Optional[List[str]]): Only these topics
+            since (Optional[date]): Only runs on or after this date
+            until (Optional[date]): Only runs on or before this date
+
+        Returns:
+            pd.DataFrame: Matching rows; list fields come back as lists
+        """
+        if not os.path.isdir(self.path(table)):
+            return pd.DataFrame(columns=columns or SCHEMAS[table].names)
+        conditions = []
+        if topics is not None:
+            conditions.append(ds.field("topic").isin(topics))
+        if since is not None:
+            conditions.append(ds.field("run_date") >= since.isoformat())
+        if until is not None:
+            conditions.append(ds.field("run_date") <= until.isoformat())
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self.dataset(table).to_table(columns=columns, filter=expression).to_pandas()
+
+    def compact(self, table: str) -> Dict[str, int]:
+        """
+        Merge the files of each partition into one.
+
+        The merged file is written before the parts are removed, so no rows are
+        lost if compaction is interrupted (they may appear twice until it is rerun).
+
+        Returns:
+            Dict[str, int]: Number of files merged per partition directory
+        """
+        merged = {}
+        for directory, _, files in os.walk(self.path(table)):
+            parts = sorted(f for f in files if f.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            paths = [os.path.join(directory, f) for f in parts]
+            data = pa.concat_tables(pq.read_table(p, schema=SCHEMAS[table]) for p in paths)
+            target = os.path.join(directory, f"compacted-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet")
+            pq.write_table(data.sort_by([("processed_at", "ascending")]), target + ".tmp")
+            os.replace(target + ".tmp", target)
+            for p in paths:
+                os.remove(p)
+            merged[os.path.relpath(directory, self.root)] = len(paths)
+        return merged
+
+    def import_csv(self, table: str, pattern: Optional[str] = None) -> int:
+        """
+        Load CSV fragments of earlier runs (paper_analyses_<timestamp>.csv, ...).
+
+        Stringified lists ("['a', 'b']") become list columns again; the run
+        timestamp is taken from the file name. Files whose run is already in
+        the table are skipped, so importing twice does not duplicate rows.
+
+        Returns:
+            int: Number of rows imported
+        """
+        list_columns = [f.name for f in SCHEMAS[table] if pa.types.is_list(f.type)]
+        existing = set(self.scan(table, columns=["run_id"])["run_id"])
+        imported = 0
+        for path in sorted(glob(pattern or CSV_FRAGMENTS[table])):
+            match = re.search(r'(\d{8}_\d{6})', os.path.basename(path))
+            processed_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match else \
+                datetime.fromtimestamp(os.path.getmtime(path))
+            run_id = processed_at.strftime("%Y%m%d_%H%M%S")
+            if run_id in existing:
+                continue
+            existing.add(run_id)
+            df = pd.read_csv(path, keep_default_na=False)
+            for column in list_columns:
+                if column in df:
+                    df[column] = df[column].map(_parse_list)
+            if "year" in df:
+                df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+            if "important" in df:
+                df["important"] = df["important"].map(lambda v: str(v).strip().lower() == "true")
+            rows = [{k: (None if v is pd.NA else v) for k, v in row.items()} for row in df.to_dict("records")]
+            imported += self.append(table, rows, run_id=run_id, processed_at=processed_at)
+        return imported
+
+def _parse_list(value) -> Optional[List[str]]:
+    """A list field as written to CSV by pandas, e.g. "['GNN', 'molecules']"."""
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return [value]
+    return [str(item) for item in parsed] if isinstance(parsed, (list, tuple)) else [str(parsed)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Query and maintain the analysis results store')
+    parser.add_argument('--root', type=str, default=RESULTS_DIR, help=f'Store directory (default: {RESULTS_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help='Print rows of a table')
+    scan.add_argument('table', choices=['analyses', 'connections'])
+    scan.add_argument('--columns', nargs='+', default=None, help='Columns to read (default: all)')
+    scan.add_argument('--topic', nargs='+', default=None, help='Only these topics')
+    scan.add_argument('--since', type=date.fromisoformat, default=None, help='Only runs on or after YYYY-MM-DD')
+    scan.add_argument('--until', type=date.fromisoformat, default=None, help='Only runs on or before YYYY-MM-DD')
+
+    commands.add_parser('compact', help='Merge the files of each partition')
+    commands.add_parser('import_csv', help='Load the CSV files of earlier runs')
+    args = parser.parse_args()
+
+    store = ResultsStore(args.root)
+    if args.command == 'scan':
+        with pd.option_context('display.max_rows', None, 'display.max_colwidth', 60):
+            print(store.scan(args.table, args.columns, args.topic, args.since, args.until))
+    elif args.command == 'compact':
+        for table in SCHEMAS:
+            for partition, files in store.compact(table).items():
+                print(f"{table}/{partition}: merged {files} files")
+    else:
+        for table in SCHEMAS:
+            print(f"Imported {store.import_csv(table)} {table} rows")
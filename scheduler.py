@@ -0,0 +1,180 @@
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+STOPWORDS = set("""
+a an and are as at be been by for from has have in into is it its of on or that the their this to was
+were with we our using use used based via new towards toward between over under than these those such
+paper papers method methods approach approaches model models results study task tasks data learning
+""".split())
+
+TOKEN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords."""
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+def topic_terms(topics: Dict[str, dict]) -> Set[str]:
+    """Vocabulary of the research topics: names, descriptions, challenges and key paper titles."""
+    parts = []
+    for name, info in topics.items():
+        parts.append(name)
+        parts.append(info.get('description', ''))
+        parts.extend(info.get('key_challenges', []))
+        for paper in info.get('important_papers', []):
+            if isinstance(paper, dict):
+                parts.append(paper.get('title', ''))
+                parts.append(paper.get('summary', ''))
+            else:
+                parts.append(str(paper))
+    return set(tokenize(" ".join(parts)))
+
+@dataclass(order=True)
+class ScheduledPaper:
+    priority: float
+    path: str = field(compare=False)
+    keyword_score: float = field(default=0.0, compare=False)
+    citations: Optional[int] = field(default=None, compare=False)
+    year: Optional[int] = field(default=None, compare=False)
+
+class Budget:
+    def __init__(self, max_seconds: Optional[float] = None, max_tokens: Optional[int] = None, client=None):
+        """
+        Wall-clock and token budget for a run.
+
+        Args:
+            max_seconds (Optional[float]): Stop starting new papers after this many seconds
+            max_tokens (Optional[int]): Stop after the client has used this many tokens
+            client (Optional[OllamaClient]): Client whose token usage is counted
+        """
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.client = client
+        self.started = time.monotonic()
+        self.tokens_at_start = self._tokens_used()
+
+    def _tokens_used(self) -> int:
+        usage = getattr(self.client, 'usage', None) or {}
+        return usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def tokens(self) -> int:
+        return self._tokens_used() - self.tokens_at_start
+
+    def exhausted(self) -> Optional[str]:
+        """Reason the budget is used up, or None if there is budget left."""
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return f"time budget of {self.max_seconds:.0f}s used"
+        if self.max_tokens is not None and self.tokens() >= self.max_tokens:
+            return f"token budget of {self.max_tokens} tokens used ({self.tokens()})"
+        return None
+
+    def papers_left(self, papers_done: int) -> Optional[int]:
+        """
+        Estimate of how many more papers fit in the budget, from the average
+        cost of the papers done so far. None if the run has no budget.
+        Before the first paper is done there is no average, so this is 1.
+        """
+        if self.max_seconds is None and self.max_tokens is None:
+            return None
+        if papers_done <= 0:
+            return 1
+        estimates = []
+        if self.max_seconds is not None:
+            per_paper = self.elapsed() / papers_done
+            estimates.append((self.max_seconds - self.elapsed()) / per_paper if per_paper > 0 else math.inf)
+        if self.max_tokens is not None:
+            per_paper = self.tokens() / papers_done
+            estimates.append((self.max_tokens - self.tokens()) / per_paper if per_paper > 0 else math.inf)
+        left = min(estimates)
+        return max(1, math.ceil(left)) if left != math.inf else None
+
+class PaperScheduler:
+    def __init__(self, topics: Dict[str, dict], keyword_weight: float = 0.6, citation_weight: float = 0.25,
+                 recency_weight: float = 0.15, recency_half_life: float = 3.0):
+        """
+        Cheap priority scores for pending papers, computed without any LLM call.
+
+        The score mixes keyword overlap between a paper's first page and the
+        topic vocabulary, its citation count and its publication year.
+
+        Args:
+            topics (Dict[str, dict]): Topic database contents
+            keyword_weight (float): Weight of topic keyword overlap
+            citation_weight (float): Weight of (log) citation count
+            recency_weight (float): Weight of recency
+            recency_half_life (float): Years after which the recency score halves
+        """
+        self.terms = topic_terms(topics)
+        self.keyword_weight = keyword_weight
+        self.citation_weight = citation_weight
+        self.recency_weight = recency_weight
+        self.recency_half_life = recency_half_life
+
+    def keyword_score(self, text: str) -> float:
+        """Share of distinct words on the first page that are topic words, scaled to [0, 1]."""
+        if not self.terms or not text:
+            return 0.0
+        words = set(tokenize(text))
+        if not words:
+            return 0.0
+        hits = len(words & self.terms)
+        # Saturates: 20 distinct topic words on the first page is a strong match
+        return min(1.0, hits / 20.0)
+
+    def recency_score(self, year: Optional[int]) -> float:
+        if not year:
+            return 0.5
+        age = max(0, datetime.now().year - int(year))
+        return 0.5 ** (age / self.recency_half_life)
+
+    def schedule(self, papers: Dict[str, str], metadata: Optional[Dict[str, dict]] = None) -> List[ScheduledPaper]:
+        """
+        Order papers by priority, highest first.
+
+        Args:
+            papers (Dict[str, str]): PDF path -> first-page text
+            metadata (Optional[Dict[str, dict]]): PDF file name -> download metadata
+                (e.g. citations, year from the download manifest)
+
+        Returns:
+            List[ScheduledPaper]: Papers in processing order
+        """
+        metadata = metadata or {}
+        max_citations = max(
+            [int(m.get('citations') or 0) for m in metadata.values()] + [1]
+        )
+        scheduled = []
+        for path, text in papers.items():
+            meta = metadata.get(os.path.basename(path), {})
+            citations = meta.get('citations')
+            year = meta.get('year')
+            keyword = self.keyword_score(text)
+            citation = math.log1p(int(citations or 0)) / math.log1p(max_citations)
+            priority = (self.keyword_weight * keyword
+                        + self.citation_weight * citation
+                        + self.recency_weight * self.recency_score(year))
+            scheduled.append(ScheduledPaper(priority, path, keyword, citations, year))
+        return sorted(scheduled, reverse=True)
+
+
+if __name__ == "__main__":
+    # Example usage
+    from topic_database import TopicDatabase
+    from pdfWorker import PDFWorker
+
+    scheduler = PaperScheduler(TopicDatabase().get_all_topics())
+    worker = PDFWorker()
+    first_pages = {
+        str(path): worker.extract_text_from_pdf(str(path), max_pages=1) or ""
+        for path in Path("pdfs_folder").glob("*.pdf")
+    }
+    for paper in scheduler.schedule(first_pages):
+        print(f"{paper.priority:.3f}  {os.path.basename(paper.path)}")
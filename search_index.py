@@ -0,0 +1,393 @@
+import argparse
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    title TEXT,
+    filename TEXT,
+    length INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS docs_key ON docs (key);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    first_doc INTEGER NOT NULL,
+    docs BLOB NOT NULL,
+    freqs BLOB NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term, first_doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Dropped from the index (phrase positions still count them)
+STOPWORDS = set("""
+a an and are as at be by for from has have in is it its of on or that the this to was were with which
+""".split())
+
+TOKEN = re.compile(r'[a-z0-9]+')
+PHRASE = re.compile(r'"([^"]+)"')
+
+# SQLite page cache per connection
+CACHE_KB = 64 * 1024
+
+# Posting lists shorter than this (in bytes) are not compressed
+RAW_BYTES = 128
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens; "MIMIC-III" becomes "mimic", "iii"."""
+    return TOKEN.findall(text.lower())
+
+def _pack(values: np.ndarray) -> bytes:
+    """
+    Serialize non-negative integers as little-endian uint32, zlib-compressed.
+
+    Short lists, where zlib's setup cost outweighs the saving, are stored raw
+    behind a zero byte (a zlib stream never starts with one).
+    """
+    data = np.asarray(values, dtype='<u4').tobytes()
+    if len(data) < RAW_BYTES:
+        return b'\0' + data
+    return zlib.compress(data)
+
+def _unpack(blob: bytes) -> np.ndarray:
+    data = blob[1:] if blob[:1] == b'\0' else zlib.decompress(blob)
+    return np.frombuffer(data, dtype='<u4').astype(np.int64)
+
+def _encode(term: str, doc_ids: np.ndarray, freqs: np.ndarray, positions: np.ndarray) -> tuple:
+    """
+    Postings row of a term.
+
+    Doc ids, and the positions within each document, are stored as gaps
+    after the first value, so they are small numbers that compress well.
+    """
+    starts = np.cumsum(freqs) - freqs
+    position_gaps = np.diff(positions, prepend=0)
+    position_gaps[starts] = positions[starts]
+    return term, int(doc_ids[0]), _pack(np.diff(doc_ids, prepend=0)), _pack(freqs), _pack(position_gaps)
+
+def _gaps(values: List[int]) -> List[int]:
+    """First value, then differences between neighbours (values ascending)."""
+    return values[:1] + [b - a for a, b in zip(values, values[1:])]
+
+def _decode(rows, with_positions: bool) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Doc ids, frequencies and (absolute) positions of a term's postings rows."""
+    doc_ids, freqs, positions = [], [], []
+    for docs_blob, freqs_blob, positions_blob in rows:
+        doc_ids.append(np.cumsum(_unpack(docs_blob)))
+        freqs.append(_unpack(freqs_blob))
+        if with_positions:
+            gaps = _unpack(positions_blob)
+            running = np.cumsum(gaps)
+            starts = np.cumsum(freqs[-1]) - freqs[-1]
+            # Undo the running sum across document boundaries
+            positions.append(running - np.repeat(running[starts] - gaps[starts], freqs[-1]))
+    if not doc_ids:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty if with_positions else None
+    return (np.concatenate(doc_ids), np.concatenate(freqs),
+            np.concatenate(positions) if with_positions else None)
+
+class SearchIndex:
+    def __init__(self, db_file: str = "paper_index.db", batch_size: int = 256):
+        """
+        Full-text BM25 index over paper texts, stored in SQLite.
+
+        Postings are written in segments: documents are buffered and every
+        batch_size documents each of their terms gets one row holding the
+        batch's doc ids, term frequencies and token positions as compressed
+        uint32 arrays. Rows are clustered by term, so a query reads only the
+        rows of its terms, and decodes and scores them as numpy arrays.
+
+        Args:
+            db_file (str): Path to the SQLite file
+            batch_size (int): Documents buffered in memory before a segment is written
+        """
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        # key -> (title, filename, length, {term: positions}) of documents not yet written
+        self._pending: Dict[str, tuple] = {}
+        # BM25 length norm and live flag by doc_id, reloaded when the index changes
+        self._norms: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+        self._generation = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+        conn.execute(f"PRAGMA cache_size = -{CACHE_KB}")
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._pending:
+                return True
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM docs WHERE key = ? AND deleted = 0", (key,)).fetchone() is not None
+
+    def add(self, key: str, text: str, title: Optional[str] = None, filename: Optional[str] = None):
+        """
+        Index a document. Re-adding a key replaces the previous version.
+
+        Args:
+            key (str): Unique document key (e.g. the PDF file name)
+            text (str): Full text
+            title (Optional[str]): Paper title, returned with search results
+            filename (Optional[str]): PDF file name, returned with search results
+        """
+        tokens = tokenize(text)
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for position, token in enumerate(tokens):
+            if token not in STOPWORDS:
+                positions[token].append(position)
+
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = (title, filename, len(tokens), positions)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    @timed("index_flush")
+    def flush(self):
+        """Write buffered documents as a new segment."""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Ids are assigned under the write lock, so several processes can add to one index
+                first_id = (conn.execute("SELECT MAX(doc_id) FROM docs").fetchone()[0] or 0) + 1
+                postings: Dict[str, List[Tuple[int, List[int]]]] = defaultdict(list)
+                docs = []
+                for doc_id, (key, (title, filename, length, positions)) in enumerate(self._pending.items(), first_id):
+                    docs.append((doc_id, key, title, filename, length))
+                    for term, term_positions in positions.items():
+                        postings[term].append((doc_id, term_positions))
+                # Older versions of the documents are hidden from results until optimize()
+                conn.executemany("UPDATE docs SET deleted = 1 WHERE key = ?", [(doc[1],) for doc in docs])
+                conn.executemany("INSERT INTO docs (doc_id, key, title, filename, length) VALUES (?, ?, ?, ?, ?)", docs)
+                # In key order, so the B-tree is written in one sweep rather than at random
+                conn.executemany(
+                    "INSERT INTO postings (term, first_doc, docs, freqs, positions) VALUES (?, ?, ?, ?, ?)",
+                    (self._segment(term, postings[term]) for term in sorted(postings))
+                )
+                conn.execute("INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                             "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+                conn.execute("COMMIT")
+            self._pending.clear()
+
+    @staticmethod
+    def _segment(term: str, entries: List[Tuple[int, List[int]]]) -> tuple:
+        """Postings row of a term from (doc_id, positions) pairs; the same layout as _encode."""
+        # Most terms of a batch occur in a few documents, where plain lists beat numpy's call overhead
+        doc_ids = [doc_id for doc_id, _ in entries]
+        return (term, doc_ids[0], _pack(_gaps(doc_ids)), _pack([len(p) for _, p in entries]),
+                _pack(list(chain.from_iterable(_gaps(p) for _, p in entries))))
+
+    def close(self):
+        self.flush()
+
+    def _load_norms(self, conn: sqlite3.Connection):
+        """Cache BM25 length norms unless nothing was written since the last load."""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        generation = row[0] if row else 0
+        if self._norms is not None and generation == self._generation:
+            return
+        max_id = conn.execute("SELECT MAX(doc_id) FROM docs").fetchone()[0] or 0
+        lengths = np.zeros(max_id + 1)
+        live = np.zeros(max_id + 1, dtype=bool)
+        for doc_id, length, deleted in conn.execute("SELECT doc_id, length, deleted FROM docs"):
+            lengths[doc_id] = length
+            live[doc_id] = not deleted
+        avgdl = lengths[live].mean() if live.any() else 1.0
+        self._norms = K1 * (1 - B + B * lengths / max(avgdl, 1.0))
+        self._live, self._generation = live, generation
+
+    def _postings(self, conn: sqlite3.Connection, term: str, with_positions: bool = False):
+        """Doc ids, frequencies and (optionally) positions of a term, in doc id order."""
+        # Positions are the bulk of the index; ranking alone does not read them
+        columns = "docs, freqs, positions" if with_positions else "docs, freqs, NULL"
+        rows = conn.execute(f"SELECT {columns} FROM postings WHERE term = ? ORDER BY first_doc", (term,))
+        return _decode(rows, with_positions)
+
+    def _phrase_docs(self, conn: sqlite3.Connection, phrase: List[str]) -> np.ndarray:
+        """Documents containing the tokens of a phrase at consecutive positions."""
+        matches = None
+        for offset, token in enumerate(phrase):
+            if token in STOPWORDS:
+                continue
+            doc_ids, freqs, positions = self._postings(conn, token, with_positions=True)
+            # (document, phrase start) pairs as one sortable integer
+            starts = (np.repeat(doc_ids, freqs) << 32) + positions - offset
+            starts = starts[positions >= offset]
+            matches = starts if matches is None else np.intersect1d(matches, starts, assume_unique=True)
+            if not len(matches):
+                break
+        if matches is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(matches >> 32)
+
+    @timed("index_search")
+    def search(self, query: str, k: int = 10) -> List[Tuple[float, str, Optional[str], Optional[str]]]:
+        """
+        Rank documents for a query with BM25. Quoted phrases must appear verbatim;
+        phrases of stopwords only ("of the") do not restrict the results.
+
+        Example: 'evaluate "MIMIC-III" AUROC'
+
+        Returns:
+            List[Tuple[float, str, Optional[str], Optional[str]]]: (score, key, title, filename), best first
+        """
+        # Stopwords are not indexed, so a phrase made only of them cannot be checked; it is ignored
+        phrases = [tokens for tokens in (tokenize(phrase) for phrase in PHRASE.findall(query))
+                   if any(token not in STOPWORDS for token in tokens)]
+        terms = list(dict.fromkeys(t for t in tokenize(query) if t not in STOPWORDS))
+        if not terms:
+            return []
+
+        with self._lock, self._connect() as conn:
+            # One read transaction, so a concurrent flush is seen entirely or not at all
+            conn.execute("BEGIN")
+            self._load_norms(conn)
+            norms, live = self._norms, self._live
+            n_docs = int(live.sum())
+            if not n_docs:
+                return []
+
+            eligible = live.copy()
+            for phrase in phrases:
+                mask = np.zeros_like(eligible)
+                mask[self._phrase_docs(conn, phrase)] = True
+                eligible &= mask
+
+            scores = np.zeros(len(norms))
+            for term in terms:
+                doc_ids, freqs, _ = self._postings(conn, term)
+                # Replaced versions of a document do not count towards the document frequency
+                df = int(live[doc_ids].sum())
+                if not df:
+                    continue
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                scores[doc_ids] += idf * freqs * (K1 + 1) / (freqs + norms[doc_ids])
+
+            candidates = np.flatnonzero(eligible & (scores > 0))
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+            best = candidates[np.argsort(-scores[candidates], kind='stable')]
+            if not len(best):
+                return []
+            rows = {
+                row[0]: row[1:] for row in conn.execute(
+                    f"SELECT doc_id, key, title, filename FROM docs WHERE doc_id IN ({','.join('?' * len(best))})",
+                    best.tolist())
+            }
+            conn.execute("COMMIT")
+        return [(float(scores[doc_id]), *rows[doc_id]) for doc_id in best.tolist()]
+
+    def optimize(self):
+        """Merge each term's segments into one row and drop replaced documents."""
+        self.flush()
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._generation = None
+            self._load_norms(conn)
+            live = self._live
+            terms = [row[0] for row in conn.execute("SELECT DISTINCT term FROM postings")]
+            for term in terms:
+                doc_ids, freqs, positions = self._postings(conn, term, with_positions=True)
+                keep = live[doc_ids]
+                conn.execute("DELETE FROM postings WHERE term = ?", (term,))
+                if not keep.any():
+                    continue
+                conn.execute(
+                    "INSERT INTO postings (term, first_doc, docs, freqs, positions) VALUES (?, ?, ?, ?, ?)",
+                    _encode(term, doc_ids[keep], freqs[keep], positions[np.repeat(keep, freqs)])
+                )
+            conn.execute("DELETE FROM docs WHERE deleted = 1")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                         "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+            conn.execute("COMMIT")
+            conn.execute("VACUUM")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            return {
+                "documents": conn.execute("SELECT COUNT(*) FROM docs WHERE deleted = 0").fetchone()[0],
+                "terms": conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0],
+                "posting_rows": conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+                "postings_bytes": conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(docs) + LENGTH(freqs) + LENGTH(positions)), 0) FROM postings"
+                ).fetchone()[0],
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Full-text search over processed papers')
+    parser.add_argument('--index', type=str, default='paper_index.db', help='Index file (default: paper_index.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help='Search the index')
+    search.add_argument('query', type=str, help='Query; quote phrases, e.g. \'"MIMIC-III" AUROC\'')
+    search.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+
+    index = commands.add_parser('index', help='Index PDFs in a folder that are not indexed yet')
+    index.add_argument('folder', type=str, help='Folder with PDFs')
+
+    commands.add_parser('optimize', help='Merge segments and drop replaced documents')
+    commands.add_parser('stats', help='Show index size')
+    args = parser.parse_args()
+
+    search_index = SearchIndex(args.index)
+    if args.command == 'search':
+        for score, key, title, filename in search_index.search(args.query, args.k):
+            print(f"{score:7.2f}  {title or key}  ({filename or key})")
+    elif args.command == 'index':
+        from pdfWorker import PDFWorker
+
+        worker = PDFWorker()
+        added = 0
+        for pdf_file in sorted(Path(args.folder).glob("*.pdf")):
+            if pdf_file.stem in search_index:
+                continue
+            sections = worker.extract_paper(str(pdf_file))
+            if sections and sections.text:
+                search_index.add(pdf_file.stem, sections.text, title=sections.title, filename=pdf_file.stem)
+                added += 1
+        search_index.optimize()
+        print(f"Indexed {added} PDFs")
+    elif args.command == 'optimize':
+        search_index.optimize()
+        print(search_index.stats())
+    else:
+        print(search_index.stats())
@@ -1,10 +1,13 @@
 import os
 import serpapi
-import requests
-from urllib.parse import urlparse
 import time
+import re
 import argparse
 import json
+import hashlib
+from file_lock import atomic_write_json, read_json
+from downloader import TokenBucket, download_many
+from download_manifest import DownloadManifest
 
 def load_api_key(key_file='config.json'):
     """Load API key from config file"""
@@ -16,33 +19,98 @@ def load_api_key(key_file='config.json'):
         print(f"Error loading API key: {e}")
         return None
 
-def get_citing_papers(cited_paper_id, api_key, max_pages=None, wait_time=2):
+class SearchCache:
+    def __init__(self, cache_dir='.serpapi_cache', ttl_hours=168, last_page_ttl_hours=6):
+        """On-disk cache of SerpAPI responses keyed by query parameters
+        Args:
+            cache_dir: Directory holding one JSON file per cached query
+            ttl_hours: Age after which a cached response is fetched again
+            last_page_ttl_hours: Age limit for responses without a next page; the last
+                page of a result list is partial and fills up as new papers appear
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.last_page_ttl_seconds = min(last_page_ttl_hours, ttl_hours) * 3600
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, params):
+        # The API key does not change the response, so it is not part of the key
+        key_params = {k: v for k, v in params.items() if k != 'api_key'}
+        key = hashlib.sha256(json.dumps(key_params, sort_keys=True, default=str).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, params):
+        """Return the cached response for params, or None if missing or expired"""
+        path = self._path(params)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl_seconds:
+                return None
+            entry = read_json(path)
+        except (OSError, ValueError):
+            return None
+        if not entry or age > entry.get('ttl_seconds', self.ttl_seconds):
+            return None
+        return entry.get('results')
+
+    def set(self, params, results):
+        """Store a response for params"""
+        key_params = {k: v for k, v in params.items() if k != 'api_key'}
+        last_page = not results.get('pagination', {}).get('next')
+        ttl_seconds = self.last_page_ttl_seconds if last_page else self.ttl_seconds
+        atomic_write_json(self._path(params), {'params': key_params, 'fetched_at': time.time(),
+                                               'ttl_seconds': ttl_seconds, 'results': results})
+
+def cached_search(client, params, cache=None, throttle=None):
+    """Run a SerpAPI search, answering from the cache when possible
+    Args:
+        throttle: Called right before a request that actually hits the API
+    Returns:
+        (results dict, True if the response came from the cache)
+    """
+    if cache is not None:
+        results = cache.get(params)
+        if results is not None:
+            return results, True
+    if throttle is not None:
+        throttle()
+    results = dict(client.search(params))
+    if cache is not None:
+        cache.set(params, results)
+    return results, False
+
+def get_citing_papers(cited_paper_id, api_key, max_pages=None, wait_time=2, client=None, cache=None):
     """Get papers that cite a specific paper across multiple pages
     Args:
         cited_paper_id: ID of the paper to get citations for
         api_key: SerpAPI key
         max_pages: Maximum number of pages to fetch (None for all pages)
         wait_time: Time to wait between requests in seconds
+        client: serpapi.Client to reuse (created from api_key if not given)
+        cache: SearchCache; cached pages cost no API quota and no wait
     """
     all_papers = []
     start = 0
     page = 1
+    client = client or serpapi.Client(api_key=api_key)
+    # Be nice to the API: only requests that actually hit it wait for a token
+    bucket = TokenBucket(1.0 / wait_time if wait_time > 0 else 0.0)
     
     try:
         while True:
-            client = serpapi.Client(api_key=api_key)
-            results = client.search({
+            params = {
                 'engine': 'google_scholar',
                 'cites': cited_paper_id,
                 'start': start  # Pagination parameter
-            })
+            }
+            results, from_cache = cached_search(client, params, cache, throttle=bucket.acquire)
             
             papers = results.get('organic_results', [])
             if not papers:  # No more results
                 break
                 
             all_papers.extend(papers)
-            print(f"Fetched page {page} - Found {len(papers)} papers")
+            print(f"Fetched page {page} - Found {len(papers)} papers" + (" (cached)" if from_cache else ""))
             
             # Check if there's a next page
             if not results.get('pagination', {}).get('next'):
@@ -54,37 +122,44 @@ def get_citing_papers(cited_paper_id, api_key, max_pages=None, wait_time=2):
                 
             start += 10  # Google Scholar uses 10 results per page
             page += 1
-            time.sleep(wait_time)  # Be nice to the API
             
         return all_papers
     except Exception as e:
         print(f"Error getting citing papers: {e}")
         return all_papers  # Return what we've got so far
 
-def download_pdf(url, save_dir):
-    """Download PDF from a given URL"""
+def paper_metadata(paper):
+    """Title, citation count and year of a Google Scholar result, stored with its download"""
+    summary = paper.get('publication_info', {}).get('summary', '')
+    years = re.findall(r'\b(19\d{2}|20\d{2})\b', summary)
+    return {
+        'title': paper.get('title'),
+        'citations': paper.get('inline_links', {}).get('cited_by', {}).get('total'),
+        'year': int(years[-1]) if years else None,
+    }
+
+def download_pdf(url, save_dir, manifest=None, metadata=None):
+    """Download PDF from a given URL
+    Args:
+        url: PDF URL
+        save_dir: Directory to save downloaded PDFs
+        manifest: DownloadManifest of save_dir (created if not given); URLs and
+            contents already in the manifest are not downloaded again
+        metadata: Extra fields stored in the manifest (title, citations, year)
+    """
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(save_dir, exist_ok=True)
-        
-        # Get filename from URL or use a default
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        if not filename.endswith('.pdf'):
-            filename = f"{filename}.pdf"
+        manifest = manifest or DownloadManifest(save_dir)
         
-        filepath = os.path.join(save_dir, filename)
+        if manifest.lookup(url):
+            print(f"Already downloaded: {url}")
+            return True
         
-        # Download the file
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
+        # Download the file (resumes partial downloads, dedupes identical content)
+        filepath = manifest.download(url, timeout=30, **(metadata or {}))
         
         # Check if it's actually a PDF
-        if 'application/pdf' in response.headers.get('content-type', '').lower():
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Successfully downloaded: {filename}")
+        if filepath:
+            print(f"Successfully downloaded: {os.path.basename(filepath)}")
             return True
         else:
             print(f"Not a valid PDF: {url}")
@@ -94,13 +169,15 @@ def download_pdf(url, save_dir):
         print(f"Error downloading {url}: {e}")
         return False
 
-def main(query, save_dir='downloaded_papers', max_citation_pages=None, wait_time=2):
+def main(query, save_dir='downloaded_papers', max_citation_pages=None, wait_time=2, max_workers=8, cache_ttl=168):
     """
     Args:
         query: Search query string
         save_dir: Directory to save downloaded PDFs
         max_citation_pages: Maximum number of citation pages to process (None for all)
-        wait_time: Time to wait between requests in seconds
+        wait_time: Time to wait between requests in seconds (per host for PDF downloads)
+        max_workers: Maximum number of concurrent PDF downloads
+        cache_ttl: Hours to reuse cached search responses (0 disables the cache)
     """
     # Load API key
     api_key = load_api_key()
@@ -108,12 +185,15 @@ def main(query, save_dir='downloaded_papers', max_citation_pages=None, wait_time
         print("No API key found. Please add your SerpAPI key to config.json")
         return
 
-    # Initial search
+    # One client for all searches; responses are cached on disk
     client = serpapi.Client(api_key=api_key)
-    results = client.search({
+    cache = SearchCache(ttl_hours=cache_ttl) if cache_ttl > 0 else None
+
+    # Initial search
+    results, _ = cached_search(client, {
         'engine': 'google_scholar',
         'q': query,
-    })
+    }, cache)
 
     # Get the first paper's citation ID
     if results.get('organic_results'):
@@ -122,30 +202,48 @@ def main(query, save_dir='downloaded_papers', max_citation_pages=None, wait_time
         
         if citation_id:
             print(f"Finding papers citing: {first_paper.get('title')}")
-            citing_papers = get_citing_papers(citation_id, api_key, max_citation_pages, wait_time)
+            citing_papers = get_citing_papers(citation_id, api_key, max_citation_pages, wait_time, client, cache)
             print(f"Total citing papers found: {len(citing_papers)}")
             
-            # Create a directory for PDFs
+            # Create a directory for PDFs and load its download manifest
             os.makedirs(save_dir, exist_ok=True)
+            manifest = DownloadManifest(save_dir)
             
-            # Download PDFs from citing papers
-            downloaded_count = 0
+            # Collect PDF links from citing papers
+            pdf_urls = []
+            metadata = {}
             for paper in citing_papers:
                 # Check for direct PDF links in resources
+                links = []
                 resources = paper.get('resources', [])
                 for resource in resources:
                     if resource.get('file_format') == 'PDF':
-                        if download_pdf(resource['link'], save_dir):
-                            downloaded_count += 1
+                        links.append(resource['link'])
                 
                 # Check the main link
                 main_link = paper.get('link', '')
                 if main_link.endswith('.pdf'):
-                    if download_pdf(main_link, save_dir):
-                        downloaded_count += 1
-                    
-                # Add a small delay to avoid overwhelming servers
-                time.sleep(wait_time)
+                    links.append(main_link)
+                
+                # Citation count and year are used to prioritize analysis
+                for link in links:
+                    metadata.setdefault(link, paper_metadata(paper))
+                pdf_urls.extend(links)
+            
+            # Skip URLs fetched by earlier pulls
+            pdf_urls = list(dict.fromkeys(pdf_urls))
+            known_urls = manifest.known_urls()
+            new_urls = [url for url in pdf_urls if url not in known_urls]
+            print(f"{len(pdf_urls) - len(new_urls)} PDF links already downloaded, fetching {len(new_urls)}")
+            
+            # Download concurrently, waiting wait_time between requests to the same host
+            results = download_many(
+                new_urls,
+                lambda url: download_pdf(url, save_dir, manifest, metadata.get(url)),
+                max_workers=max_workers,
+                per_host_interval=wait_time
+            )
+            downloaded_count = sum(1 for ok in results.values() if ok is True)
             
             print(f"Downloaded {downloaded_count} PDFs to {save_dir}")
         else:
@@ -162,6 +260,10 @@ if __name__ == "__main__":
                       help='Maximum number of citation pages to process (default: None for all pages)')
     parser.add_argument('--wait_time', type=float, default=2.0,
                       help='Time to wait between requests in seconds (default: 2.0)')
+    parser.add_argument('--max_workers', type=int, default=8,
+                      help='Maximum number of concurrent PDF downloads (default: 8)')
+    parser.add_argument('--cache_ttl', type=float, default=168,
+                      help='Hours to reuse cached Google Scholar responses, 0 to disable (default: 168)')
     
     args = parser.parse_args()
     
@@ -169,5 +271,7 @@ if __name__ == "__main__":
         query=args.query,
         save_dir=args.save_dir,
         max_citation_pages=args.max_pages,
-        wait_time=args.wait_time
+        wait_time=args.wait_time,
+        max_workers=args.max_workers,
+        cache_ttl=args.cache_ttl
     )
\ No newline at end of file
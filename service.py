@@ -0,0 +1,607 @@
+import argparse
+import json
+import os
+import queue
+import shutil
+import signal
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+# Job fields listed by GET /jobs; GET /jobs/<id> adds the analysis and connection
+SUMMARY_FIELDS = ("id", "path", "status", "title", "main_topic", "important", "error",
+                  "submitted_at", "started_at", "finished_at", "seconds")
+
+class AnalysisService:
+    def __init__(self, paper_db, topic_db, researcher, pdf_worker=None, search_index=None, workers: int = 1,
+                 upload_folder: str = "pdfs_folder", flush_every: int = 10, max_jobs: int = 10000):
+        """
+        Analyze submitted PDFs with a model client, databases and indexes kept in memory.
+
+        One process holds the OllamaClient, the paper and topic databases, the
+        per-topic related-paper indexes and the full-text index, so a paper
+        submitted by the CLI costs only its extraction and model time instead
+        of an interpreter start, imports and database loads per run.
+
+        Args:
+            paper_db (PaperDatabase): Database of processed papers
+            topic_db (TopicDatabase): Database of research topics
+            researcher (Researcher): Researcher instance for paper analysis
+            pdf_worker (Optional[PDFWorker]): PDF worker with the page/character/file size caps to use
+            search_index (Optional[SearchIndex]): Full-text index new papers are added to
+            workers (int): Papers analyzed in parallel (useful with several Ollama endpoints)
+            upload_folder (str): Where PDFs uploaded over HTTP are saved
+            flush_every (int): Write results after this many new papers (and whenever the queue is empty)
+            max_jobs (int): Finished jobs remembered for status queries
+        """
+        from pdfWorker import PDFWorker
+
+        self.paper_db = paper_db
+        self.topic_db = topic_db
+        self.researcher = researcher
+        self.pdf_worker = pdf_worker or PDFWorker()
+        self.search_index = search_index
+        self.workers = max(1, workers)
+        self.upload_folder = upload_folder
+        self.flush_every = flush_every
+        self.max_jobs = max_jobs
+        self.started = time.time()
+
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        # Path -> id of its queued or running job, so resubmitting a path does not analyze it twice
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._analyses: List[dict] = []
+        self._connections: List[dict] = []
+        self._results_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        # Entries of pdf_worker.report already written
+        self._reported = 0
+
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Finish the papers being analyzed, drop queued ones and write the results."""
+        while True:
+            try:
+                job_id = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if job_id is not None:
+                self._finish(job_id, "cancelled")
+        for _ in self._threads:
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        self.flush()
+
+    def submit(self, paths: List[str], title: Optional[str] = None) -> List[dict]:
+        """
+        Queue PDFs (files or folders of PDFs) for analysis.
+
+        Args:
+            paths (List[str]): PDF files or folders, as seen by the service
+            title (Optional[str]): Known title (only for a single PDF)
+
+        Returns:
+            List[dict]: The job of every PDF; a PDF already queued or running returns its existing job,
+            and one already in the paper database a job that is skipped right away
+        """
+        pdfs = []
+        for path in paths:
+            p = Path(path).expanduser()
+            if p.is_dir():
+                pdfs.extend(str(f.resolve()) for f in sorted(p.glob("*.pdf")))
+            elif p.is_file():
+                pdfs.append(str(p.resolve()))
+            else:
+                raise FileNotFoundError(f"No such file or folder: {path}")
+
+        # Like process_papers, don't extract (or ask the model for the title of) stored papers
+        processed = self.paper_db.processed_filenames()
+        jobs = []
+        with self._lock:
+            for path in pdfs:
+                if path in self._active:
+                    jobs.append(self._jobs[self._active[path]])
+                    continue
+                job = {
+                    "id": uuid.uuid4().hex[:12],
+                    "path": path,
+                    "status": "queued",
+                    "known_title": title if len(pdfs) == 1 else None,
+                    "title": None,
+                    "main_topic": None,
+                    "important": None,
+                    "error": None,
+                    "analysis": None,
+                    "connection": None,
+                    "submitted_at": time.time(),
+                    "started_at": None,
+                    "finished_at": None,
+                    "seconds": None,
+                }
+                self._jobs[job["id"]] = job
+                jobs.append(job)
+                if Path(path).stem in processed:
+                    job.update(status="skipped", finished_at=job["submitted_at"], error="already processed")
+                    continue
+                self._active[path] = job["id"]
+                self._pending.put(job["id"])
+            self._forget_old_jobs()
+        return [dict(job) for job in jobs]
+
+    @property
+    def max_upload_bytes(self) -> Optional[int]:
+        """Largest accepted upload: the PDF worker's file size limit."""
+        max_file_mb = getattr(self.pdf_worker, "max_file_mb", None)
+        return int(max_file_mb * 1024 * 1024) if max_file_mb is not None else None
+
+    def upload(self, filename: str, content, length: int, title: Optional[str] = None) -> dict:
+        """
+        Save an uploaded PDF to the upload folder and queue it.
+
+        Args:
+            filename (str): Name of the uploaded file; a suffix is added if the folder already has one
+            content: Stream to read the PDF from
+            length (int): Number of bytes to read
+            title (Optional[str]): Known title
+
+        Returns:
+            dict: The paper's job
+        """
+        limit = self.max_upload_bytes
+        if limit is not None and length > limit:
+            raise ValueError(f"upload is {length / (1024 * 1024):.1f} MB (limit {limit / (1024 * 1024):g} MB)")
+        name = os.path.basename(filename or "") or f"upload-{uuid.uuid4().hex[:8]}.pdf"
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        os.makedirs(self.upload_folder, exist_ok=True)
+        tmp_path = os.path.join(self.upload_folder, f".{name}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(_LimitedReader(content, length), f)
+            # Never replace a PDF already in the folder: take the first free name and reserve it
+            stem, path = name[:-len(".pdf")], os.path.join(self.upload_folder, name)
+            while True:
+                try:
+                    open(path, "xb").close()
+                    break
+                except FileExistsError:
+                    path = os.path.join(self.upload_folder, f"{stem}-{uuid.uuid4().hex[:8]}.pdf")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self.submit([path], title)[0]
+
+    def _forget_old_jobs(self):
+        """Drop the oldest finished jobs beyond max_jobs (caller holds the lock)."""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] not in ("queued", "running"):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self, status: Optional[str] = None) -> List[dict]:
+        """Summaries of the remembered jobs, oldest first."""
+        with self._lock:
+            return [
+                {field: job[field] for field in SUMMARY_FIELDS}
+                for job in self._jobs.values() if status is None or job["status"] == status
+            ]
+
+    def status(self) -> dict:
+        """Job counts, uptime, model endpoints and per-stage timings."""
+        from metrics import METRICS
+
+        with self._lock:
+            counts = Counter(job["status"] for job in self._jobs.values())
+        summary = METRICS.summary()
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "workers": self.workers,
+            "jobs": dict(counts),
+            "models": self.researcher.models,
+            "endpoints": self.researcher.client.endpoint_stats(),
+            "stages": {name: {key: stats[key] for key in ("count", "p50", "p95")}
+                       for name, stats in summary["stages"].items()},
+            "llm": summary["llm"],
+        }
+
+    def paper(self, title: str) -> Optional[dict]:
+        """Stored analysis of a paper by its exact title."""
+        return self.paper_db.search_paper(title)
+
+    def search(self, query: str, k: int = 10) -> List[dict]:
+        """Full-text search over the analyzed papers."""
+        if self.search_index is None:
+            return []
+        self.search_index.flush()
+        return [
+            {"score": score, "key": key, "title": title, "filename": filename}
+            for score, key, title, filename in self.search_index.search(query, k)
+        ]
+
+    def flush(self):
+        """Write the full-text index, the results and the extraction report collected so far."""
+        from main import save_extraction_report, save_results
+
+        if self.search_index is not None:
+            self.search_index.flush()
+        with self._results_lock:
+            analyses, connections = list(self._analyses), list(self._connections)
+            self._analyses.clear()
+            self._connections.clear()
+            report, self._reported = self.pdf_worker.report[self._reported:], len(self.pdf_worker.report)
+        save_extraction_report(report)
+        if analyses or connections:
+            try:
+                save_results(analyses, connections)
+            except Exception:
+                # Keep them for the next flush
+                with self._results_lock:
+                    self._analyses[:0] = analyses
+                    self._connections[:0] = connections
+                raise
+
+    def _finish(self, job_id: str, status: str, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status=status, finished_at=time.time(), **fields)
+            if job["started_at"] is not None:
+                job["seconds"] = job["finished_at"] - job["started_at"]
+            self._active.pop(job["path"], None)
+
+    def _work(self):
+        # Imported here because main imports this module
+        from main import load_known_titles, process_paper
+
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs[job_id]
+                job.update(status="running", started_at=time.time())
+                path, known_title = job["path"], job["known_title"]
+            try:
+                sections = self.pdf_worker.extract_paper(path)
+                if not sections or not sections.text:
+                    raise ValueError("could not extract text")
+                stem = Path(path).stem
+                title = known_title or load_known_titles(os.path.dirname(path)).get(stem)
+                resolved = self.researcher.resolve_title(sections.text, sections, title)
+                with self._lock:
+                    job["title"] = resolved.title
+                result = process_paper(stem, sections.text, self.paper_db, self.topic_db, self.researcher,
+                                       title, sections, self.search_index, resolved)
+            except Exception as e:
+                print(f"Error processing {path}: {str(e)}")
+                traceback.print_exc()
+                self._finish(job_id, "failed", error=str(e))
+                result = False
+
+            # Writing results must not end the worker thread, or queued jobs would never run
+            try:
+                if result is None:
+                    # No title, or already in the paper database
+                    self._finish(job_id, "skipped")
+                elif result:
+                    analysis_dict, connection_dict = result
+                    with self._results_lock:
+                        self._analyses.append(analysis_dict)
+                        if connection_dict:
+                            self._connections.append(connection_dict)
+                        should_flush = len(self._analyses) >= self.flush_every
+                    self._finish(job_id, "done", main_topic=analysis_dict.get("main_topic") or None,
+                                 important=bool(connection_dict and connection_dict.get("important")),
+                                 analysis=analysis_dict, connection=connection_dict)
+                    if should_flush:
+                        self.flush()
+                if self._pending.empty():
+                    # Idle: make the new papers searchable and their results visible
+                    self.flush()
+            except Exception as e:
+                print(f"Error saving results of {path}: {str(e)}")
+                traceback.print_exc()
+            print(f"Finished {os.path.basename(path)} ({job['status']}) in {job['seconds'] or 0:.1f}s")
+
+
+class _LimitedReader:
+    """Reads at most `length` bytes of a stream (e.g. a request body without reading past it)."""
+
+    def __init__(self, stream, length: int):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def make_handler(service: AnalysisService, shutdown):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body):
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            try:
+                self._get()
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                traceback.print_exc()
+                self._send(500, {"error": str(e)})
+
+        def _get(self):
+            url = urllib.parse.urlsplit(self.path)
+            parts = [urllib.parse.unquote(p) for p in url.path.strip("/").split("/") if p]
+            query = urllib.parse.parse_qs(url.query)
+            if parts == ["status"]:
+                self._send(200, service.status())
+            elif parts == ["jobs"]:
+                self._send(200, {"jobs": service.jobs(query.get("status", [None])[0])})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.job(parts[1])
+                if job:
+                    self._send(200, job)
+                else:
+                    self._send(404, {"error": f"unknown job {parts[1]}"})
+            elif len(parts) == 2 and parts[0] == "papers":
+                paper = service.paper(parts[1])
+                if paper:
+                    self._send(200, paper)
+                else:
+                    self._send(404, {"error": f"unknown paper {parts[1]}"})
+            elif parts == ["search"]:
+                try:
+                    k = int(query.get("k", ["10"])[0])
+                except ValueError:
+                    raise ValueError("k must be an integer") from None
+                self._send(200, {"results": service.search(query.get("q", [""])[0], k)})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            try:
+                if url.path == "/jobs" and self.headers.get("Content-Type", "").startswith("application/pdf"):
+                    # Raw PDF upload: POST /jobs?filename=paper.pdf
+                    length = int(self.headers.get("Content-Length", 0))
+                    limit = service.max_upload_bytes
+                    if limit is not None and length > limit:
+                        # Refuse before reading the body; the connection is closed with it unread
+                        self.close_connection = True
+                        self._send(413, {"error": f"upload is larger than {limit / (1024 * 1024):g} MB"})
+                        return
+                    job = service.upload(query.get("filename", [""])[0], self.rfile, length,
+                                         query.get("title", [None])[0])
+                    self._send(202, {"jobs": [job]})
+                elif url.path == "/jobs":
+                    request = json.loads(self._body() or b"{}")
+                    paths = request.get("paths") or ([request["path"]] if request.get("path") else [])
+                    if not paths:
+                        self._send(400, {"error": "expected {\"paths\": [...]}"})
+                        return
+                    self._send(202, {"jobs": service.submit(paths, request.get("title"))})
+                elif url.path == "/shutdown":
+                    self._send(200, {"status": "stopping"})
+                    shutdown()
+                else:
+                    self._send(404, {"error": "not found"})
+            except (ValueError, FileNotFoundError) as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                traceback.print_exc()
+                self._send(500, {"error": str(e)})
+
+    return Handler
+
+
+def serve(service: AnalysisService, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Run the HTTP/JSON API until interrupted or POST /shutdown.
+
+    The API has no authentication and reads any path the service user can,
+    so it listens on localhost by default.
+
+    Endpoints:
+        POST /jobs {"paths": [...], "title": ...}   queue PDFs or folders (or a raw application/pdf body)
+        GET  /jobs[?status=done]                    job summaries
+        GET  /jobs/<id>                             job with its analysis and topic connection
+        GET  /papers/<title>                        stored analysis of a paper
+        GET  /search?q=...&k=10                     full-text search
+        GET  /status                                job counts, endpoints and stage timings
+        POST /shutdown                              stop the service
+    """
+    httpd = ThreadingHTTPServer((host, port), None)
+    stopping = threading.Event()
+
+    def shutdown(*_):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() waits for serve_forever, so it must not run on the serving thread
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    httpd.RequestHandlerClass = make_handler(service, shutdown)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, shutdown)
+    service.start()
+    print(f"Analysis service listening on http://{host}:{httpd.server_port} (Ctrl-C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\nStopping analysis service...")
+        httpd.server_close()
+        service.stop()
+
+
+class ServiceClient:
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = 30.0):
+        """
+        Client of a running analysis service (standard library only, so it starts fast).
+
+        Args:
+            url (str): Base URL of the service
+            timeout (float): HTTP timeout per request
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body=None, content_type: str = "application/json"):
+        data = body if isinstance(body, bytes) or body is None else json.dumps(body).encode()
+        request = urllib.request.Request(f"{self.url}{path}", data=data, method=method,
+                                         headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise RuntimeError(json.loads(e.read() or b"{}").get("error", str(e))) from None
+
+    def submit(self, paths: List[str], title: Optional[str] = None) -> List[dict]:
+        """Queue PDFs or folders; paths are sent absolute, so they must be visible to the service."""
+        return self._request("POST", "/jobs", {"paths": [os.path.abspath(p) for p in paths], "title": title})["jobs"]
+
+    def upload(self, path: str, title: Optional[str] = None) -> dict:
+        """Send a PDF's content, for a service that cannot read the file itself."""
+        query = urllib.parse.urlencode({"filename": os.path.basename(path), **({"title": title} if title else {})})
+        with open(path, "rb") as f:
+            return self._request("POST", f"/jobs?{query}", f.read(), "application/pdf")["jobs"][0]
+
+    def job(self, job_id: str) -> Optional[dict]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self, status: Optional[str] = None) -> List[dict]:
+        return self._request("GET", "/jobs" + (f"?status={status}" if status else ""))["jobs"]
+
+    def paper(self, title: str) -> Optional[dict]:
+        return self._request("GET", f"/papers/{urllib.parse.quote(title, safe='')}")
+
+    def search(self, query: str, k: int = 10) -> List[dict]:
+        return self._request("GET", f"/search?{urllib.parse.urlencode({'q': query, 'k': k})}")["results"]
+
+    def status(self) -> dict:
+        return self._request("GET", "/status")
+
+    def shutdown(self):
+        self._request("POST", "/shutdown")
+
+    def wait(self, job_ids: List[str], poll_interval: float = 1.0) -> List[dict]:
+        """Block until the jobs are finished; returns them with their analyses."""
+        finished: Dict[str, dict] = {}
+        while len(finished) < len(job_ids):
+            for job_id in job_ids:
+                if job_id in finished:
+                    continue
+                job = self.job(job_id)
+                if job is None or job["status"] not in ("queued", "running"):
+                    finished[job_id] = job or {"id": job_id, "status": "unknown"}
+                    print_job(finished[job_id])
+            if len(finished) < len(job_ids):
+                time.sleep(poll_interval)
+        return [finished[job_id] for job_id in job_ids]
+
+
+def print_job(job: dict):
+    seconds = f"{job['seconds']:.1f}s" if job.get("seconds") is not None else "-"
+    detail = job.get("error") or job.get("title") or ""
+    print(f"{job['id']}  {job['status']:<9} {seconds:>7}  {os.path.basename(job.get('path') or '')}  {detail}")
+
+
+if __name__ == "__main__":
+    # The service itself runs from main.py (python3 main.py --serve), which sets up the models
+    parser = argparse.ArgumentParser(description='Send work to a running analysis service')
+    parser.add_argument('--url', type=str, default=DEFAULT_URL, help=f'Service URL (default: {DEFAULT_URL})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='Queue PDFs or folders of PDFs')
+    submit.add_argument('paths', nargs='+', help='PDF files or folders')
+    submit.add_argument('--title', type=str, default=None, help='Known title (single PDF only)')
+    submit.add_argument('--upload', action='store_true', help='Send the file contents instead of the paths')
+    submit.add_argument('--wait', action='store_true', help='Wait until the papers are analyzed')
+
+    jobs = commands.add_parser('jobs', help='List jobs')
+    jobs.add_argument('--status', type=str, default=None, help='Only jobs in this state (queued, running, done, ...)')
+    job = commands.add_parser('job', help='Show a job with its analysis')
+    job.add_argument('job_id')
+    paper = commands.add_parser('paper', help='Show the stored analysis of a paper')
+    paper.add_argument('title')
+    search = commands.add_parser('search', help='Full-text search over analyzed papers')
+    search.add_argument('query')
+    search.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+    commands.add_parser('status', help='Show job counts, endpoints and stage timings')
+    commands.add_parser('stop', help='Shut the service down')
+    args = parser.parse_args()
+
+    client = ServiceClient(args.url)
+    if args.command == 'submit':
+        if args.upload:
+            submitted = [client.upload(path, args.title) for path in args.paths]
+        else:
+            submitted = client.submit(args.paths, args.title)
+        print(f"Queued {len(submitted)} papers")
+        if args.wait:
+            client.wait([job["id"] for job in submitted])
+        else:
+            for job in submitted:
+                print_job(job)
+    elif args.command == 'jobs':
+        for job in client.jobs(args.status):
+            print_job(job)
+    elif args.command in ('job', 'paper'):
+        found = client.job(args.job_id) if args.command == 'job' else client.paper(args.title)
+        print(json.dumps(found, indent=2, default=str) if found else "Not found")
+    elif args.command == 'search':
+        for result in client.search(args.query, args.k):
+            print(f"{result['score']:7.2f}  {result['title'] or result['key']}")
+    elif args.command == 'status':
+        print(json.dumps(client.status(), indent=2))
+    else:
+        client.shutdown()
+        print("Service stopping")
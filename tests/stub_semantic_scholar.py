@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+
+class StubSemanticScholar:
+    def __init__(self, papers: Dict[str, dict], references: Dict[str, List[str]], host: str = "127.0.0.1"):
+        """
+        Local stand-in for the Semantic Scholar Graph API.
+
+        Serves /paper/<id>, /paper/<id>/references and /paper/<id>/citations
+        (with offset/limit paging) for a fixed graph; citations are derived
+        from the references.
+
+        Args:
+            papers (Dict[str, dict]): Paper records (paperId, externalIds, title, year, citationCount, ...) by ID
+            references (Dict[str, List[str]]): IDs each paper cites
+        """
+        self.papers = papers
+        self.references = references
+        self.citations: Dict[str, List[str]] = {}
+        for citing, cited in references.items():
+            for paper_id in cited:
+                self.citations.setdefault(paper_id, []).append(citing)
+        # Paths answered with HTTP 500 (e.g. "/paper/B/references")
+        self.failing: Set[str] = set()
+        self.requests: List[str] = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, 0), self._handler_class())
+        self.url = f"http://{host}:{self.httpd.server_port}"
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, paper_id: str) -> dict:
+        paper = dict(self.papers[paper_id])
+        paper.setdefault("referenceCount", len(self.references.get(paper_id, [])))
+        paper.setdefault("citationCount", len(self.citations.get(paper_id, [])))
+        return paper
+
+    def start(self) -> "StubSemanticScholar":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                query = urllib.parse.parse_qs(url.query)
+                with stub.lock:
+                    stub.requests.append(url.path)
+                    failing = url.path in stub.failing
+                if failing:
+                    self._send(500, {"error": "simulated failure"})
+                    return
+                parts = url.path.strip("/").split("/")
+                if len(parts) < 2 or parts[0] != "paper" or parts[1] not in stub.papers:
+                    self._send(404, {"error": "Paper not found"})
+                    return
+                paper_id = parts[1]
+                if len(parts) == 2:
+                    self._send(200, stub.record(paper_id))
+                    return
+                if parts[2] == "references":
+                    neighbors, key = stub.references.get(paper_id, []), "citedPaper"
+                else:
+                    neighbors, key = stub.citations.get(paper_id, []), "citingPaper"
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", ["100"])[0])
+                page = neighbors[offset:offset + limit]
+                body = {"offset": offset, "data": [{key: stub.record(n)} for n in page]}
+                if offset + limit < len(neighbors):
+                    body["next"] = offset + limit
+                self._send(200, body)
+
+        return Handler
@@ -0,0 +1,109 @@
+import pytest
+
+from get_paper.citation_crawler import CitationCrawler
+from stub_semantic_scholar import StubSemanticScholar
+
+def paper(paper_id, citations=0, doi=None):
+    return {"paperId": paper_id, "title": f"Paper {paper_id}", "year": 2020, "citationCount": citations,
+            "externalIds": {"DOI": doi} if doi else {}}
+
+@pytest.fixture
+def serve():
+    servers = []
+    def start(papers, references):
+        server = StubSemanticScholar({p["paperId"]: p for p in papers}, references).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+def make_crawler(server, state_file, max_depth=2):
+    return CitationCrawler(state_file=str(state_file), api_url=server.url, max_depth=max_depth,
+                           directions=('references',), requests_per_second=1000, max_workers=2, retries=1)
+
+def crawl_state(crawler):
+    papers = dict(crawler.conn.execute("SELECT paper_id, depth FROM papers"))
+    edges = set(crawler.conn.execute("SELECT citing, cited FROM edges"))
+    return papers, edges
+
+def test_crawl_dedupes_dois(serve, tmp_path):
+    server = serve(
+        [paper("S"), paper("A", 5), paper("B", 3), paper("C"), paper("D", doi="10.1/D"), paper("D2", doi="10.1/d")],
+        {"S": ["A", "B"], "A": ["C", "D"], "B": ["D2"]},
+    )
+    crawler = make_crawler(server, tmp_path / "crawl.db")
+    crawler.add_seeds(["S"])
+    crawler.crawl(batch_size=1)
+    papers, edges = crawl_state(crawler)
+
+    # D2 has D's DOI (in other case), so it is the same paper
+    assert papers == {"S": 0, "A": 1, "B": 1, "C": 2, "D": 2}
+    assert edges == {("S", "A"), ("S", "B"), ("A", "C"), ("A", "D"), ("B", "D")}
+    assert crawler.stats()["frontier"] == 0
+    crawler.close()
+
+def test_shorter_path_is_expanded(serve, tmp_path):
+    # By priority, X (depth 2) is expanded before B (depth 1), so Y is first seen at max_depth
+    server = serve(
+        [paper("S"), paper("A", 100), paper("B", 1), paper("X", 1000), paper("Y"), paper("Z")],
+        {"S": ["A", "B"], "A": ["X"], "X": ["Y"], "B": ["Y"], "Y": ["Z"]},
+    )
+    crawler = make_crawler(server, tmp_path / "crawl.db", max_depth=3)
+    crawler.add_seeds(["S"])
+    crawler.crawl(batch_size=1)
+    papers, edges = crawl_state(crawler)
+
+    assert papers["Y"] == 2
+    assert papers["Z"] == 3
+    assert ("Y", "Z") in edges
+    crawler.close()
+
+def test_failed_pages_stay_on_frontier(serve, tmp_path):
+    server = serve([paper("S"), paper("A", 2), paper("B", 1), paper("C")], {"S": ["A", "B"], "A": ["C"]})
+    server.failing.add("/paper/A/references")
+    crawler = make_crawler(server, tmp_path / "crawl.db")
+    crawler.add_seeds(["S"])
+    crawler.crawl(batch_size=1)
+    assert "C" not in crawl_state(crawler)[0]
+    assert crawler.conn.execute("SELECT paper_id FROM frontier").fetchall() == [("A",)]
+    crawler.close()
+
+    # The next run retries it
+    server.failing.clear()
+    crawler = make_crawler(server, tmp_path / "crawl.db")
+    crawler.crawl(batch_size=1)
+    papers, edges = crawl_state(crawler)
+    assert papers["C"] == 2 and ("A", "C") in edges
+    assert crawler.stats()["frontier"] == 0
+    crawler.close()
+
+def test_resume_matches_uninterrupted_crawl(serve, tmp_path):
+    references = {"S": [f"A{i}" for i in range(5)]}
+    for i in range(5):
+        references[f"A{i}"] = [f"B{(i + j) % 7}" for j in range(3)]
+    ids = ["S"] + [f"A{i}" for i in range(5)] + [f"B{i}" for i in range(7)]
+    server = serve([paper(paper_id, len(paper_id) + n) for n, paper_id in enumerate(ids)], references)
+
+    full = make_crawler(server, tmp_path / "full.db")
+    full.add_seeds(["S"])
+    full.crawl(batch_size=1)
+    expected = crawl_state(full)
+    full.close()
+
+    # Interrupted after a few papers, then resumed from the state file
+    crawler = make_crawler(server, tmp_path / "resumed.db")
+    crawler.add_seeds(["S"])
+    crawler.crawl(max_papers=4, batch_size=1)
+    partial = crawl_state(crawler)[0]
+    crawler.close()
+    assert len(partial) < len(expected[0])
+
+    requests_before = len(server.requests)
+    crawler = make_crawler(server, tmp_path / "resumed.db")
+    crawler.crawl(batch_size=1)
+    assert crawl_state(crawler) == expected
+    # Papers expanded before the interruption are not fetched again
+    resumed_paths = server.requests[requests_before:]
+    assert "/paper/S/references" not in resumed_paths
+    crawler.close()
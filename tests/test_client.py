@@ -0,0 +1,62 @@
+import pytest
+from pydantic import BaseModel
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from client import OllamaClient
+
+class Answer(BaseModel):
+    text: str
+
+@pytest.fixture
+def servers():
+    started = []
+    def start(n):
+        for _ in range(n):
+            started.append(FakeOllamaServer(base_latency=0.0, tokens_per_second=1e6, seed=0).start())
+        return started[-n:]
+    yield start
+    for server in started:
+        server.stop()
+
+def ask(client):
+    return client.get_structured_response("Say something", Answer)
+
+def test_sequential_requests_rotate_across_endpoints(servers):
+    fleet = servers(3)
+    client = OllamaClient(model="fake", endpoints=[s.url for s in fleet])
+    for _ in range(6):
+        ask(client)
+    assert [s.requests for s in fleet] == [2, 2, 2]
+
+def test_single_transient_failure_does_not_eject(servers):
+    server, = servers(1)
+    client = OllamaClient(model="fake", host=server.url, eject_seconds=30)
+    server.failure_rate = 1.0
+    with pytest.raises(Exception):
+        ask(client)
+    server.failure_rate = 0.0
+    # The only endpoint stays in rotation, so the next request does not wait out eject_seconds
+    assert ask(client).text is not None
+    assert client.endpoint_stats()[0]["healthy"]
+
+def test_last_healthy_endpoint_is_never_ejected(servers):
+    server, = servers(1)
+    client = OllamaClient(model="fake", host=server.url, eject_after=1)
+    server.failure_rate = 1.0
+    for _ in range(3):
+        with pytest.raises(Exception):
+            ask(client)
+    assert client.endpoint_stats()[0]["healthy"]
+
+def test_failing_endpoint_ejected_after_consecutive_failures(servers):
+    good, bad = servers(2)
+    bad.failure_rate = 1.0
+    client = OllamaClient(model="fake", endpoints=[good.url, bad.url], eject_after=2, eject_seconds=60)
+    # Requests fail over to the good endpoint, so all of them succeed
+    for _ in range(8):
+        ask(client)
+    stats = {s["host"]: s for s in client.endpoint_stats()}
+    assert not stats[bad.url]["healthy"]
+    assert stats[good.url]["healthy"]
+    assert bad.requests == 2
+    assert good.requests == 8
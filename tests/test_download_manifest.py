@@ -0,0 +1,58 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from download_manifest import DownloadManifest
+from downloader import fetch_pdf
+
+PDF = b"%PDF-1.4 test paper\n%%EOF\n"
+ETAG = '"v1"'
+
+@pytest.fixture
+def pdf_server():
+    statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == ETAG:
+                statuses.append(304)
+                self.send_response(304)
+                self.end_headers()
+                return
+            statuses.append(200)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(PDF)))
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            self.wfile.write(PDF)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/paper.pdf", statuses
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_download_recovers_transfer_finished_before_crash(tmp_path, pdf_server):
+    url, statuses = pdf_server
+    # The transfer completed, but the process died before the manifest entry was appended
+    temp_path = tmp_path / f".{hashlib.sha1(url.encode()).hexdigest()}.download"
+    assert fetch_pdf(url, str(temp_path)) == "downloaded"
+
+    manifest = DownloadManifest(str(tmp_path))
+    path = manifest.download(url, title="Test paper")
+    assert statuses == [200, 304]
+    assert path is not None and open(path, "rb").read() == PDF
+    assert not temp_path.exists() and not os.path.exists(f"{temp_path}.meta")
+    assert manifest.lookup(url)["title"] == "Test paper"
+
+    # Later runs answer from the manifest without a request
+    assert manifest.download(url) == path
+    assert statuses == [200, 304]
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from downloader import HostLimiter, download_many
+
+def test_shared_limiter_keeps_per_host_interval():
+    interval = 0.1
+    limiter = HostLimiter(interval)
+    starts = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            starts.append(time.monotonic())
+
+    def fetch(url):
+        request()
+        # Follow-up request (e.g. the PDF behind a landing page) on the same host
+        limiter.acquire(url)
+        request()
+        return url
+
+    urls = [f"http://example.org/{i}" for i in range(4)]
+    results = download_many(urls, fetch, max_workers=4, per_host_concurrency=4, limiter=limiter)
+    assert results == {url: url for url in urls}
+    starts.sort()
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert len(starts) == 8
+    assert min(gaps) >= interval * 0.9
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import stat
+
+from database import PaperDatabase
+from file_lock import atomic_write_json
+from topic_database import TopicDatabase
+
+WRITERS = 8
+INSERTS = 50
+
+def insert_papers(db_file, writer):
+    db = PaperDatabase(db_file)
+    for i in range(INSERTS):
+        db.insert_paper(f"paper-{writer}-{i}", {"writer": writer, "i": i})
+
+def insert_topics(db_file, writer):
+    db = TopicDatabase(db_file)
+    for i in range(INSERTS):
+        db.insert_topic(f"topic-{writer}-{i}", {"description": f"{writer} {i}"})
+
+def run_writers(target, db_file):
+    processes = [multiprocessing.Process(target=target, args=(db_file, w)) for w in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+def test_concurrent_paper_writers_lose_no_updates(tmp_path):
+    db_file = str(tmp_path / "papers.json")
+    run_writers(insert_papers, db_file)
+    papers = PaperDatabase(db_file).get_all_papers()
+    assert len(papers) == WRITERS * INSERTS
+    assert papers["paper-7-49"] == {"writer": 7, "i": 49}
+
+def test_concurrent_topic_writers_lose_no_updates(tmp_path):
+    db_file = str(tmp_path / "topics.json")
+    run_writers(insert_topics, db_file)
+    assert len(TopicDatabase(db_file).get_all_topics()) == WRITERS * INSERTS
+
+def test_atomic_write_keeps_file_mode(tmp_path):
+    path = tmp_path / "papers.json"
+    atomic_write_json(str(path), {})
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+
+    os.chmod(path, 0o640)
+    atomic_write_json(str(path), {"a": 1})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
@@ -0,0 +1,23 @@
+import json
+
+from metrics import Metrics
+
+def test_history_is_bounded_and_streamed(tmp_path):
+    metrics = Metrics(max_samples=10, flush_every=5, max_file_bytes=400)
+    metrics.stream_events(str(tmp_path))
+    for i in range(100):
+        metrics.record("analysis", float(i))
+
+    stage = metrics.summary()["stages"]["analysis"]
+    assert len(metrics.durations["analysis"]) == 10
+    assert stage["count"] == 100 and stage["total"] == sum(range(100))
+    # Percentiles come from the recent samples only
+    assert stage["p50"] >= 90
+    assert len(metrics.events) < 5
+
+    metrics.write_jsonl(metrics.events_path)
+    files = sorted(tmp_path.glob("run_*.jsonl"))
+    assert len(files) > 1
+    lines = [json.loads(line) for f in files for line in f.read_text().splitlines()]
+    assert [e["seconds"] for e in lines if e["type"] == "span"] == [float(i) for i in range(100)]
+    assert lines[-1]["type"] == "summary"
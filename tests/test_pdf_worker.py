@@ -0,0 +1,23 @@
+from benchmarks.synthetic_corpus import make_paper
+from pdfWorker import PDFWorker
+
+def test_oversized_pdf_is_reported_once(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_paper(path, "A Synthetic Paper About Caps", pages=3)
+    worker = PDFWorker(max_file_mb=0.001)
+    # Scheduling reads the first page, then the paper is extracted
+    assert worker.extract_text_from_pdf(path, max_pages=1) is None
+    assert worker.extract_paper(path) is None
+    assert [entry["status"] for entry in worker.report] == ["skipped"]
+
+def test_character_cap_reported_when_reading_stopped_early(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_paper(path, "A Synthetic Paper About Caps", pages=3)
+    first_page = PDFWorker(max_chars=None).extract_paper(path, max_pages=1).text
+    # Reading stops after page one, and its text ends up just under the cap
+    worker = PDFWorker(max_chars=len(first_page) + 1)
+    sections = worker.extract_paper(path)
+    assert len(sections.text) < worker.max_chars
+    assert sections.pages == 1 and sections.page_count == 3
+    assert sections.truncated
+    assert [entry["status"] for entry in worker.report] == ["truncated"]
@@ -0,0 +1,35 @@
+from researcher import PaperAnalysis, Researcher, TopicConnection
+from topic_database import TopicDatabase
+
+class ScriptedClient:
+    """Answers topic connection requests with a fixed draft on the small model."""
+    model = "small"
+
+    def __init__(self, draft: TopicConnection):
+        self.draft = draft
+        self.models = []
+
+    def get_structured_response(self, prompt, output_model, model=None):
+        self.models.append(model)
+        if model == "small":
+            return self.draft
+        return TopicConnection(key_problem="p", topic_advancement="a", important=True, related_paper="GCN")
+
+def connect(tmp_path, draft: TopicConnection):
+    topic_db = TopicDatabase(str(tmp_path / "topics.json"))
+    topic_db.insert_topic("Graphs", {"description": "Graph learning", "important_papers": ["GCN"]})
+    analysis = PaperAnalysis(journal_conference="", year=2024, title="T", url=None, main_topic="Graphs",
+                             keywords=[], methodology_innovation="", dataset="", evaluation_metrics=[],
+                             summary="", pros=[], cons=[])
+    client = ScriptedClient(draft)
+    researcher = Researcher(client, escalation_model="large")
+    return researcher.connect_summary_to_topic(analysis, topic_db), client.models
+
+def test_only_flagged_drafts_are_escalated(tmp_path):
+    plain = TopicConnection(key_problem="p", topic_advancement="a", important=False)
+    connection, models = connect(tmp_path, plain)
+    assert models == ["small"] and connection is plain
+
+    flagged = TopicConnection(key_problem="p", topic_advancement="a", important=False, related_paper="GCN")
+    connection, models = connect(tmp_path, flagged)
+    assert models == ["small", "large"] and connection.important
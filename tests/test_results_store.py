@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from results_store import ResultsStore
+
+def test_import_csv_twice_does_not_duplicate_rows(tmp_path):
+    csv_path = tmp_path / "paper_analyses_20240101_120000.csv"
+    csv_path.write_text(
+        "filename,title,main_topic,keywords,year\n"
+        "a,Paper A,GNN,\"['graphs', 'molecules']\",2023\n"
+        "b,Paper B,GNN,[],2022\n"
+    )
+    store = ResultsStore(str(tmp_path / "results"))
+    assert store.import_csv("analyses", str(tmp_path / "paper_analyses_*.csv")) == 2
+    assert store.import_csv("analyses", str(tmp_path / "paper_analyses_*.csv")) == 0
+
+    rows = store.scan("analyses", columns=["filename", "keywords"])
+    assert sorted(rows["filename"]) == ["a", "b"]
+    assert list(rows.set_index("filename").loc["a", "keywords"]) == ["graphs", "molecules"]
@@ -0,0 +1,18 @@
+from scheduler import Budget
+
+class FakeClient:
+    def __init__(self):
+        self.usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+
+def test_papers_left_follows_average_cost():
+    assert Budget().papers_left(3) is None
+
+    budget = Budget(max_seconds=100)
+    assert budget.papers_left(0) == 1
+    budget.started -= 10
+    assert budget.papers_left(2) == 18
+
+    client = FakeClient()
+    budget = Budget(max_tokens=1000, client=client)
+    client.usage['prompt_tokens'] = 300
+    assert budget.papers_left(3) == 7
@@ -0,0 +1,64 @@
+from search_index import SearchIndex
+
+DOCS = {
+    "gnn": "Graph neural networks for molecules. Message passing over molecular graphs; graph pooling.",
+    "ehr": "Deep learning on the MIMIC-III intensive care database. We report AUROC on MIMIC-III mortality.",
+    "mix": "A graph of patients built from MIMIC-III records, evaluated with AUROC.",
+    "rl": "Reinforcement learning of policies for the game of Go with tree search.",
+}
+
+def build(tmp_path, batch_size=2):
+    index = SearchIndex(str(tmp_path / "index.db"), batch_size=batch_size)
+    for key, text in DOCS.items():
+        index.add(key, text, title=key.upper(), filename=key)
+    index.flush()
+    return index
+
+def keys(results):
+    return [key for _, key, _, _ in results]
+
+def test_bm25_ranks_by_term_frequency(tmp_path):
+    index = build(tmp_path)
+    results = index.search("graph")
+    # "gnn" mentions graphs three times, "mix" once
+    assert keys(results) == ["gnn", "mix"]
+    assert results[0][0] > results[1][0]
+    assert results[0][2:] == ("GNN", "gnn")
+    assert keys(index.search("graph", k=1)) == ["gnn"]
+
+def test_quoted_phrase_must_match_verbatim(tmp_path):
+    index = build(tmp_path)
+    assert set(keys(index.search("mimic auroc"))) == {"ehr", "mix"}
+    assert keys(index.search('"MIMIC-III mortality"')) == ["ehr"]
+    # Both words occur in "mix", but not next to each other
+    assert keys(index.search('"graph mimic"')) == []
+    # Stopwords inside a phrase keep their position
+    assert keys(index.search('"game of go"')) == ["rl"]
+
+def test_all_stopword_phrase_is_ignored(tmp_path):
+    index = build(tmp_path)
+    assert keys(index.search('reinforcement "of the"')) == keys(index.search("reinforcement")) == ["rl"]
+    assert index.search('"of the"') == []
+
+def test_replaced_document_hides_old_postings(tmp_path):
+    index = build(tmp_path)
+    index.add("gnn", "Transformers for protein structure prediction.", title="GNN v2", filename="gnn")
+    index.flush()
+    assert keys(index.search("graph")) == ["mix"]
+    assert index.search("protein")[0][1:] == ("gnn", "GNN v2", "gnn")
+    assert index.stats()["documents"] == len(DOCS)
+
+def test_optimize_preserves_results(tmp_path):
+    index = build(tmp_path, batch_size=1)
+    index.add("rl", "Offline reinforcement learning from logged policies.", title="RL", filename="rl")
+    queries = ["graph", "mimic auroc", '"MIMIC-III mortality"', "reinforcement policies", '"game of go"']
+    before = [index.search(q) for q in queries]
+    rows_before = index.stats()["posting_rows"]
+
+    index.optimize()
+    after = [index.search(q) for q in queries]
+    assert [keys(r) for r in after] == [keys(r) for r in before]
+    for old, new in zip(before, after):
+        assert [round(score, 9) for score, *_ in new] == [round(score, 9) for score, *_ in old]
+    assert index.stats()["posting_rows"] < rows_before
+    assert keys(index.search('"game of go"')) == []
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.synthetic_corpus import make_paper
+from client import OllamaClient
+from database import PaperDatabase
+from pdfWorker import PDFWorker
+from researcher import Researcher
+from topic_database import TopicDatabase
+from watcher import watch_and_process
+
+def test_failed_analysis_is_retried(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    make_paper(str(folder / "paper.pdf"), "A Synthetic Paper About Retries", pages=2)
+
+    server = FakeOllamaServer(base_latency=0.0, tokens_per_second=1e6, seed=0).start()
+    server.failure_rate = 1.0
+    paper_db = PaperDatabase(str(tmp_path / "papers.json"))
+    researcher = Researcher(OllamaClient(model="fake", host=server.url))
+    stop = threading.Event()
+
+    def recover_then_stop():
+        # Ollama comes back after the first attempt failed
+        while server.failures == 0:
+            time.sleep(0.05)
+        server.failure_rate = 0.0
+        deadline = time.monotonic() + 20
+        while not paper_db.get_all_papers() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop.set()
+
+    watchdog = threading.Thread(target=recover_then_stop, daemon=True)
+    watchdog.start()
+    try:
+        watch_and_process(str(folder), paper_db, TopicDatabase(str(tmp_path / "topics.json")), researcher,
+                          poll_interval=0.05, settle_seconds=0.1, stop=stop, retry_seconds=0.2)
+    finally:
+        server.stop()
+    watchdog.join()
+
+    papers = paper_db.get_all_papers()
+    assert len(papers) == 1
+    assert next(iter(papers.values()))["filename"] == "paper"
+
+def test_papers_in_database_are_not_analyzed_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    make_paper(str(folder / "old.pdf"), "A Paper Analyzed By An Earlier Batch Run", pages=2)
+    paper_db = PaperDatabase(str(tmp_path / "papers.json"))
+    paper_db.insert_paper("A Paper Analyzed By An Earlier Batch Run", {"filename": "old"})
+
+    server = FakeOllamaServer(base_latency=0.0, tokens_per_second=1e6, seed=0).start()
+    researcher = Researcher(OllamaClient(model="fake", host=server.url))
+    extracted = []
+
+    class CountingWorker(PDFWorker):
+        def extract_paper(self, path, *args, **kwargs):
+            extracted.append(path)
+            return super().extract_paper(path, *args, **kwargs)
+
+    stop = threading.Event()
+    timer = threading.Timer(1.0, stop.set)
+    timer.start()
+    try:
+        watch_and_process(str(folder), paper_db, TopicDatabase(str(tmp_path / "topics.json")), researcher,
+                          poll_interval=0.05, settle_seconds=0.1, stop=stop, pdf_worker=CountingWorker())
+    finally:
+        server.stop()
+    timer.join()
+
+    assert extracted == []
+    assert server.requests == 0
+    assert "old.pdf" in json.loads((folder / ".watch_state.json").read_text())
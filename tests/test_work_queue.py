@@ -0,0 +1,18 @@
+import time
+
+from work_queue import WorkQueue
+
+def test_expired_lease_cannot_ack_or_fail(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=0.05)
+    queue.enqueue([str(tmp_path / "paper.pdf")])
+    paper_id, _ = queue.lease("w1")
+    time.sleep(0.1)
+    assert queue.lease("w2")[0] == paper_id
+
+    # w1's lease expired and the paper now belongs to w2
+    assert not queue.ack(paper_id, "w1", 1.0)
+    assert not queue.fail(paper_id, "w1", "error", 1.0)
+    assert queue.status()["papers"] == {"leased": 1}
+
+    assert queue.ack(paper_id, "w2", 1.0)
+    assert queue.status()["papers"] == {"done": 1}
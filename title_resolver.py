@@ -0,0 +1,209 @@
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+# Base confidence of each source when its candidate looks like a title
+SOURCE_CONFIDENCE = {
+    "known": 1.0,       # Title from a paper list / download manifest
+    "metadata": 0.8,    # PDF document info
+    "layout": 0.8,      # Largest font on page one
+    "heuristic": 0.5,   # First plausible line of the text
+}
+
+# Metadata titles written by the authoring tool rather than the author
+JUNK_TITLE = re.compile(
+    r'(^untitled|^microsoft (word|powerpoint)|\.(docx?|pdf|dvi|tex|ps|indd)$|^slide ?\d|^paper\s*\d*$|^title$|^none$)',
+    re.IGNORECASE
+)
+# Running heads and page furniture that can be set in a large font
+NOT_A_TITLE = re.compile(
+    r'(arxiv|preprint|proceedings|journal of|transactions on|vol\.|volume \d|issn|doi:|copyright|©|accepted|submitted)',
+    re.IGNORECASE
+)
+
+def normalize_title(title: str) -> str:
+    """Lowercase alphanumeric words, for comparing candidates."""
+    return " ".join(re.findall(r'[a-z0-9]+', title.lower()))
+
+@dataclass
+class ResolvedTitle:
+    title: Optional[str]
+    source: str
+    confidence: float
+
+class TitleResolver:
+    def __init__(self, researcher=None, threshold: float = 0.75):
+        """
+        Pick a paper's title from cheap sources and ask the model only when unsure.
+
+        Candidates from the download manifest, the PDF metadata, the largest
+        font on page one and the first-lines heuristic get a confidence; two
+        sources agreeing raise it. Researcher.infer_title is called only when
+        the best candidate is below the threshold.
+
+        Args:
+            researcher (Optional[Researcher]): Used for the model fallback (None: never call the model)
+            threshold (float): Minimum confidence to accept a title without the model
+        """
+        self.researcher = researcher
+        self.threshold = threshold
+        self.hits = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def score(title: Optional[str], source: str) -> float:
+        """Confidence that a candidate from `source` is the real title."""
+        if not title:
+            return 0.0
+        title = title.strip()
+        confidence = SOURCE_CONFIDENCE[source]
+        if source == "known":
+            return confidence
+        if source == "metadata" and JUNK_TITLE.search(title):
+            return 0.0
+        words = title.split()
+        if len(title) < 10 or len(words) < 3 or len(title) > 250:
+            confidence -= 0.4
+        if NOT_A_TITLE.search(title) or '@' in title or 'http' in title:
+            confidence -= 0.5
+        if title.count(',') > 2:
+            # Looks like an author list
+            confidence -= 0.3
+        if not re.search(r'[A-Za-z]{3}', title):
+            confidence -= 0.5
+        return max(0.0, confidence)
+
+    def candidates(self, text: str, sections=None, known_title: Optional[str] = None,
+                   pdf_worker=None) -> List[Tuple[str, str, float]]:
+        """(source, title, confidence) of every cheap source, best first."""
+        found = [
+            ("known", known_title),
+            ("metadata", getattr(sections, "metadata_title", None)),
+            ("layout", getattr(sections, "title", None)),
+        ]
+        if pdf_worker is not None:
+            found.append(("heuristic", pdf_worker.extract_title_from_text(text)))
+
+        scored = []
+        for source, title in found:
+            confidence = self.score(title, source)
+            if confidence > 0:
+                scored.append((source, re.sub(r'\s+', ' ', title).strip(), confidence))
+
+        # Independent sources agreeing on the same title
+        boosted = []
+        for source, title, confidence in scored:
+            agreeing = sum(
+                1 for other, other_title, _ in scored
+                if other != source and SequenceMatcher(
+                    None, normalize_title(title), normalize_title(other_title)).ratio() >= 0.9
+            )
+            boosted.append((source, title, min(1.0, confidence + 0.15 * agreeing)))
+        return sorted(boosted, key=lambda candidate: candidate[2], reverse=True)
+
+    def resolve(self, text: str, sections=None, known_title: Optional[str] = None,
+                pdf_worker=None) -> ResolvedTitle:
+        """
+        Resolve the title of a paper.
+
+        Args:
+            text (str): Full paper text
+            sections (Optional[PaperSections]): Section map with the layout and metadata titles
+            known_title (Optional[str]): Title from a paper list or the download manifest
+            pdf_worker (Optional[PDFWorker]): For the first-lines heuristic
+
+        Returns:
+            ResolvedTitle: Title (None if nothing worked), its source and confidence
+        """
+        candidates = self.candidates(text, sections, known_title, pdf_worker)
+        resolved = self._confident(candidates)
+        if resolved is None:
+            if self.researcher is not None:
+                resolved = self._inferred(self.researcher.infer_title(text))
+            else:
+                resolved = self._best(candidates)
+        with self._lock:
+            self.hits[resolved.source] += 1
+        return resolved
+
+    def resolve_many(self, papers: Dict[str, Tuple[str, object, Optional[str]]],
+                     pdf_worker=None) -> Dict[str, ResolvedTitle]:
+        """
+        Resolve the titles of several papers; the unsure ones go to the model together
+        through Researcher.infer_titles.
+
+        Args:
+            papers (Dict[str, Tuple[str, Optional[PaperSections], Optional[str]]]):
+                (text, sections, known title) by paper id
+            pdf_worker (Optional[PDFWorker]): For the first-lines heuristic
+
+        Returns:
+            Dict[str, ResolvedTitle]: Resolved title by paper id
+        """
+        resolved: Dict[str, ResolvedTitle] = {}
+        unsure: Dict[str, List[Tuple[str, str, float]]] = {}
+        for paper_id, (text, sections, known_title) in papers.items():
+            candidates = self.candidates(text, sections, known_title, pdf_worker)
+            confident = self._confident(candidates)
+            if confident is not None:
+                resolved[paper_id] = confident
+            else:
+                unsure[paper_id] = candidates
+
+        if unsure and self.researcher is not None:
+            titles = self.researcher.infer_titles({paper_id: papers[paper_id][0] for paper_id in unsure})
+            resolved.update({paper_id: self._inferred(titles.get(paper_id)) for paper_id in unsure})
+        else:
+            resolved.update({paper_id: self._best(candidates) for paper_id, candidates in unsure.items()})
+
+        with self._lock:
+            self.hits.update(title.source for title in resolved.values())
+        return {paper_id: resolved[paper_id] for paper_id in papers}
+
+    def _confident(self, candidates: List[Tuple[str, str, float]]) -> Optional[ResolvedTitle]:
+        """The best candidate if it reaches the threshold."""
+        if candidates and candidates[0][2] >= self.threshold:
+            source, title, confidence = candidates[0]
+            return ResolvedTitle(title, source, confidence)
+        return None
+
+    @staticmethod
+    def _best(candidates: List[Tuple[str, str, float]]) -> ResolvedTitle:
+        """The best candidate however unsure, when the model is not available."""
+        if candidates:
+            source, title, confidence = candidates[0]
+            return ResolvedTitle(title, source, confidence)
+        return ResolvedTitle(None, "none", 0.0)
+
+    @staticmethod
+    def _inferred(title: Optional[str]) -> ResolvedTitle:
+        return ResolvedTitle(title, "llm", 0.7 if title else 0.0)
+
+    def hit_rates(self) -> dict:
+        """Share of titles taken from each source."""
+        with self._lock:
+            total = sum(self.hits.values())
+            return {source: count / total for source, count in self.hits.most_common()} if total else {}
+
+    def print_hit_rates(self):
+        with self._lock:
+            total = sum(self.hits.values())
+        if not total:
+            return
+        rates = ", ".join(f"{source} {rate:.0%}" for source, rate in self.hit_rates().items())
+        print(f"Title sources over {total} papers: {rates}")
+
+
+if __name__ == "__main__":
+    # Example usage: titles of a folder without any model call
+    from pdfWorker import PDFWorker
+
+    worker = PDFWorker()
+    resolver = TitleResolver()
+    for filename, sections in worker.iter_pdfs_from_folder("pdfs_folder"):
+        resolved = resolver.resolve(sections.text, sections, pdf_worker=worker)
+        print(f"{resolved.confidence:.2f} {resolved.source:<9} {filename}: {resolved.title}")
+    resolver.print_hit_rates()
@@ -1,27 +1,63 @@
+import hashlib
 import json
 import os
+from contextlib import contextmanager
+from file_lock import locked, atomic_write_json, read_json
 
 class TopicDatabase:
     def __init__(self, db_file="topics.json"):
         """Initialize the topic database with a file path."""
         self.db_file = db_file
+        # (file signature, parsed contents) of the last read; shared by readers, so never modified
+        self._cache = None
         self._ensure_db_exists()
 
     def _ensure_db_exists(self):
         """Create the database file if it doesn't exist."""
-        if not os.path.exists(self.db_file):
-            with open(self.db_file, 'w') as f:
-                json.dump({}, f)
+        with locked(self.db_file):
+            if not os.path.exists(self.db_file):
+                atomic_write_json(self.db_file, {})
+
+    def _signature(self):
+        """Identity of the file's current version; writes replace the file, so it changes with every write."""
+        try:
+            stat = os.stat(self.db_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
 
     def _load_db(self):
-        """Load the current state of the database."""
-        with open(self.db_file, 'r') as f:
-            return json.load(f)
+        """
+        Load the current state of the database.
+        The file is parsed again only when it changed since the last read, so
+        a long-running process does not re-read an unchanged database on every
+        lookup. The returned dictionary must not be modified.
+        """
+        with locked(self.db_file, exclusive=False):
+            signature = self._signature()
+            cached = self._cache
+            if cached is None or cached[0] != signature:
+                cached = (signature, read_json(self.db_file, default={}))
+                self._cache = cached
+            return cached[1]
 
     def _save_db(self, data):
         """Save the database state to file."""
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        with locked(self.db_file):
+            atomic_write_json(self.db_file, data)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Read-modify-write the database under an exclusive lock.
+        Yields the freshly loaded dictionary; changes made to it are written
+        back atomically on exit, so concurrent writers never lose updates.
+        """
+        with locked(self.db_file):
+            data = read_json(self.db_file, default={})
+            yield data
+            atomic_write_json(self.db_file, data)
+            self._cache = (self._signature(), data)
 
     def search_topic(self, topic_name):
         """
@@ -38,20 +74,18 @@ class TopicDatabase:
             topic_name (str): The topic's name
             topic_dict (dict): Dictionary containing topic information
         """
-        db = self._load_db()
-        db[topic_name] = topic_dict
-        self._save_db(db)
+        with self._transaction() as db:
+            db[topic_name] = topic_dict
 
     def delete_topic(self, topic_name):
         """
         Delete a topic from the database.
         Returns True if topic was found and deleted, False otherwise.
         """
-        db = self._load_db()
-        if topic_name in db:
-            del db[topic_name]
-            self._save_db(db)
-            return True
+        with self._transaction() as db:
+            if topic_name in db:
+                del db[topic_name]
+                return True
         return False
 
     def list_topics(self) -> dict[str, str]:
@@ -67,10 +101,38 @@ class TopicDatabase:
             for topic, data in db.items()
         }
 
+    def get_all_topics(self) -> dict:
+        """
+        Return the full contents of the topic database.
+        
+        Returns:
+            dict: Dictionary with topic names as keys and topic dictionaries as values
+        """
+        return self._load_db()
+
+    @staticmethod
+    def content_hash(topic_dict) -> str:
+        """
+        Fingerprint of a topic's content (description, status, challenges,
+        important papers, ...). Stored with each paper's topic connection so
+        connections can be refreshed when the topic is edited.
+        """
+        payload = json.dumps(topic_dict, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def topic_hashes(self) -> dict[str, str]:
+        """
+        Return the content hash of every topic.
+        
+        Returns:
+            dict[str, str]: Dictionary with topic names as keys and content hashes as values
+        """
+        return {topic: self.content_hash(data) for topic, data in self._load_db().items()}
+
     def save(self):
         """Save current database state to file."""
-        db = self._load_db()
-        self._save_db(db)
+        with self._transaction():
+            pass
 
 if __name__ == "__main__":
     # Create a database instance
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+
+from scheduler import tokenize
+
+Paper = Union[dict, str]
+
+def paper_text(paper: Paper) -> str:
+    """Searchable text of an important-paper entry (title and summary, or the plain string)."""
+    if isinstance(paper, dict):
+        return f"{paper.get('title', '')} {paper.get('summary', '')}"
+    return str(paper)
+
+class PaperIndex:
+    def __init__(self, papers: List[Paper]):
+        """
+        TF-IDF vectors of one topic's important papers.
+
+        Args:
+            papers (List[Paper]): The topic's important_papers entries
+        """
+        self.papers = papers
+        documents = [Counter(tokenize(paper_text(paper))) for paper in papers]
+        document_frequency = Counter()
+        for terms in documents:
+            document_frequency.update(terms.keys())
+        n = len(documents)
+        self.idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.vectors = [self._weigh(terms) for terms in documents]
+
+    def _weigh(self, terms: Counter) -> Dict[str, float]:
+        """Sublinear tf-idf weights, L2-normalized."""
+        weights = {term: (1 + math.log(count)) * self.idf.get(term, 0.0) for term, count in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {term: w / norm for term, w in weights.items() if w} if norm else {}
+
+    def search(self, query: str, k: int) -> List[Tuple[float, Paper]]:
+        """The k papers most similar to the query, best first."""
+        query_vector = self._weigh(Counter(tokenize(query)))
+        scores = [
+            sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items())
+            for vector in self.vectors
+        ]
+        # Ties keep the topic's own order
+        ranked = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        return [(scores[i], self.papers[i]) for i in ranked[:k]]
+
+class TopicIndex:
+    def __init__(self):
+        """
+        Per-topic retrieval over important papers.
+
+        Each topic's index is built once and reused until the topic's
+        important_papers change, so ranking costs one pass over the query.
+        """
+        self._indexes: Dict[str, Tuple[str, PaperIndex]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(papers: List[Paper]) -> str:
+        return hashlib.sha1(json.dumps(papers, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def index_for(self, topic: str, topic_info: dict) -> PaperIndex:
+        """The (cached) index of a topic's current important papers."""
+        papers = topic_info.get('important_papers', []) or []
+        fingerprint = self._fingerprint(papers)
+        with self._lock:
+            cached = self._indexes.get(topic)
+            if cached and cached[0] == fingerprint:
+                return cached[1]
+        index = PaperIndex(papers)
+        with self._lock:
+            self._indexes[topic] = (fingerprint, index)
+        return index
+
+    def top_k(self, topic: str, topic_info: dict, query: str, k: Optional[int] = 10) -> List[Paper]:
+        """
+        The topic's important papers most relevant to a query.
+
+        Args:
+            topic (str): Topic name
+            topic_info (dict): Topic database entry
+            query (str): Text of the new paper (title, summary, methodology, keywords)
+            k (Optional[int]): Number of papers to return (None: all, in their original order)
+
+        Returns:
+            List[Paper]: Up to k important-paper entries, most relevant first
+        """
+        papers = topic_info.get('important_papers', []) or []
+        if k is None or len(papers) <= k:
+            return list(papers)
+        return [paper for _, paper in self.index_for(topic, topic_info).search(query, k)]
+
+
+if __name__ == "__main__":
+    # Example usage
+    from topic_database import TopicDatabase
+
+    index = TopicIndex()
+    for topic, info in TopicDatabase().get_all_topics().items():
+        for paper in index.top_k(topic, info, "graph neural networks for molecules", k=3):
+            print(f"{topic}: {paper_text(paper)[:80]}")
@@ -0,0 +1,288 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from file_lock import atomic_write_json, read_json
+
+class FolderWatcher:
+    def __init__(self, folder: str, settle_seconds: float = 2.0, state_file: str = ".watch_state.json"):
+        """
+        Detect new, completely written PDFs in a folder by polling.
+
+        A file is reported once its size and modification time have not changed
+        for settle_seconds and it ends with a PDF trailer, so files still being
+        copied or downloaded are not picked up half-written. Files already
+        handed out are remembered in a state file inside the folder, so a
+        restarted watcher does not re-analyze them.
+
+        Args:
+            folder (str): Folder to watch
+            settle_seconds (float): How long a file must stay unchanged
+            state_file (str): Name of the state file inside the folder
+        """
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        self.state_path = os.path.join(folder, state_file)
+        os.makedirs(folder, exist_ok=True)
+        # path -> (size, mtime_ns, time the signature was first seen)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        self._seen: Dict[str, List[int]] = read_json(self.state_path, default={}) or {}
+        # Files handed out but not yet marked done
+        self._in_progress: Dict[str, List[int]] = {}
+        # Files to hand out again: name -> (path, due time)
+        self._retry: Dict[str, Tuple[str, float]] = {}
+
+    @staticmethod
+    def _is_complete_pdf(path: str) -> bool:
+        """Check for the %%EOF trailer at the end of the file."""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 2048))
+                return b'%%EOF' in f.read()
+        except OSError:
+            return False
+
+    def mark_done(self, path: str):
+        """Remember a file as handled."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self._in_progress.pop(os.path.basename(path), None)
+        self._seen[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+        atomic_write_json(self.state_path, self._seen)
+
+    def seed(self, names: set) -> int:
+        """
+        Remember PDFs whose file name (without extension) is in names as handled,
+        e.g. papers analyzed before the watcher was first started on the folder.
+
+        Returns:
+            int: Number of files added to the state
+        """
+        added = 0
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.pdf') or entry.name in self._seen or not entry.is_file():
+                    continue
+                if Path(entry.name).stem in names:
+                    stat = entry.stat()
+                    self._seen[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                    added += 1
+        if added:
+            atomic_write_json(self.state_path, self._seen)
+        return added
+
+    def retry(self, path: str, delay: float):
+        """Hand a file out again after `delay` seconds, e.g. after a transient analysis error."""
+        self._retry[os.path.basename(path)] = (path, time.monotonic() + delay)
+
+    def poll(self) -> List[str]:
+        """
+        Scan the folder once.
+
+        Returns:
+            List[str]: Paths of new PDFs that are ready to process
+        """
+        now = time.monotonic()
+        ready = []
+        present = set()
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith('.pdf') or entry.name.startswith('.') or not entry.is_file():
+                    continue
+                present.add(entry.path)
+                stat = entry.stat()
+                signature = [stat.st_size, stat.st_mtime_ns]
+                if self._seen.get(entry.name) == signature or self._in_progress.get(entry.name) == signature:
+                    continue
+
+                previous = self._candidates.get(entry.path)
+                if previous is None or list(previous[:2]) != signature:
+                    self._candidates[entry.path] = (stat.st_size, stat.st_mtime_ns, now)
+                    continue
+                if now - previous[2] >= self.settle_seconds and self._is_complete_pdf(entry.path):
+                    ready.append(entry.path)
+                    self._in_progress[entry.name] = signature
+                    del self._candidates[entry.path]
+
+        # Forget candidates that disappeared (e.g. renamed by a downloader)
+        for path in list(self._candidates):
+            if path not in present:
+                del self._candidates[path]
+
+        for name, (path, due) in list(self._retry.items()):
+            if now < due:
+                continue
+            del self._retry[name]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._in_progress.pop(name, None)
+                continue
+            # A file rewritten meanwhile is picked up as a new candidate instead
+            if self._in_progress.get(name) == [stat.st_size, stat.st_mtime_ns] and path not in ready:
+                ready.append(path)
+        return sorted(ready)
+
+    def watch(self, poll_interval: float = 1.0, stop: Optional[threading.Event] = None) -> Iterator[str]:
+        """Yield ready PDFs as they appear until `stop` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            for path in self.poll():
+                yield path
+            stop.wait(poll_interval)
+
+
+def watch_and_process(folder: str, paper_db, topic_db, researcher, poll_interval: float = 1.0,
+                      settle_seconds: float = 2.0, max_pending: int = 8, workers: int = 1,
+                      flush_every: int = 10, stop: Optional[threading.Event] = None, pdf_worker=None,
+                      search_index=None, max_attempts: int = 3, retry_seconds: float = 30.0):
+    """
+    Analyze PDFs as soon as they land in a folder, until interrupted.
+
+    The watcher feeds a bounded queue; when analysis falls behind, the queue
+    fills up and the watcher stops scanning until a slot frees up, so a burst
+    of downloads never builds an unbounded backlog in memory.
+
+    A paper whose analysis fails (e.g. Ollama unreachable) is queued again
+    after retry_seconds, doubling with every attempt; after max_attempts it
+    is left for the next start. PDFs without extractable text are not retried.
+
+    Args:
+        folder (str): Folder to watch
+        paper_db (PaperDatabase): Database of processed papers
+        topic_db (TopicDatabase): Database of research topics
+        researcher (Researcher): Researcher instance for paper analysis
+        poll_interval (float): Seconds between folder scans
+        settle_seconds (float): How long a file must stay unchanged before analysis
+        max_pending (int): Maximum papers waiting for analysis
+        workers (int): Analysis threads (useful with several Ollama endpoints)
+        flush_every (int): Write result CSVs after this many new papers
+        stop (Optional[threading.Event]): Set to shut down
+        pdf_worker (Optional[PDFWorker]): PDF worker with the page/character/file size caps to use
+        search_index (Optional[SearchIndex]): Full-text index new papers are added to
+        max_attempts (int): Analysis attempts per paper in this session
+        retry_seconds (float): Delay before the first retry of a failed paper
+    """
+    # Imported here because main imports this module
+    from main import load_known_titles, process_paper, save_extraction_report, save_results
+    from pdfWorker import PDFWorker
+
+    stop = stop or threading.Event()
+    watcher = FolderWatcher(folder, settle_seconds=settle_seconds)
+    # Papers analyzed before (e.g. by a batch run) are not extracted again
+    seeded = watcher.seed(paper_db.processed_filenames())
+    if seeded:
+        print(f"Skipping {seeded} papers already in the paper database")
+    pending: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_pending)
+    results_lock = threading.Lock()
+    # Failed analysis attempts by path
+    attempts: Dict[str, int] = {}
+    all_analyses: List[dict] = []
+    all_connections: List[dict] = []
+
+    pdf_worker = pdf_worker or PDFWorker()
+    # Entries of pdf_worker.report already written
+    reported = [0]
+
+    def flush():
+        if search_index is not None:
+            search_index.flush()
+        with results_lock:
+            if all_analyses or all_connections:
+                save_results(list(all_analyses), list(all_connections))
+                all_analyses.clear()
+                all_connections.clear()
+            # Truncated and skipped PDFs since the last flush
+            save_extraction_report(pdf_worker.report[reported[0]:])
+            reported[0] = len(pdf_worker.report)
+
+    def analyze():
+        while True:
+            path = pending.get()
+            if path is None:
+                return
+            start = time.monotonic()
+            done = True
+            try:
+                sections = pdf_worker.extract_paper(path)
+                if sections and sections.text:
+                    stem = Path(path).stem
+                    title = load_known_titles(folder).get(stem)
+                    result = process_paper(stem, sections.text, paper_db, topic_db, researcher, title, sections,
+                                           search_index)
+                    if result is not None:
+                        analysis_dict, connection_dict = result
+                        with results_lock:
+                            all_analyses.append(analysis_dict)
+                            if connection_dict:
+                                all_connections.append(connection_dict)
+                            should_flush = len(all_analyses) >= flush_every
+                        if should_flush:
+                            flush()
+                print(f"Finished {os.path.basename(path)} in {time.monotonic() - start:.1f}s")
+            except Exception as e:
+                print(f"Error processing {path}: {str(e)}")
+                traceback.print_exc()
+                done = False
+                with results_lock:
+                    attempts[path] = attempts.get(path, 0) + 1
+                    failed = attempts[path]
+                if failed < max_attempts:
+                    delay = retry_seconds * 2 ** (failed - 1)
+                    print(f"Retrying {os.path.basename(path)} in {delay:.0f}s (attempt {failed + 1}/{max_attempts})")
+                    watcher.retry(path, delay)
+                else:
+                    print(f"Giving up on {os.path.basename(path)} after {failed} attempts; "
+                          f"it is retried after a restart")
+            if done:
+                # Analyzed, already known, or without extractable text: not retried
+                with results_lock:
+                    attempts.pop(path, None)
+                    watcher.mark_done(path)
+
+    threads = [threading.Thread(target=analyze, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    print(f"Watching {folder} for new papers (Ctrl-C to stop)...")
+    try:
+        for path in watcher.watch(poll_interval, stop):
+            # Blocks while the analysis queue is full (backpressure)
+            while not stop.is_set():
+                try:
+                    pending.put(path, timeout=poll_interval)
+                    print(f"Queued {os.path.basename(path)} ({pending.qsize()} pending)")
+                    break
+                except queue.Full:
+                    continue
+    except KeyboardInterrupt:
+        print("\nStopping watch mode...")
+    finally:
+        stop.set()
+        # Drop queued papers; they are not marked done and get picked up next time
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                break
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        flush()
+
+
+if __name__ == "__main__":
+    # Example usage: print PDFs as they finish arriving
+    watcher = FolderWatcher("pdfs_folder")
+    for path in watcher.watch():
+        print(f"Ready: {path}")
+        watcher.mark_done(path)
@@ -0,0 +1,379 @@
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS papers_status ON papers (status, lease_expires);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    started_at REAL,
+    last_seen REAL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    busy_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+class WorkQueue:
+    def __init__(self, db_file: str = "work_queue.db", lease_seconds: float = 900, max_attempts: int = 3):
+        """
+        Durable paper queue backed by SQLite.
+        The database can live on a shared filesystem so that workers on several
+        machines can pull from the same queue. The default rollback journal is
+        used (not WAL) because WAL does not work over network filesystems.
+
+        Args:
+            db_file (str): Path to the SQLite file
+            lease_seconds (float): How long a leased paper stays reserved for its worker
+            max_attempts (int): Number of leases before a paper is marked as failed
+        """
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection; each thread and process uses its own."""
+        conn = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, paths: List[str]) -> int:
+        """
+        Register PDFs for processing. Paths already in the queue are ignored.
+
+        Returns:
+            int: Number of newly enqueued papers
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO papers (path, enqueued_at) VALUES (?, ?)",
+                [(os.path.abspath(p), now) for p in paths]
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def lease(self, worker_id: str) -> Optional[Tuple[int, str]]:
+        """
+        Reserve the next pending paper for a worker.
+        Papers whose lease expired (crashed or stalled worker) are handed out again.
+
+        Returns:
+            Optional[Tuple[int, str]]: (paper id, path), or None if nothing is available
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """SELECT id, path FROM papers
+                   WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                     AND attempts < ?
+                   ORDER BY id LIMIT 1""",
+                (now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                # Expired leases that used up their attempts are failures
+                conn.execute(
+                    """UPDATE papers SET status = 'failed', error = COALESCE(error, 'lease expired')
+                       WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                    (now, self.max_attempts)
+                )
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """UPDATE papers SET status = 'leased', worker = ?, lease_expires = ?,
+                          attempts = attempts + 1, started_at = ?
+                   WHERE id = ?""",
+                (worker_id, now + self.lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        return row["id"], row["path"]
+
+    def renew(self, paper_id: int, worker_id: str) -> bool:
+        """Extend the lease of a paper still being processed. Returns False if the lease was lost."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE papers SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, paper_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+    def ack(self, paper_id: int, worker_id: str, busy_seconds: float) -> bool:
+        """
+        Mark a paper as done.
+
+        Returns:
+            bool: False if the worker had lost its lease (the paper was handed to
+            another worker), in which case the paper is left alone
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            acked = conn.execute(
+                """UPDATE papers SET status = 'done', finished_at = ?, error = NULL
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (now, paper_id, worker_id)
+            ).rowcount == 1
+            conn.execute(
+                """UPDATE workers SET processed = processed + ?, busy_seconds = busy_seconds + ?,
+                          last_seen = ? WHERE worker_id = ?""",
+                (int(acked), busy_seconds, now, worker_id)
+            )
+            conn.execute("COMMIT")
+        return acked
+
+    def fail(self, paper_id: int, worker_id: str, error: str, busy_seconds: float) -> bool:
+        """
+        Release a paper after an error; it is retried until max_attempts is reached.
+
+        Returns:
+            bool: False if the worker had lost its lease, in which case the paper is left alone
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            released = conn.execute(
+                """UPDATE papers SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                          lease_expires = NULL, finished_at = ?, error = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (self.max_attempts, now, error, paper_id, worker_id)
+            ).rowcount == 1
+            conn.execute(
+                """UPDATE workers SET failed = failed + ?, busy_seconds = busy_seconds + ?,
+                          last_seen = ? WHERE worker_id = ?""",
+                (int(released), busy_seconds, now, worker_id)
+            )
+            conn.execute("COMMIT")
+        return released
+
+    def register_worker(self, worker_id: str, host: Optional[str]):
+        """Record a worker so its progress shows up in `status`."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO workers (worker_id, host, started_at, last_seen) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(worker_id) DO UPDATE SET host = excluded.host, last_seen = excluded.last_seen""",
+                (worker_id, host, now, now)
+            )
+
+    def requeue_failed(self) -> int:
+        """Reset failed papers to pending. Returns the number of papers requeued."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE papers SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'"
+            )
+            return cur.rowcount
+
+    def status(self) -> dict:
+        """
+        Summarize queue progress and per-worker throughput.
+
+        Returns:
+            dict: {"papers": {status: count}, "workers": [worker stats]}
+        """
+        with self._connect() as conn:
+            counts = {
+                row["status"]: row["n"]
+                for row in conn.execute("SELECT status, COUNT(*) AS n FROM papers GROUP BY status")
+            }
+            workers = []
+            for row in conn.execute("SELECT * FROM workers ORDER BY worker_id"):
+                worker = dict(row)
+                elapsed = max(worker["last_seen"] - worker["started_at"], 1e-9)
+                worker["papers_per_hour"] = worker["processed"] / elapsed * 3600
+                worker["seconds_per_paper"] = (
+                    worker["busy_seconds"] / worker["processed"] if worker["processed"] else None
+                )
+                workers.append(worker)
+        return {"papers": counts, "workers": workers}
+
+
+def run_worker(queue: WorkQueue, model: str, host: Optional[str], worker_id: Optional[str] = None,
+               poll_interval: float = 10, exit_when_empty: bool = False,
+               search_index_path: str = "paper_index.db"):
+    """
+    Lease, process and ack papers until the queue is drained (or forever).
+
+    Args:
+        queue (WorkQueue): The shared queue
+        model (str): Ollama model name
+        host (Optional[str]): Ollama server this worker talks to
+        worker_id (Optional[str]): Unique worker name (default: hostname-pid)
+        poll_interval (float): Seconds to wait when the queue is empty
+        exit_when_empty (bool): Stop instead of polling when no work is left
+        search_index_path (str): Full-text index the extracted text of new papers is added to
+    """
+    # Imported here so that enqueue/status don't need the model stack installed
+    from client import OllamaClient
+    from main import load_databases, load_known_titles, process_paper, save_results
+    from pdfWorker import PDFWorker
+    from researcher import Researcher
+    from search_index import SearchIndex
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue.register_worker(worker_id, host)
+
+    researcher = Researcher(OllamaClient(model=model, host=host))
+    paper_db, topic_db = load_databases()
+    pdf_worker = PDFWorker()
+    search_index = SearchIndex(search_index_path)
+    all_analyses: List[dict] = []
+    all_connections: List[dict] = []
+
+    print(f"Worker {worker_id} started (host: {host or 'default'}, model: {model})")
+    try:
+        while True:
+            leased = queue.lease(worker_id)
+            if leased is None:
+                if exit_when_empty:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            paper_id, path = leased
+            print(f"[{worker_id}] Processing {path}")
+
+            # Keep the lease alive while the model works on long papers
+            stop = threading.Event()
+            def heartbeat():
+                while not stop.wait(queue.lease_seconds / 3):
+                    if not queue.renew(paper_id, worker_id):
+                        print(f"[{worker_id}] Lost lease on {path}")
+                        return
+            renewer = threading.Thread(target=heartbeat, daemon=True)
+            renewer.start()
+
+            start = time.monotonic()
+            try:
+                sections = pdf_worker.extract_paper(path)
+                if not sections or not sections.text:
+                    raise ValueError("could not extract text")
+                title = load_known_titles(os.path.dirname(path)).get(Path(path).stem)
+                result = process_paper(Path(path).stem, sections.text, paper_db, topic_db, researcher, title, sections,
+                                       search_index)
+                if result is not None:
+                    analysis_dict, connection_dict = result
+                    all_analyses.append(analysis_dict)
+                    if connection_dict:
+                        all_connections.append(connection_dict)
+                if not queue.ack(paper_id, worker_id, time.monotonic() - start):
+                    print(f"[{worker_id}] Lost lease on {path}; another worker now holds it")
+            except Exception as e:
+                print(f"[{worker_id}] Error processing {path}: {str(e)}")
+                traceback.print_exc()
+                if not queue.fail(paper_id, worker_id, str(e), time.monotonic() - start):
+                    print(f"[{worker_id}] Lost lease on {path}; another worker now holds it")
+            finally:
+                stop.set()
+                renewer.join()
+    except KeyboardInterrupt:
+        print(f"Worker {worker_id} interrupted")
+    finally:
+        search_index.flush()
+        save_results(all_analyses, all_connections)
+
+
+def print_status(status: dict):
+    """Print queue progress and worker throughput."""
+    papers = status["papers"]
+    total = sum(papers.values())
+    print(f"Papers: {total} total - " + ", ".join(f"{k}: {v}" for k, v in sorted(papers.items())))
+    if not status["workers"]:
+        return
+    print(f"\n{'worker':<30} {'host':<28} {'done':>6} {'failed':>6} {'papers/h':>9} {'s/paper':>8}")
+    for w in status["workers"]:
+        per_paper = f"{w['seconds_per_paper']:.1f}" if w["seconds_per_paper"] is not None else "-"
+        print(f"{w['worker_id']:<30} {(w['host'] or 'default'):<28} {w['processed']:>6} "
+              f"{w['failed']:>6} {w['papers_per_hour']:>9.1f} {per_paper:>8}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Shared work queue for distributed paper processing')
+    parser.add_argument('--queue', type=str, default='work_queue.db',
+                        help='Path to the queue database (default: work_queue.db)')
+    parser.add_argument('--lease', type=float, default=900,
+                        help='Lease duration in seconds (default: 900)')
+    parser.add_argument('--max_attempts', type=int, default=3,
+                        help='Attempts per paper before it is marked failed (default: 3)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help='Register PDFs (files or folders) in the queue')
+    enqueue.add_argument('paths', nargs='+', help='PDF files or folders containing PDFs')
+
+    worker = sub.add_parser('worker', help='Process papers from the queue')
+    worker.add_argument('--model', type=str, default='llama3.1',
+                        help='Name of the Ollama model to use (default: llama3.1)')
+    worker.add_argument('--host', type=str, default=None,
+                        help='Ollama server URL for this worker (default: OLLAMA_HOST or localhost)')
+    worker.add_argument('--worker_id', type=str, default=None,
+                        help='Unique worker name (default: hostname-pid)')
+    worker.add_argument('--poll', type=float, default=10,
+                        help='Seconds to wait when the queue is empty (default: 10)')
+    worker.add_argument('--exit_when_empty', action='store_true',
+                        help='Stop when the queue is drained instead of waiting for more work')
+    worker.add_argument('--search_index', type=str, default='paper_index.db',
+                        help='Full-text index the extracted text of new papers is added to (default: paper_index.db)')
+
+    sub.add_parser('status', help='Show queue progress and per-worker throughput')
+    sub.add_parser('requeue_failed', help='Reset failed papers to pending')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    queue = WorkQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+
+    if args.command == 'enqueue':
+        pdfs = []
+        for path in args.paths:
+            p = Path(path)
+            if p.is_dir():
+                pdfs.extend(str(f) for f in p.glob("*.pdf"))
+            else:
+                pdfs.append(str(p))
+        added = queue.enqueue(pdfs)
+        print(f"Enqueued {added} new papers ({len(pdfs) - added} already queued)")
+    elif args.command == 'worker':
+        run_worker(queue, args.model, args.host, args.worker_id, args.poll, args.exit_when_empty,
+                   args.search_index)
+    elif args.command == 'status':
+        print_status(queue.status())
+    elif args.command == 'requeue_failed':
+        print(f"Requeued {queue.requeue_failed()} failed papers")
+
+
+if __name__ == "__main__":
+    main()